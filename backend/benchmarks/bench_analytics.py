@@ -0,0 +1,203 @@
+# benchmarks/bench_analytics.py
+"""
+分析报表基准测试：取回全部文档在 Python 中计数（旧实现） vs 当前 analytics_service
+
+在独立的基准库中生成指定数量的合成反馈（全部落在统计的 7 天范围内，带完整正文和图片），
+分别计时 overview / type_distribution / trend / category 四个报表，并校验新旧结果一致。
+每次补齐数据后重建这 7 天的每日统计（相当于爬虫写入时的刷新），今天仍是实时聚合。
+
+用法（需要可用的 MongoDB，默认写入 SentinelEye_bench 库，会清空其中的 feedbacks 集合）:
+    python -m backend.benchmarks.bench_analytics --sizes 10000,100000,1000000 --rounds 3
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+CATEGORIES = ["蓝屏", "游戏问题", "安全卫士", "驱动", "浏览器", "  ", "", None]
+STATUSES = ["", "已解决", "确认解决", "已答复", "处理中", None]
+RESOLVED = ['已解决', '确认解决', '已答复']
+
+
+# ======================
+# 旧实现（与改造前的 analytics_service 逻辑一致）
+# ======================
+def legacy_fetch(collection, start_dt: date, end_dt: date) -> list:
+    query = {"created_at": {
+        "$gte": datetime.combine(start_dt, datetime.min.time()),
+        "$lt": datetime.combine(end_dt + timedelta(days=1), datetime.min.time()),
+    }}
+    return [dict(doc) for doc in collection.find(query).sort("created_at", 1)]
+
+
+def legacy_overview(collection, start_dt: date, end_dt: date) -> dict:
+    this_week = legacy_fetch(collection, start_dt, end_dt)
+    last_week = legacy_fetch(collection, start_dt - timedelta(days=7), end_dt - timedelta(days=7))
+    this_resolved = len([f for f in this_week if f.get("status") in RESOLVED])
+    last_resolved = len([f for f in last_week if f.get("status") in RESOLVED])
+    analyzed = [f for f in legacy_fetch(collection, start_dt, end_dt) if f.get("ai_analyzed") is True]
+    return {
+        "total_feedback": len(this_week),
+        "resolved_feedback": this_resolved,
+        "pending_feedback": len(this_week) - this_resolved,
+        "this_week_ai_check": len(analyzed),
+        "pending_change": (len(this_week) - this_resolved) - (len(last_week) - last_resolved),
+    }
+
+
+def _legacy_category(cat) -> str:
+    return str(cat).strip() if cat and str(cat).strip() else "未知"
+
+
+def legacy_type_distribution(collection, start_dt: date, end_dt: date) -> list:
+    counter = Counter(_legacy_category(fb.get("category")) for fb in legacy_fetch(collection, start_dt, end_dt))
+    return counter.most_common()
+
+
+def legacy_trend(collection, start_dt: date, end_dt: date) -> dict:
+    feedbacks = legacy_fetch(collection, start_dt, end_dt)
+    counter = Counter(_legacy_category(fb.get("category")) for fb in feedbacks)
+    top3 = [item[0] for item in counter.most_common(3)]
+    dates = [(start_dt + timedelta(days=i)).strftime("%m-%d") for i in range(min(7, (end_dt - start_dt).days + 1))]
+    daily = defaultdict(lambda: defaultdict(int))
+    for fb in feedbacks:
+        daily[fb["created_at"].strftime("%m-%d")][_legacy_category(fb.get("category"))] += 1
+    return {"dates": dates, "series": [[daily[d].get(cat, 0) for d in dates] for cat in top3], "top3": top3}
+
+
+# ======================
+# 新实现（当前 analytics_service）
+# ======================
+def new_overview(start: str, end: str) -> dict:
+    from backend.services.analytics_service import generate_overview
+    result = generate_overview(start, end)
+    return {
+        "total_feedback": result["total_feedback"],
+        "resolved_feedback": result["resolved_feedback"],
+        "pending_feedback": result["pending_feedback"],
+        "this_week_ai_check": result["this_week_ai_check"],
+        "pending_change": result["pending_change"],
+    }
+
+
+def new_type_distribution(start: str, end: str) -> list:
+    from backend.services.analytics_service import generate_type_distribution
+    return [(item["name"], item["value"]) for item in generate_type_distribution(start, end)]
+
+
+def new_trend(start: str, end: str) -> dict:
+    from backend.services.analytics_service import generate_trend
+    result = generate_trend(start, end)
+    return {
+        "dates": result["dates"],
+        "series": [item["data"] for item in result["series"]],
+        "top3": [item["name"] for item in result["series"]],
+    }
+
+
+def new_category(start: str, end: str) -> list:
+    from backend.services.analytics_service import generate_category_analysis
+    return [(item["name"], item["value"]) for item in generate_category_analysis(start, end)]
+
+
+# ======================
+# 数据生成
+# ======================
+def make_feedback(index: int, start_dt: date, rng: random.Random) -> dict:
+    created = datetime.combine(start_dt, datetime.min.time()) + timedelta(seconds=rng.randrange(7 * 86400))
+    return {
+        "post_id": f"normalthread_{10000000 + index}",
+        "title": f"电脑玩游戏时蓝屏 第{index}帖",
+        "username": f"user{index % 997}",
+        "category": rng.choice(CATEGORIES),
+        "status": rng.choice(STATUSES),
+        "has_attachment": index % 3 == 0,
+        "created_at": created,
+        "view_count": rng.randrange(1000),
+        "reply_count": rng.randrange(50),
+        "url": f"https://bbs.360.cn/thread-{10000000 + index}-1-1.html",
+        "content": "电脑在运行游戏一段时间后出现蓝屏，错误代码 0x0000007E，已尝试更新显卡驱动。\n" * 12,
+        "images": [f"https://img.example.com/forum/{index}/{i}.jpg" for i in range(2)],
+        "crawl_time": created,
+        "ai_analyzed": True if index % 4 == 0 else None,
+    }
+
+
+def fill_collection(collection, target: int, start_dt: date, batch: int = 5000):
+    """补齐到 target 条（逐级增大规模时只插入增量）"""
+    rng = random.Random(target)
+    current = collection.estimated_document_count()
+    while current < target:
+        size = min(batch, target - current)
+        collection.insert_many([make_feedback(current + i, start_dt, rng) for i in range(size)], ordered=False)
+        current += size
+
+
+def timed(func, rounds: int):
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析报表基准测试：Python 计数 vs 聚合管道")
+    parser.add_argument("--sizes", type=str, default="10000,100000,1000000", help="逗号分隔的反馈数量（默认 10k,100k,1M）")
+    parser.add_argument("--rounds", type=int, default=3, help="每项取最好成绩的轮数（默认 3）")
+    parser.add_argument("--db", type=str, default="SentinelEye_bench", help="基准测试使用的数据库（会清空 feedbacks）")
+    parser.add_argument("--skip-legacy-above", type=int, default=0, help="超过该规模时跳过旧实现（0 表示不跳过）")
+    args = parser.parse_args()
+
+    # 必须在导入 service 之前切换数据库
+    os.environ["DB_NAME"] = args.db
+    from backend.core.mongo_client import feedbacks_collection as collection
+    import backend.services.analytics_service as analytics
+    import backend.services.feedback_service as feedback_service
+    from backend.services.daily_stats_service import daily_stats_collection, rebuild_daily_stats
+
+    # 屏蔽 service 中的调试输出，避免打印本身影响计时
+    quiet = lambda *a, **k: None
+    analytics.print = quiet
+    feedback_service.print = quiet
+
+    collection.drop()
+    daily_stats_collection.drop()
+    collection.create_index("created_at")
+
+    start_dt = date.today() - timedelta(days=6)
+    end_dt = date.today()
+    start, end = start_dt.isoformat(), end_dt.isoformat()
+
+    reports = [
+        ("overview", lambda: legacy_overview(collection, start_dt, end_dt), lambda: new_overview(start, end)),
+        ("type_dist", lambda: legacy_type_distribution(collection, start_dt, end_dt), lambda: new_type_distribution(start, end)),
+        ("trend", lambda: legacy_trend(collection, start_dt, end_dt), lambda: new_trend(start, end)),
+        ("category", lambda: legacy_type_distribution(collection, start_dt, end_dt)[:8], lambda: [
+            (name if name != "未分类" else "未知", value) for name, value in new_category(start, end)
+        ]),
+    ]
+
+    print(f"{'docs':>9}  {'report':<10}{'old ms':>10}{'new ms':>10}{'speedup':>9}  same")
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        fill_collection(collection, size, start_dt)
+        rebuild_daily_stats(start_dt, end_dt)
+        for name, old_func, new_func in reports:
+            new_ms, new_result = timed(new_func, args.rounds)
+            if args.skip_legacy_above and size > args.skip_legacy_above:
+                print(f"{size:>9}  {name:<10}{'-':>10}{new_ms:>10.1f}{'-':>9}  -")
+                continue
+            old_ms, old_result = timed(old_func, args.rounds)
+            speedup = old_ms / new_ms if new_ms else 0.0
+            same = "yes" if old_result == new_result else "NO"
+            print(f"{size:>9}  {name:<10}{old_ms:>10.1f}{new_ms:>10.1f}{speedup:>8.1f}x  {same}")
+
+    print(f"完成，基准数据保留在 {args.db}.feedbacks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_crawler_engine.py
+"""
+爬虫抓取引擎基准测试：串行 vs 并发
+
+在本地启动论坛替身（带人为网络延迟），按爬虫的真实流程
+“抓列表页 → 抓本页所有详情页” 走若干页，输出每种引擎的 pages/sec。
+
+用法:
+    python -m backend.benchmarks.bench_crawler_engine --pages 5 --latency 0.05 --concurrency 8
+"""
+import argparse
+import time
+
+from lxml import etree
+
+from backend.benchmarks.forum_server import ForumServer
+from backend.crawler.fetcher import create_fetcher
+from backend.crawler.parser import extract_post_content, parse_post_list
+
+
+def run_engine(server: ForumServer, engine: str, pages: int, concurrency: int, rate: float) -> dict:
+    fetched = 0
+    failed = 0
+    start = time.perf_counter()
+
+    with create_fetcher(engine, concurrency, rate) as fetcher:
+        for page in range(1, pages + 1):
+            posts = parse_post_list(etree.HTML(fetcher.fetch_text(server.list_url(page))))
+            fetched += 1
+
+            for result in fetcher.fetch_many([post["url"] for post in posts]):
+                if isinstance(result, Exception):
+                    failed += 1
+                else:
+                    extract_post_content(etree.HTML(result))
+                    fetched += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        "engine": engine,
+        "pages": fetched,
+        "failed": failed,
+        "seconds": elapsed,
+        "pages_per_sec": fetched / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="串行 / 并发抓取引擎基准测试（本地论坛替身）")
+    parser.add_argument("--pages", type=int, default=3, help="抓取的列表页数量（默认 3）")
+    parser.add_argument("--threads-per-page", type=int, default=30, help="每个列表页的帖子数（默认 30）")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的模拟网络延迟，秒（默认 0.05）")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发引擎的并发上限（默认 8）")
+    parser.add_argument("--rate", type=float, default=0, help="并发引擎每个 host 每秒最多请求数，<=0 不限速（默认 0）")
+    args = parser.parse_args()
+
+    with ForumServer(latency=args.latency, threads_per_page=args.threads_per_page) as server:
+        print(f"本地论坛: {server.base_url}  延迟 {args.latency * 1000:.0f}ms  "
+              f"{args.pages} 页 × {args.threads_per_page} 帖")
+
+        results = [
+            run_engine(server, "serial", args.pages, args.concurrency, args.rate),
+            run_engine(server, "async", args.pages, args.concurrency, args.rate),
+        ]
+
+    print(f"{'engine':<8}{'pages':>8}{'failed':>8}{'seconds':>10}{'pages/sec':>12}")
+    for r in results:
+        print(f"{r['engine']:<8}{r['pages']:>8}{r['failed']:>8}{r['seconds']:>10.2f}{r['pages_per_sec']:>12.1f}")
+
+    serial, concurrent = results
+    if serial["pages_per_sec"]:
+        print(f"加速比: {concurrent['pages_per_sec'] / serial['pages_per_sec']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
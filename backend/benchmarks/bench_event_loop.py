@@ -0,0 +1,171 @@
+# benchmarks/bench_event_loop.py
+"""
+事件循环阻塞基准测试：async 接口里直接调用 pymongo vs 放进数据库线程池（run_db）
+
+在独立的基准库中生成合成反馈，分别以两种模式启动 API（DB_EXECUTOR_INLINE=1 / 0）：
+若干个并发客户端持续请求重查询 /api/analytics/all（每次随机 30 天范围，且清空了每日统计，必须现场聚合），
+同时按固定间隔探测 /health 和 /api/feedback/recent，输出探测请求的 p50 / p95 / p99 延迟。
+
+用法（需要可用的 MongoDB，默认写入 SentinelEye_bench 库，会清空其中的 feedbacks / feedback_daily_stats 集合）:
+    python -m backend.benchmarks.bench_event_loop --docs 50000 --seconds 15 --heavy-concurrency 4
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+
+PROBES = ["/health", "/api/feedback/recent"]
+
+
+# ======================
+# 数据与服务
+# ======================
+def fill_feedbacks(collection, docs: int, days: int, batch: int = 5000):
+    """生成 docs 条分布在最近 days 天内的反馈"""
+    from backend.benchmarks.bench_analytics import make_feedback
+
+    rng = random.Random(docs)
+    start = datetime.combine(date.today() - timedelta(days=days - 1), datetime.min.time())
+    collection.drop()
+    collection.create_index("created_at")
+    for offset in range(0, docs, batch):
+        items = []
+        for index in range(offset, min(offset + batch, docs)):
+            item = make_feedback(index, start.date(), rng)
+            item["created_at"] = start + timedelta(seconds=rng.randrange(days * 86400))
+            items.append(item)
+        collection.insert_many(items, ordered=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, db_name: str, inline: bool) -> subprocess.Popen:
+    env = dict(os.environ, DB_NAME=db_name, DB_EXECUTOR_INLINE="1" if inline else "0")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("API 启动超时")
+
+
+# ======================
+# 负载
+# ======================
+async def heavy_worker(client: httpx.AsyncClient, deadline: float, days: int, rng: random.Random, done: list):
+    while time.monotonic() < deadline:
+        start = date.today() - timedelta(days=rng.randrange(days + 30))
+        end = start + timedelta(days=29)
+        try:
+            await client.post("/api/analytics/all", json={
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+            })
+            done.append(1)
+        except httpx.HTTPError:
+            pass
+
+
+async def probe(client: httpx.AsyncClient, path: str, latencies: dict):
+    start = time.perf_counter()
+    try:
+        await client.get(path)
+        latencies[path].append((time.perf_counter() - start) * 1000)
+    except httpx.HTTPError:
+        latencies[path].append(float("inf"))
+
+
+async def run_mode(port: int, args) -> dict:
+    latencies = {path: [] for path in PROBES}
+    heavy_done = []
+    rng = random.Random(42)
+    limits = httpx.Limits(max_connections=args.heavy_concurrency + 64)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+        await wait_ready(client)
+        deadline = time.monotonic() + args.seconds
+        heavy = [
+            asyncio.create_task(heavy_worker(client, deadline, args.days, rng, heavy_done))
+            for _ in range(args.heavy_concurrency)
+        ]
+        # 按固定间隔发出探测请求，不等待上一个探测返回（避免漏测排队时间）
+        probes = []
+        while time.monotonic() < deadline:
+            for path in PROBES:
+                probes.append(asyncio.create_task(probe(client, path, latencies)))
+            await asyncio.sleep(args.probe_interval)
+        await asyncio.gather(*probes, *heavy)
+
+    return {"latencies": latencies, "heavy": len(heavy_done)}
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件循环阻塞基准测试：直接调用 pymongo vs 数据库线程池")
+    parser.add_argument("--docs", type=int, default=50000, help="合成反馈数量（默认 50000）")
+    parser.add_argument("--days", type=int, default=90, help="反馈分布的天数（默认 90）")
+    parser.add_argument("--seconds", type=float, default=15, help="每种模式的压测时长，秒（默认 15）")
+    parser.add_argument("--heavy-concurrency", type=int, default=4, help="并发的分析请求数（默认 4）")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="探测请求间隔，秒（默认 0.05）")
+    parser.add_argument("--db", type=str, default="SentinelEye_bench", help="基准测试使用的数据库（会清空 feedbacks）")
+    args = parser.parse_args()
+
+    # 必须在导入 service 之前切换数据库
+    os.environ["DB_NAME"] = args.db
+    from backend.core.mongo_client import feedbacks_collection
+    from backend.services.daily_stats_service import daily_stats_collection
+
+    print(f"生成 {args.docs} 条反馈（近 {args.days} 天）...")
+    fill_feedbacks(feedbacks_collection, args.docs, args.days)
+
+    print(f"{'mode':<8}{'probe':<24}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  heavy done")
+    for mode, inline in (("inline", True), ("run_db", False)):
+        # 两种模式都从没有每日统计开始，分析请求必须现场聚合
+        daily_stats_collection.drop()
+        port = free_port()
+        server = start_server(port, args.db, inline)
+        try:
+            result = asyncio.run(run_mode(port, args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        for path, values in result["latencies"].items():
+            print(f"{mode:<8}{path:<24}{len(values):>6}{percentile(values, 0.5):>10.1f}"
+                  f"{percentile(values, 0.95):>10.1f}{percentile(values, 0.99):>10.1f}"
+                  f"{max(values, default=0.0):>10.1f}  {result['heavy']}")
+
+    print(f"完成，基准数据保留在 {args.db}.feedbacks")
+
+
+if __name__ == "__main__":
+    main()
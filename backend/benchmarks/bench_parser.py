@@ -0,0 +1,122 @@
+# benchmarks/bench_parser.py
+"""
+解析器离线基准测试
+
+回放一批保存下来的论坛 HTML（列表页 list_*.html、帖子详情页 thread_*.html），
+输出解析吞吐（posts/sec、threads/sec）和每页解析时的内存分配峰值，不访问线上站点。
+
+用法:
+    # 生成一批合成样本（结构与线上一致），也可以把线上抓到的页面直接放进目录
+    python -m backend.benchmarks.bench_parser --save-fixtures backend/benchmarks/fixtures
+    # 回放目录中的样本
+    python -m backend.benchmarks.bench_parser --fixtures backend/benchmarks/fixtures --rounds 20
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Tuple
+
+from lxml import etree
+
+from backend.benchmarks.forum_server import render_list_page, render_thread_page
+from backend.crawler.parser import extract_post_content, parse_post_list
+
+
+def load_corpus(fixtures_dir: str | None, pages: int) -> Tuple[List[str], List[str]]:
+    """读取样本目录；未指定目录时在内存中生成合成样本"""
+    if fixtures_dir:
+        root = Path(fixtures_dir)
+        list_pages = [p.read_text(encoding="utf-8") for p in sorted(root.glob("list_*.html"))]
+        thread_pages = [p.read_text(encoding="utf-8") for p in sorted(root.glob("thread_*.html"))]
+        if not list_pages and not thread_pages:
+            raise SystemExit(f"样本目录 {root} 中没有 list_*.html / thread_*.html")
+        return list_pages, thread_pages
+
+    list_pages = [render_list_page("https://bbs.360.cn", page) for page in range(1, pages + 1)]
+    thread_pages = [render_thread_page(16200000 - i) for i in range(pages * 10)]
+    return list_pages, thread_pages
+
+
+def save_fixtures(target_dir: str, pages: int):
+    root = Path(target_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    list_pages, thread_pages = load_corpus(None, pages)
+    for i, html in enumerate(list_pages, 1):
+        (root / f"list_{i:03d}.html").write_text(html, encoding="utf-8")
+    for i, html in enumerate(thread_pages, 1):
+        (root / f"thread_{i:04d}.html").write_text(html, encoding="utf-8")
+    print(f"已写入 {len(list_pages)} 个列表页、{len(thread_pages)} 个详情页到 {root}")
+
+
+def bench_list_pages(list_pages: List[str], rounds: int) -> dict:
+    posts = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html in list_pages:
+            posts += len(parse_post_list(etree.HTML(html)))
+    elapsed = time.perf_counter() - start
+    return {"items": posts, "seconds": elapsed}
+
+
+def bench_thread_pages(thread_pages: List[str], rounds: int) -> dict:
+    threads = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for html in thread_pages:
+            extract_post_content(etree.HTML(html))
+            threads += 1
+    elapsed = time.perf_counter() - start
+    return {"items": threads, "seconds": elapsed}
+
+
+def measure_allocations(func, pages: List[str]) -> Tuple[float, float]:
+    """逐页测量解析过程中的内存分配峰值：返回（每页平均峰值 KiB，最大峰值 KiB）"""
+    if not pages:
+        return 0.0, 0.0
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for html in pages:
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func(etree.HTML(html))
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(max(peak - baseline, 0) / 1024)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks), max(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="论坛解析器离线基准测试")
+    parser.add_argument("--fixtures", type=str, default=None, help="HTML 样本目录（默认使用合成样本）")
+    parser.add_argument("--save-fixtures", type=str, default=None, help="生成合成样本到指定目录后退出")
+    parser.add_argument("--pages", type=int, default=10, help="合成样本的列表页数量（默认 10）")
+    parser.add_argument("--rounds", type=int, default=10, help="回放轮数（默认 10）")
+    args = parser.parse_args()
+
+    if args.save_fixtures:
+        save_fixtures(args.save_fixtures, args.pages)
+        return
+
+    list_pages, thread_pages = load_corpus(args.fixtures, args.pages)
+    print(f"样本: {len(list_pages)} 个列表页, {len(thread_pages)} 个详情页, 回放 {args.rounds} 轮")
+
+    list_result = bench_list_pages(list_pages, args.rounds)
+    thread_result = bench_thread_pages(thread_pages, args.rounds)
+    list_alloc, list_peak = measure_allocations(parse_post_list, list_pages)
+    thread_alloc, thread_peak = measure_allocations(extract_post_content, thread_pages)
+
+    print(f"{'stage':<14}{'items':>10}{'seconds':>10}{'items/sec':>12}{'avg KiB':>10}{'max KiB':>10}")
+    for name, result, alloc, peak in (
+        ("list->posts", list_result, list_alloc, list_peak),
+        ("thread", thread_result, thread_alloc, thread_peak),
+    ):
+        rate = result["items"] / result["seconds"] if result["seconds"] else 0.0
+        print(f"{name:<14}{result['items']:>10}{result['seconds']:>10.3f}{rate:>12.0f}{alloc:>10.1f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_serialization.py
+"""
+列表接口序列化基准测试：逐行 Pydantic + response_model 校验（旧路径） vs 普通 dict + 快速 JSON 编码
+
+旧路径：convert_to_response 逐条构造 FeedbackResponse（strftime 格式化时间），
+FastAPI 再按 response_model=List[FeedbackResponse] 校验、转换并用标准库 json 编码。
+新路径：feedback_row 直接生成响应格式的 dict，fast_json.dumps 一次编码成 bytes。
+
+默认只测内存中的合成文档；加 --mongo 时同时测包含查询的完整路径
+（旧路径取回整个文档，新路径使用 FEEDBACK_RESPONSE_PROJECTION）。
+
+用法:
+    python -m backend.benchmarks.bench_serialization --rows 1000,10000 --rounds 5
+    python -m backend.benchmarks.bench_serialization --rows 10000 --mongo --db SentinelEye_bench
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+from typing import List
+
+from bson import ObjectId
+
+
+def old_path(docs: list, adapter) -> bytes:
+    from backend.services.feedback_service import convert_to_response
+
+    # 与 FastAPI 处理 response_model 的步骤一致：校验 → 转成 JSON 兼容对象 → JSONResponse 编码
+    validated = adapter.validate_python([convert_to_response(doc) for doc in docs])
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def new_path(docs: list) -> bytes:
+    from backend.core.fast_json import dumps
+    from backend.services.feedback_service import feedback_row
+
+    return dumps([feedback_row(doc) for doc in docs])
+
+
+def timed(func, rounds: int):
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列表接口序列化基准测试：Pydantic 逐行校验 vs 快速 JSON")
+    parser.add_argument("--rows", type=str, default="1000,10000,50000", help="逗号分隔的行数（默认 1k,10k,50k）")
+    parser.add_argument("--rounds", type=int, default=5, help="每项取最好成绩的轮数（默认 5）")
+    parser.add_argument("--mongo", action="store_true", help="同时测包含 MongoDB 查询的完整路径")
+    parser.add_argument("--db", type=str, default="SentinelEye_bench", help="--mongo 使用的数据库（会清空 feedbacks）")
+    args = parser.parse_args()
+
+    # 必须在导入 service 之前切换数据库
+    os.environ["DB_NAME"] = args.db
+    from pydantic import TypeAdapter
+
+    from backend.benchmarks.bench_analytics import make_feedback
+    from backend.core.fast_json import orjson
+    from backend.schemas.feedback import FeedbackResponse
+    from backend.services.feedback_service import FEEDBACK_RESPONSE_PROJECTION
+
+    adapter = TypeAdapter(List[FeedbackResponse])
+    encoder = "orjson" if orjson is not None else "json（未安装 orjson）"
+    print(f"编码器: {encoder}")
+    print(f"{'rows':>8}  {'path':<10}{'old rows/s':>12}{'new rows/s':>12}{'speedup':>9}  same")
+
+    rng = random.Random(0)
+    start_dt = date.today() - timedelta(days=6)
+    for rows in [int(s) for s in args.rows.split(",") if s.strip()]:
+        docs = [dict(make_feedback(index, start_dt, rng), _id=ObjectId()) for index in range(rows)]
+        for doc in docs:
+            # 旧路径遇到 null 的字符串字段会校验失败，合成数据统一用空字符串
+            doc["category"] = doc["category"] or ""
+            doc["status"] = doc["status"] or ""
+
+        old_seconds, old_body = timed(lambda: old_path(docs, adapter), args.rounds)
+        new_seconds, new_body = timed(lambda: new_path(docs), args.rounds)
+        same = "yes" if json.loads(old_body) == json.loads(new_body) else "NO"
+        print(f"{rows:>8}  {'encode':<10}{rows / old_seconds:>12.0f}{rows / new_seconds:>12.0f}"
+              f"{old_seconds / new_seconds:>8.1f}x  {same}")
+
+        if args.mongo:
+            from backend.core.mongo_client import feedbacks_collection as collection
+
+            collection.drop()
+            collection.insert_many(docs, ordered=False)
+            old_seconds, old_body = timed(
+                lambda: old_path(list(collection.find().sort("created_at", -1)), adapter), args.rounds
+            )
+            new_seconds, new_body = timed(
+                lambda: new_path(list(collection.find({}, FEEDBACK_RESPONSE_PROJECTION).sort("created_at", -1))),
+                args.rounds
+            )
+            same = "yes" if json.loads(old_body) == json.loads(new_body) else "NO"
+            print(f"{rows:>8}  {'mongo':<10}{rows / old_seconds:>12.0f}{rows / new_seconds:>12.0f}"
+                  f"{old_seconds / new_seconds:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
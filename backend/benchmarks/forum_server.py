@@ -0,0 +1,154 @@
+# benchmarks/forum_server.py
+"""
+本地论坛替身：生成与 bbs.360.cn（Discuz）结构一致的列表页 / 帖子详情页，
+供爬虫基准测试使用，不访问线上站点。
+"""
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+CATEGORIES = ["蓝屏", "游戏问题", "安全卫士", "驱动", ""]
+STATUSES = ["", "已解决", "已答复", "处理中"]
+
+
+def render_list_page(base_url: str, page: int, threads_per_page: int = 30, first_tid: int = 16200000) -> str:
+    """渲染第 page 页的帖子列表（帖子 ID 随页码递减）"""
+    now = datetime.now()
+    rows = []
+    for i in range(threads_per_page):
+        index = (page - 1) * threads_per_page + i
+        tid = first_tid - index
+        category = CATEGORIES[index % len(CATEGORIES)]
+        status = STATUSES[index % len(STATUSES)]
+        created = (now - timedelta(minutes=17 * index)).strftime("%Y-%m-%d %H:%M")
+        category_link = f'<a href="#"><span>{category}</span></a>' if category else ""
+        status_img = f'<img alt="{status}" src="s.gif" />' if status else ""
+        attach_img = '<img alt="attach_img" src="a.gif" />' if index % 3 == 0 else ""
+        rows.append(f"""
+<tbody id="normalthread_{tid}">
+  <tr>
+    <th>
+      <div class="icn"></div>
+      <div class="tl">
+        {category_link}
+        <a href="{base_url}/thread-{tid}-1-1.html">电脑玩游戏时蓝屏 第{index}帖</a>
+        {status_img}{attach_img}
+        <div class="by">
+          <span><a href="#">user{index % 97}</a></span>
+          <span>|</span>
+          <span>{created}</span>
+          <a href="#">{index % 13}</a>
+          <a href="#">{100 + index * 7}</a>
+        </div>
+      </div>
+    </th>
+  </tr>
+</tbody>""")
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>列表 - 第{page}页</title></head>
+<body>
+<table id="threadlisttableid">
+<tbody id="stickthread_1"><tr><th><div></div><div><a href="#">置顶帖</a></div></th></tr></tbody>
+<tbody id="separatorline"><tr><td></td></tr></tbody>
+{"".join(rows)}
+</table>
+</body></html>"""
+
+
+def render_thread_page(tid: int, paragraphs: int = 12) -> str:
+    """渲染帖子详情页（正文 + 附件图片 + 需要被过滤掉的噪声文本）"""
+    body = []
+    for i in range(paragraphs):
+        body.append(f"电脑在运行游戏第 {i} 分钟后出现蓝屏，错误代码 0x0000{i:04d}，已尝试更新显卡驱动。<br/>")
+    body.append('<span>本帖最后由 user 于 2025-12-21 10:00 编辑</span><br/>')
+    body.append('<span>(123.45 KB)</span><br/>')
+    body.append('<span>memory.dmp</span><br/>')
+    body.append(f'<img zoomfile="https://img.example.com/forum/{tid}/1.jpg" src="https://img.example.com/forum/{tid}/1_thumb.jpg" />')
+    body.append(f'<img src="https://img.example.com/forum/{tid}/2.jpg" />')
+    padding = "<div class='sidebar'>" + ("<p>related</p>" * 200) + "</div>"
+
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>帖子 {tid}</title></head>
+<body>
+<div id="postlist">
+<table><tr><td class="t_f" id="postmessage_{tid}">
+{"".join(body)}
+</td></tr></table>
+<table><tr><td class="t_f">回复内容，不应被抓取</td></tr></table>
+</div>
+{padding}
+</body></html>"""
+
+
+class _ForumHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+    latency = 0.0
+    threads_per_page = 30
+
+    _list_re = re.compile(r"page=(\d+)")
+    _thread_re = re.compile(r"/thread-(\d+)-")
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        base_url = f"http://{self.headers.get('Host')}"
+        thread_match = self._thread_re.search(self.path)
+        list_match = self._list_re.search(self.path)
+        if thread_match:
+            html = render_thread_page(int(thread_match.group(1)))
+        elif list_match:
+            html = render_list_page(base_url, int(list_match.group(1)), self.threads_per_page)
+        else:
+            self.send_error(404)
+            return
+
+        payload = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ForumServer:
+    """在后台线程运行的本地论坛，用法: with ForumServer(latency=0.05) as server: server.list_url(1)"""
+
+    def __init__(self, latency: float = 0.05, threads_per_page: int = 30, port: int = 0):
+        handler = type("ForumHandler", (_ForumHandler,), {
+            "latency": latency,
+            "threads_per_page": threads_per_page,
+        })
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def list_url(self, page: int) -> str:
+        return f"{self.base_url}/forum.php?mod=forumdisplay&fid=140&page={page}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -8,7 +8,18 @@ from dotenv import load_dotenv
 
 from pymongo import MongoClient
 from bson import ObjectId
+from celery.signals import worker_ready
 from backend.celery_app import celery  # 确保导入你的 celery 实例
+from backend.core.indexes import ensure_indexes
+from backend.core.image_store import get_image_store
+from backend.services.image_dedup_service import (
+    record_image,
+    find_analyzed_duplicate,
+    attach_analysis,
+    MAX_IMAGES_PER_POST,
+)
+from backend.services.daily_stats_service import mark_days_dirty
+from backend.services.event_service import publish_analysis
 
 # =========================
 # 1. 配置与初始化
@@ -26,6 +37,12 @@ celery.conf.update(
     }
 )
 
+
+@worker_ready.connect
+def ensure_indexes_on_worker_ready(**kwargs):
+    """Worker 启动完成后按注册表创建索引（分析结果按 post_id / feedback_id 查询）"""
+    ensure_indexes()
+
 # 优先检查 360 API KEY
 if not os.getenv("API_KEY_360"):
     raise RuntimeError("未设置 360_API_KEY，无法进行 AI 分析")
@@ -67,14 +84,19 @@ client = MongoClient(MONGODB_URI)
 db = client[DB_NAME]
 
 
-def image_url_to_base64(url: str) -> str:
+def load_image_bytes(url: str) -> bytes:
+    # 优先读爬虫预取的本地缓存；未命中时下载并写入缓存，Celery 重试时不再重复下载
     try:
-        resp = requests.get(url, timeout=15) # 爬虫环境下稍微放宽超时
-        resp.raise_for_status()
-        return base64.b64encode(resp.content).decode("utf-8")
+        return get_image_store().fetch(url, timeout=15) or b"" # 爬虫环境下稍微放宽超时
     except Exception as e:
-        print(f"⚠️ 图片下载失败: {url}, 错误: {e}")
+        print(f"⚠️ 图片缓存不可用: {url}, 错误: {e}")
+        return b""
+
+def image_url_to_base64(url: str) -> str:
+    data = load_image_bytes(url)
+    if not data:
         return ""
+    return base64.b64encode(data).decode("utf-8")
 
 def call_360_llm(messages):
     """直接调用 360 智脑 API，绕过 Langchain 兼容性问题"""
@@ -140,8 +162,8 @@ def async_analyze_feedback(self, feedback_id: str):
         if not post:
             return {"status": "error", "reason": f"未找到 ID 为 {feedback_id} 的文档"}
         
-        # 重复性检查
-        if post.get("ai_analyzed", False):
+        # 重复性检查（爬虫投递前会先写入 ai_analyzed="pending"，只有 True 才表示已分析）
+        if post.get("ai_analyzed") is True:
             return {"status": "skipped", "reason": "already_analyzed"}
 
         print(f"🚀 开始分析: {post.get('title', '无标题')} (ID: {feedback_id})")
@@ -149,23 +171,47 @@ def async_analyze_feedback(self, feedback_id: str):
         # 2. 构建 Prompt
         forum_text = f"【标题】\n{post.get('title', '')}\n\n【正文】\n{post.get('content', '')}\n\n【分类】{post.get('category', '')}"
         
-        # 3. 处理图片
-        image_base64 = ""
-        image_urls = post.get("images", [])
-        if image_urls:
-            image_base64 = image_url_to_base64(image_urls[0])
-
-        # 4. 调用 360 模型
-        messages = build_messages(image_base64, forum_text)
-        text_output = call_360_llm(messages)
-
-        # 5. 解析结果 (健壮的 JSON 提取逻辑)
-        start_idx = text_output.find('{')
-        end_idx = text_output.rfind('}') + 1
-        if start_idx == -1:
-            raise ValueError(f"AI 回复未包含有效的 JSON: {text_output}")
-        
-        ai_result = json.loads(text_output[start_idx:end_idx])
+        # 3. 处理图片：首图发给模型，所有图片（最多 MAX_IMAGES_PER_POST 张）登记感知哈希
+        image_bytes = b""
+        image_infos = []
+        image_urls = [url for url in post.get("images", []) if url][:MAX_IMAGES_PER_POST]
+        for index, image_url in enumerate(image_urls):
+            data = load_image_bytes(image_url)
+            if not data:
+                continue
+            if index == 0:
+                image_bytes = data
+            info = record_image(data, image_url)
+            if info:
+                image_infos.append(info)
+
+        # 4. 近似截图去重：任意一张图命中已分析的近似图片，且所属帖子分类相同、文本相似时才复用结果
+        duplicate = find_analyzed_duplicate([info["dhash"] for info in image_infos], post)
+        reused_analysis = None
+        if duplicate:
+            reused_analysis = db.ai_analysis.find_one(
+                {"_id": ObjectId(duplicate["analysis_id"]), "ai_result": {"$exists": True}}
+            )
+
+        if reused_analysis:
+            ai_result = reused_analysis["ai_result"]
+            model_used = reused_analysis.get("model_used", "")
+            print(f"♻️ 复用近似截图的分析结果: {duplicate['analysis_id']} "
+                  f"(汉明距离 {duplicate['distance']}，文本相似度 {duplicate['similarity']})，跳过模型调用")
+        else:
+            # 调用 360 模型
+            image_base64 = base64.b64encode(image_bytes).decode("utf-8") if image_bytes else ""
+            messages = build_messages(image_base64, forum_text)
+            text_output = call_360_llm(messages)
+
+            # 5. 解析结果 (健壮的 JSON 提取逻辑)
+            start_idx = text_output.find('{')
+            end_idx = text_output.rfind('}') + 1
+            if start_idx == -1:
+                raise ValueError(f"AI 回复未包含有效的 JSON: {text_output}")
+
+            ai_result = json.loads(text_output[start_idx:end_idx])
+            model_used = "360-gpt-5.2"
 
         # 6. 保存分析结果
         analysis_doc = {
@@ -173,23 +219,42 @@ def async_analyze_feedback(self, feedback_id: str):
             "feedback_id": feedback_id,
             "title": post.get("title", ""),
             "ai_result": ai_result,
-            "model_used": "360-gpt-5.2",
+            "model_used": model_used,
             "analyzed_at": datetime.utcnow(),
-            "has_image": bool(image_base64),
+            "has_image": bool(image_bytes),
             "alarm_sent": False
         }
-        
+        if reused_analysis:
+            analysis_doc["reused_from_analysis_id"] = str(reused_analysis["_id"])
+            analysis_doc["image_distance"] = duplicate["distance"]
+            analysis_doc["text_similarity"] = duplicate["similarity"]
+
         # 存入新集合 ai_analysis
         result = db.ai_analysis.insert_one(analysis_doc)
-        
+
         # 回写原集合 feedbacks
         db.feedbacks.update_one(
             {"_id": obj_id},
             {"$set": {"ai_analyzed": True, "analysis_id": str(result.inserted_id)}}
         )
 
+        # 模型真正分析过的图片登记分析结果，供后续近似截图复用
+        if not reused_analysis:
+            for info in image_infos:
+                attach_analysis(info["sha"], str(result.inserted_id), feedback_id)
+
+        # 帖子所在日期的分析数 / 风险等级统计随之变化
+        mark_days_dirty([post.get("created_at")])
+
+        # 推送给打开的仪表盘（风险等级有效时同时推送待发送告警）
+        publish_analysis(analysis_doc, post)
+
         print(f"✅ 分析成功并入库: {feedback_id}")
-        return {"status": "success", "analysis_id": str(result.inserted_id)}
+        return {
+            "status": "success",
+            "analysis_id": str(result.inserted_id),
+            "reused_from": analysis_doc.get("reused_from_analysis_id"),
+        }
 
     except Exception as exc:
         print(f"❌ 异步分析失败: {exc}")
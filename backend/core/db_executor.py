@@ -0,0 +1,58 @@
+# core/db_executor.py
+"""
+在有界线程池中执行同步 pymongo 调用，供 FastAPI 的 async 接口 await
+
+- 普通查询（列表、详情、告警、快照读取）使用 DB_EXECUTOR_WORKERS 个线程
+- 分析报表等重查询（heavy=True）使用单独的 DB_HEAVY_EXECUTOR_WORKERS 个线程，
+  再多的分析请求也只会在自己的池里排队，不会占满普通查询的线程，更不会阻塞事件循环
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "16"))
+DB_HEAVY_EXECUTOR_WORKERS = int(os.getenv("DB_HEAVY_EXECUTOR_WORKERS", "4"))
+# 设为 1 时直接在事件循环线程内调用（旧行为，仅用于基准测试对比）
+DB_EXECUTOR_INLINE = os.getenv("DB_EXECUTOR_INLINE", "0") == "1"
+
+_executors: Dict[bool, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(heavy: bool) -> ThreadPoolExecutor:
+    executor = _executors.get(heavy)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(heavy)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=DB_HEAVY_EXECUTOR_WORKERS if heavy else DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db-heavy" if heavy else "db",
+                )
+                _executors[heavy] = executor
+    return executor
+
+
+async def run_db(func: Callable[..., Any], *args, heavy: bool = False, **kwargs) -> Any:
+    """
+    在数据库线程池中执行同步函数并等待结果
+
+    Args:
+        func: 同步函数（内部使用 pymongo）
+        heavy: 是否为重查询（分析报表等），使用单独的线程池
+    """
+    call = functools.partial(func, *args, **kwargs)
+    if DB_EXECUTOR_INLINE:
+        return call()
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(heavy), call)
+
+
+def shutdown_db_executors():
+    """应用关闭时调用：等待执行中的查询结束"""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+        _executors.clear()
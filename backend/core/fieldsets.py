@@ -0,0 +1,60 @@
+# core/fieldsets.py
+"""
+稀疏字段（fields= 查询参数）
+
+列表页通常只需要标题、分类、状态、时间等少量字段。fields 会被转换成 MongoDB 投影，
+未请求的大字段（正文、图片、AI 分析全文）不会从数据库取回，也不参与 BSON 解码和 JSON 序列化。
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+def parse_fieldset(
+    fields: Optional[str],
+    available: Sequence[str],
+    always: Sequence[str] = ()
+) -> Optional[List[str]]:
+    """
+    解析逗号分隔的字段列表
+
+    Args:
+        fields: 查询参数原文，为空时表示全部字段
+        available: 可选字段
+        always: 无论是否请求都返回的字段（如 id），排在最前
+
+    Returns:
+        去重后的字段列表（按请求顺序）；fields 为空时返回 None
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if fields is None or not fields.strip():
+        return None
+    requested = []
+    for name in (item.strip() for item in fields.split(",")):
+        if name and name not in requested:
+            requested.append(name)
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}，可选: {', '.join(available)}")
+    return [name for name in always if name not in requested] + requested
+
+
+def projection_for(selected: Iterable[str], paths: Optional[Dict[str, str]] = None) -> dict:
+    """
+    字段列表 → MongoDB 投影
+
+    Args:
+        selected: parse_fieldset 返回的字段
+        paths: 字段到文档路径的映射（如 id → _id），缺省时同名
+
+    同时请求了父字段和子字段（ai_result 与 ai_result.scene）时只投影父字段，避免路径冲突
+    """
+    paths = paths or {}
+    wanted = sorted({paths.get(name, name) for name in selected})
+    projection = {}
+    for path in wanted:
+        if not any(path.startswith(parent + ".") for parent in projection):
+            projection[path] = 1
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
@@ -0,0 +1,33 @@
+# core/forum_time.py
+"""
+论坛时间
+
+帖子的 created_at 按论坛页面显示的时间（北京时间）原样保存，不做时区换算。
+“今天”、日期边界等都要按同一个时区计算，不能用进程本地时区：
+调度器跑在 Asia/Shanghai，Worker / API 容器通常是 UTC，零点前后会把“今天”和“已结束的日期”判断错。
+"""
+import os
+from datetime import UTC, date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+FORUM_TIMEZONE_NAME = os.getenv("FORUM_TIMEZONE", "Asia/Shanghai")
+
+try:
+    FORUM_TIMEZONE = ZoneInfo(FORUM_TIMEZONE_NAME)
+except ZoneInfoNotFoundError:
+    # 精简镜像没有 tzdata 时按东八区处理（北京时间没有夏令时）
+    FORUM_TIMEZONE = timezone(timedelta(hours=8), FORUM_TIMEZONE_NAME)
+
+
+def forum_now() -> datetime:
+    """
+    论坛时区的当前时间，与 created_at 的存储方式一致（墙上时间，带 UTC 标记）
+
+    解析“今天 / 昨天 / HH:MM”这类相对时间时使用
+    """
+    return datetime.now(FORUM_TIMEZONE).replace(tzinfo=UTC)
+
+
+def forum_today() -> date:
+    """论坛时区的今天，用于区分“今天”和已结束的日期"""
+    return datetime.now(FORUM_TIMEZONE).date()
@@ -0,0 +1,216 @@
+# core/image_store.py
+"""
+本地图片缓存（爬虫与 AI 分析 Worker 共用）
+
+- 图片按内容 SHA-256 存盘，不同 URL 指向同一张图时只存一份
+- SQLite 索引记录 URL -> 哈希，以及每个文件的大小和最近访问时间
+- 总大小超过上限时按最近访问时间（LRU）淘汰
+- 写入和淘汰都在 SQLite 写事务（BEGIN IMMEDIATE，跨进程互斥）内同时改索引和文件，
+  不会出现索引指向已被其他进程删除的文件
+
+爬虫在首次看到帖子时预取 images[0]，Worker 分析（包括 Celery 重试）直接读本地文件，
+缓存未命中时才回源下载并写入缓存。
+
+目录结构:
+    <root>/blobs/ab/abcd...
+    <root>/index.sqlite
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+# ======================
+# 基础配置
+# ======================
+# 默认放在 backend/image_cache，scheduler（爬虫）和 worker 容器挂载的是同一个 backend 目录
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "image_cache"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))  # 默认 2GB
+
+# 淘汰时降到上限的 90%，避免每写一张图都触发一次淘汰
+EVICT_TARGET_RATIO = 0.9
+
+DOWNLOAD_TIMEOUT = 15
+
+
+class ImageStore:
+    """内容寻址的图片磁盘缓存，可跨线程 / 跨进程共享同一目录"""
+
+    def __init__(self, root: str | Path = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.root / "index.sqlite", timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_sha ON urls (sha);
+            CREATE INDEX IF NOT EXISTS idx_blobs_access ON blobs (last_access);
+            """
+        )
+        self._conn.commit()
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / sha
+
+    @contextmanager
+    def _write_transaction(self):
+        """本线程持锁 + SQLite 写锁（其他进程的写入 / 淘汰在此期间等待），正常结束时提交"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    # ======================
+    # 读写
+    # ======================
+    def get(self, url: str) -> Optional[bytes]:
+        """读取缓存，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT sha FROM urls WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+
+        sha = row[0]
+        try:
+            data = self._blob_path(sha).read_bytes()
+        except FileNotFoundError:
+            # 文件已被其他进程淘汰，清理残留索引
+            with self._lock:
+                self._conn.execute("DELETE FROM urls WHERE sha = ?", (sha,))
+                self._conn.execute("DELETE FROM blobs WHERE sha = ?", (sha,))
+                self._conn.commit()
+            return None
+
+        with self._lock:
+            self._conn.execute("UPDATE blobs SET last_access = ? WHERE sha = ?", (time.time(), sha))
+            self._conn.commit()
+        return data
+
+    def contains(self, url: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def put(self, url: str, data: bytes) -> str:
+        """写入缓存，返回内容哈希"""
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        tmp_path = path.with_name(f"{sha}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            # 临时文件在事务外写好，持写锁期间只做 rename
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_bytes(data)
+
+            with self._write_transaction() as conn:
+                # 事务内重新检查：文件可能刚被其他进程淘汰，此时重新写入
+                if not path.exists():
+                    if not tmp_path.exists():
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        tmp_path.write_bytes(data)
+                    os.replace(tmp_path, path)
+                conn.execute("INSERT OR REPLACE INTO urls (url, sha) VALUES (?, ?)", (url, sha))
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs (sha, size, last_access) VALUES (?, ?, ?)",
+                    (sha, len(data), time.time())
+                )
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self.evict()
+        return sha
+
+    def fetch(self, url: str, timeout: float = DOWNLOAD_TIMEOUT) -> Optional[bytes]:
+        """优先读缓存，未命中时下载并写入缓存；下载失败返回 None"""
+        data = self.get(url)
+        if data is not None:
+            return data
+
+        try:
+            resp = requests.get(url, timeout=timeout)
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"⚠️ 图片下载失败: {url}, 错误: {e}")
+            return None
+
+        data = resp.content
+        try:
+            self.put(url, data)
+        except Exception as e:
+            print(f"⚠️ 图片写入缓存失败: {url}, 错误: {e}")
+        return data
+
+    # ======================
+    # 容量控制
+    # ======================
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return row[0]
+
+    def evict(self) -> int:
+        """超过上限时按 LRU 淘汰，返回删除的文件数"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        removed = []
+        with self._write_transaction() as conn:
+            # 持写锁后重新统计，其他进程可能已经淘汰过
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            for sha, size in conn.execute("SELECT sha, size FROM blobs ORDER BY last_access").fetchall():
+                if total <= target:
+                    break
+                removed.append(sha)
+                total -= size
+
+            conn.executemany("DELETE FROM urls WHERE sha = ?", [(sha,) for sha in removed])
+            conn.executemany("DELETE FROM blobs WHERE sha = ?", [(sha,) for sha in removed])
+            # 文件与索引在同一写事务内删除，put 不会在两者之间插入指向该文件的索引
+            for sha in removed:
+                self._blob_path(sha).unlink(missing_ok=True)
+        return len(removed)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ======================
+# 进程内共享实例
+# ======================
+_store: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
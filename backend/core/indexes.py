@@ -0,0 +1,250 @@
+# core/indexes.py
+"""
+索引注册表
+
+所有集合的索引统一在 INDEXES 中声明，API（lifespan）和 Celery worker 启动时调用 ensure_indexes() 创建。
+索引使用 pymongo 的默认命名（如 created_at_1），与已有部署中的同名索引一致，重复创建是空操作。
+
+只按 _id 访问的集合（feedback_daily_stats / feedback_daily_stats_dirty / crawl_state / cache_versions）不需要额外索引。
+
+用法:
+    python -m backend.core.indexes            # 创建注册表中的全部索引
+    python -m backend.core.indexes --check    # 对各 service 的查询执行 explain()，出现全表扫描（COLLSCAN）时失败
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from backend.core.forum_time import forum_today
+from backend.core.mongo_client import db
+
+# ======================
+# 注册表
+# ======================
+# 集合名 → [{"keys": 索引键, 其余为 create_index 的参数}]
+INDEXES: Dict[str, List[dict]] = {
+    "feedbacks": [
+        # 爬虫依赖唯一索引去重（DuplicateKeyError）；告警 $lookup / 单帖查询按 post_id
+        {"keys": [("post_id", ASCENDING)], "unique": True},
+        # 按日期范围的查询和每日统计聚合
+        {"keys": [("created_at", ASCENDING)]},
+        {"keys": [("crawl_time", ASCENDING)]},
+        # 关键词统计按命中关键词 + 时间范围聚合
+        {"keys": [("matched_keywords.keyword", ASCENDING), ("created_at", ASCENDING)]},
+        # 反馈列表游标分页：按 (created_at, _id) 倒序
+        {"keys": [("created_at", DESCENDING), ("_id", DESCENDING)]},
+        # 已分析帖子的日期范围查询（等值条件在前，范围在后）
+        {"keys": [("ai_analyzed", ASCENDING), ("created_at", ASCENDING)]},
+    ],
+    "ai_analysis": [
+        # 按帖子查询分析结果
+        {"keys": [("post_id", ASCENDING)]},
+        # 周报合并分析结果（join_ai_analysis）
+        {"keys": [("feedback_id", ASCENDING)]},
+        # 分析记录游标分页：按 (analyzed_at, _id) 倒序
+        {"keys": [("analyzed_at", DESCENDING), ("_id", DESCENDING)]},
+        # 待发送告警：alarm_sent 过滤 + 按分析时间倒序
+        {"keys": [("alarm_sent", ASCENDING), ("analyzed_at", DESCENDING)]},
+    ],
+    "keywords": [
+        {"keys": [("keyword", ASCENDING)], "unique": True},
+    ],
+    "keyword_backfill_jobs": [
+        {"keys": [("status", ASCENDING), ("created_at", ASCENDING)]},
+        # 任务列表按创建时间倒序
+        {"keys": [("created_at", DESCENDING)]},
+    ],
+    "image_hashes": [
+        # 哈希分段的多键索引，近似图片按段精确匹配取候选
+        {"keys": [("bands", ASCENDING)]},
+    ],
+    "weekly_reports": [
+        {"keys": [("report_id", ASCENDING)]},
+        # 报告列表按生成时间倒序
+        {"keys": [("generated_at", DESCENDING)]},
+    ],
+}
+
+
+def index_name(keys: list) -> str:
+    """pymongo 默认的索引名（created_at_-1__id_-1）"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def ensure_indexes(database=None, collections: Optional[Iterable[str]] = None) -> int:
+    """
+    创建注册表中的索引（已存在的跳过）
+
+    Args:
+        database: 目标数据库，默认 mongo_client.db
+        collections: 只处理这些集合，默认全部
+
+    Returns:
+        成功确认的索引数；单个索引失败只打印错误，数据库不可用时直接返回
+    """
+    database = db if database is None else database
+    names = list(collections) if collections is not None else list(INDEXES)
+    ensured = 0
+    for name in names:
+        for spec in INDEXES[name]:
+            options = {key: value for key, value in spec.items() if key != "keys"}
+            try:
+                database[name].create_index(spec["keys"], **options)
+                ensured += 1
+            except ConnectionFailure as e:
+                print(f"[错误] 创建索引失败，数据库不可用: {e}")
+                return ensured
+            except PyMongoError as e:
+                print(f"[错误] 创建索引 {name}.{index_name(spec['keys'])} 失败: {e}")
+    return ensured
+
+
+# ======================
+# 查询计划检查
+# ======================
+def _plan_stages(plan, stages: List[str]) -> List[str]:
+    """收集查询计划中的全部 stage（跳过被淘汰的候选计划）"""
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key in ("rejectedPlans", "allPlansExecution"):
+                continue
+            if key == "stage" and isinstance(value, str):
+                stages.append(value)
+            else:
+                _plan_stages(value, stages)
+    elif isinstance(plan, list):
+        for item in plan:
+            _plan_stages(item, stages)
+    return stages
+
+
+def service_queries() -> List[dict]:
+    """
+    各 service 的典型查询：name / collection / filter / sort
+
+    聚合管道只列出首个 $match（和紧随的 $sort），这部分决定是否走索引
+    """
+    from backend.core.pagination import encode_cursor, keyset_filter, keyset_sort
+    from backend.services.ai_analysis_service import ANALYSIS_LIST_QUERY
+    from backend.services.alarm_service import PENDING_ALARM_MATCH
+    from backend.services.daily_stats_service import day_range
+    from backend.services.export_service import build_export_query
+    from backend.services.image_dedup_service import split_bands
+
+    today = forum_today()
+    start = datetime.combine(today - timedelta(days=7), datetime.min.time())
+    end = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    week = {"$gte": start, "$lt": end}
+    now = datetime.utcnow()
+    cursor = encode_cursor({"created_at": now, "analyzed_at": now, "_id": ObjectId()}, "created_at")
+    analysis_cursor = encode_cursor({"analyzed_at": now, "_id": ObjectId()}, "analyzed_at")
+    post_id = "normalthread_0"
+
+    return [
+        # feedbacks
+        {"name": "feedback.recent", "collection": "feedbacks",
+         "filter": {}, "sort": [("created_at", DESCENDING)]},
+        {"name": "feedback.page", "collection": "feedbacks",
+         "filter": keyset_filter("created_at", cursor), "sort": keyset_sort("created_at")},
+        {"name": "feedback.date_range", "collection": "feedbacks",
+         "filter": {"created_at": week}, "sort": [("created_at", ASCENDING)]},
+        {"name": "feedback.analyzed_date_range", "collection": "feedbacks",
+         "filter": {"created_at": week, "ai_analyzed": True}, "sort": [("created_at", ASCENDING)]},
+        {"name": "feedback.by_post_id", "collection": "feedbacks",
+         "filter": {"post_id": post_id}},
+        {"name": "feedback.keyword_stats", "collection": "feedbacks",
+         "filter": {"matched_keywords.keyword": {"$in": ["蓝屏"]}, "created_at": week}},
+        {"name": "daily_stats.day", "collection": "feedbacks",
+         "filter": {"created_at": day_range(today, today)}},
+        {"name": "export.feedbacks", "collection": "feedbacks",
+         "filter": build_export_query("created_at", start.date().isoformat(), today.isoformat(), "蓝屏"),
+         "sort": [("created_at", ASCENDING), ("_id", ASCENDING)]},
+        # ai_analysis
+        {"name": "ai_analysis.by_post_id", "collection": "ai_analysis",
+         "filter": {"post_id": post_id}},
+        {"name": "ai_analysis.join_feedbacks", "collection": "ai_analysis",
+         "filter": {"feedback_id": {"$in": [str(ObjectId())]}}},
+        {"name": "ai_analysis.page", "collection": "ai_analysis",
+         "filter": {"$and": [ANALYSIS_LIST_QUERY, keyset_filter("analyzed_at", analysis_cursor)]},
+         "sort": keyset_sort("analyzed_at")},
+        {"name": "alarm.pending", "collection": "ai_analysis",
+         "filter": PENDING_ALARM_MATCH, "sort": [("analyzed_at", DESCENDING)]},
+        {"name": "export.ai_analyses", "collection": "ai_analysis",
+         "filter": build_export_query("analyzed_at", start.date().isoformat(), today.isoformat(), risk_level="high"),
+         "sort": [("analyzed_at", ASCENDING), ("_id", ASCENDING)]},
+        # 其他集合
+        {"name": "keywords.load", "collection": "keywords",
+         "filter": {}, "sort": [("keyword", ASCENDING)]},
+        {"name": "backfill.pending", "collection": "keyword_backfill_jobs",
+         "filter": {"status": "pending"}},
+        {"name": "backfill.list", "collection": "keyword_backfill_jobs",
+         "filter": {}, "sort": [("created_at", DESCENDING)]},
+        {"name": "image_hashes.candidates", "collection": "image_hashes",
+         "filter": {"bands": {"$in": split_bands(0)}, "analysis_id": {"$exists": True}}},
+        {"name": "reports.by_report_id", "collection": "weekly_reports",
+         "filter": {"report_id": "weekly_0"}},
+        {"name": "reports.list", "collection": "weekly_reports",
+         "filter": {}, "sort": [("generated_at", DESCENDING)]},
+    ]
+
+
+def check_queries(database=None) -> bool:
+    """
+    检查注册表中的索引是否都存在，并对各 service 查询执行 explain()
+
+    Returns:
+        没有缺失索引且没有查询走全表扫描时返回 True
+    """
+    database = db if database is None else database
+    ok = True
+
+    for name, specs in INDEXES.items():
+        existing = database[name].index_information()
+        for spec in specs:
+            if index_name(spec["keys"]) not in existing:
+                print(f"❌ 缺少索引 {name}.{index_name(spec['keys'])}")
+                ok = False
+
+    for query in service_queries():
+        collection = database[query["collection"]]
+        cursor = collection.find(query["filter"]).limit(50)
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        stages = _plan_stages(cursor.explain().get("queryPlanner", {}), [])
+        if "COLLSCAN" in stages:
+            ok = False
+            print(f"❌ {query['name']:<30}{' > '.join(stages)}")
+        elif stages == ["EOF"]:
+            # 集合不存在时查询计划为空，无法判断
+            print(f"⚠️ {query['name']:<30}集合 {query['collection']} 不存在，跳过")
+        else:
+            print(f"✅ {query['name']:<30}{' > '.join(stages)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="创建 / 检查 MongoDB 索引")
+    parser.add_argument("--check", action="store_true", help="对各 service 查询执行 explain()，出现 COLLSCAN 时以非 0 退出")
+    args = parser.parse_args()
+
+    if args.check:
+        if not check_queries():
+            print("索引检查未通过")
+            sys.exit(1)
+        print("索引检查通过")
+        return
+
+    total = sum(len(specs) for specs in INDEXES.values())
+    ensured = ensure_indexes()
+    print(f"已确认索引 {ensured}/{total} 个")
+    if ensured < total:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# core/keyword_matcher.py
+"""
+多关键词匹配（Aho-Corasick 自动机）
+
+关键词编译成一个自动机，一次扫描文本即可找出所有关键词的命中位置，
+不再对每个关键词单独做子串查找。爬虫、仪表盘、分析报表共用。
+
+- 拉丁字母不区分大小写（逐字符转小写，保证命中偏移与原文一致）
+- count() 与 str.count 语义一致：同一关键词的命中互不重叠，不同关键词各自计数
+"""
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
+
+
+class KeywordHit(NamedTuple):
+    keyword: str     # 原始关键词（保留大小写）
+    start: int       # 命中起始偏移（含）
+    end: int         # 命中结束偏移（不含）
+
+
+def fold_case(text: str) -> str:
+    """转小写；个别字符转小写后长度会变化（如 'İ'），这些字符保持原样以保证偏移不变"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class KeywordMatcher:
+    """编译好的关键词自动机，构建后只读，可在多线程间共享"""
+
+    def __init__(self, keywords: Iterable[str]):
+        # 去掉空白 / 重复关键词，保持原始顺序
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(
+            k.strip() for k in keywords if k and k.strip()
+        ))
+
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[int, ...]] = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            node = 0
+            for ch in fold_case(keyword):
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    outputs.append(())
+                node = nxt
+            outputs[node] += (index,)
+
+        # BFS 计算失败指针，并展开为完整的状态转移表（DFA），扫描时每个字符只查一次字典
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in range(len(goto) - 1)]
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            delta[node] = {**delta[fail[node]], **goto[node]}
+            outputs[node] += outputs[fail[node]]
+            for ch, child in goto[node].items():
+                fail[child] = delta[fail[node]].get(ch, 0) if node else 0
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs = outputs
+        self._lengths = tuple(len(k) for k in self.keywords)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    # ======================
+    # 匹配
+    # ======================
+    def _scan(self, text: str) -> Iterator[Tuple[int, int]]:
+        """逐字符扫描，产出 (关键词下标, 命中结束偏移)，同一位置的多个命中都会产出"""
+        delta = self._delta
+        outputs = self._outputs
+        node = 0
+        for position, ch in enumerate(fold_case(text)):
+            node = delta[node].get(ch, 0)
+            if outputs[node]:
+                for index in outputs[node]:
+                    yield index, position + 1
+
+    def iter_hits(self, text: str) -> Iterator[KeywordHit]:
+        """按结束位置顺序产出全部命中（包括相互重叠的命中）"""
+        if not text or not self.keywords:
+            return
+        for index, end in self._scan(text):
+            yield KeywordHit(self.keywords[index], end - self._lengths[index], end)
+
+    def contains_any(self, text: str) -> bool:
+        if not text or not self.keywords:
+            return False
+        for _ in self._scan(text):
+            return True
+        return False
+
+    def matched(self, text: str) -> Set[str]:
+        """文本中出现过的关键词集合"""
+        if not text or not self.keywords:
+            return set()
+        return {self.keywords[index] for index, _ in self._scan(text)}
+
+    def count(self, text: str) -> Dict[str, int]:
+        """每个关键词的命中次数（同一关键词不重叠计数，与 str.count 一致），只返回命中的关键词"""
+        counts: Dict[str, int] = {}
+        if not text or not self.keywords:
+            return counts
+
+        last_end = [0] * len(self.keywords)
+        for index, end in self._scan(text):
+            if end - self._lengths[index] >= last_end[index]:
+                last_end[index] = end
+                keyword = self.keywords[index]
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+    def offsets(self, text: str) -> Dict[str, List[int]]:
+        """每个关键词（不重叠）命中的起始偏移"""
+        result: Dict[str, List[int]] = {}
+        if not text or not self.keywords:
+            return result
+
+        last_end = [0] * len(self.keywords)
+        for index, end in self._scan(text):
+            start = end - self._lengths[index]
+            if start >= last_end[index]:
+                last_end[index] = end
+                result.setdefault(self.keywords[index], []).append(start)
+        return result
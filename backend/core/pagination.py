@@ -0,0 +1,89 @@
+# core/pagination.py
+"""
+基于排序键的游标分页（keyset pagination）
+
+按 (排序字段 倒序, _id 倒序) 翻页：下一页的查询条件从上一页最后一条记录的排序键生成，
+配合同顺序的复合索引，第 N 页和第 1 页的代价相同（不再 skip 前面的记录）。
+游标对前端是不透明的 base64 字符串。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def keyset_sort(field: str) -> List[Tuple[str, int]]:
+    """游标分页使用的排序（需要 [(field, -1), ("_id", -1)] 的复合索引）"""
+    return [(field, DESCENDING), ("_id", DESCENDING)]
+
+
+def encode_cursor(doc: dict, field: str) -> str:
+    """用一条记录的排序键生成游标"""
+    value = doc.get(field)
+    payload = {
+        "v": value.isoformat() if isinstance(value, datetime) else None,
+        "id": str(doc["_id"]),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    """解析游标，格式不合法时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = datetime.fromisoformat(payload["v"]) if payload["v"] is not None else None
+        return value, ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("cursor 参数无效")
+
+
+def keyset_filter(field: str, cursor: Optional[str]) -> dict:
+    """
+    游标之后（倒序方向）的查询条件
+
+    排序字段缺失 / 为 null 的记录在倒序中排在最后，单独处理
+    """
+    if not cursor:
+        return {}
+    value, last_id = decode_cursor(cursor)
+    if value is None:
+        return {field: None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": last_id}},
+        {field: None},
+    ]}
+
+
+def fetch_page(collection, query: dict, field: str, limit: int, cursor: Optional[str] = None,
+               projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    取一页记录
+
+    Returns:
+        (记录列表, 下一页游标)，没有下一页时游标为 None
+    """
+    after = keyset_filter(field, cursor)
+    if after:
+        query = {"$and": [query, after]} if query else after
+    if projection and any(projection.values()):
+        # 生成游标需要排序字段和 _id
+        projection = {**projection, field: 1, "_id": 1}
+
+    docs = list(
+        collection.find(query, projection)
+        .sort(keyset_sort(field))
+        .limit(limit + 1)
+    )
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], field)
@@ -0,0 +1,31 @@
+# core/redis_client.py
+import os
+import threading
+from typing import Optional
+
+import redis
+
+# 与 Celery 使用同一个 Redis（docker-compose 中 backend / worker / scheduler 都设置了 REDIS_URL）
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_client: Optional[redis.Redis] = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """
+    进程内共享的 Redis 客户端（自带连接池，可在多线程间共享）
+
+    只在第一次调用时创建；Redis 不可用时在执行命令时抛出 redis.RedisError，由调用方降级处理
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    REDIS_URL,
+                    socket_timeout=2,
+                    socket_connect_timeout=2,
+                    health_check_interval=30,
+                )
+    return _client
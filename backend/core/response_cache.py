@@ -0,0 +1,154 @@
+# core/response_cache.py
+"""
+按日期范围缓存的接口响应（进程内 LRU）
+
+key = (接口名, 规范化后的日期范围...)。
+- 已结束的范围（结束日期早于今天）：长 TTL，只在历史统计版本号变化时失效
+  （迟到的 AI 分析、状态变化、关键词回填 / 关键词变更、重建每日统计）
+- 包含今天的范围：写入时记下 ingest 版本号，爬虫 / Worker 让今天的统计发生变化后立即失效
+- 按响应 JSON 的字节数估算内存，超出上限时淘汰最久未使用的条目
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from backend.core.fast_json import dumps
+from backend.core.forum_time import forum_today
+from backend.core.version_counter import VersionWatcher
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))   # 默认 32MB
+RESPONSE_CACHE_CLOSED_TTL = float(os.getenv("RESPONSE_CACHE_CLOSED_TTL", str(24 * 3600)))      # 已结束范围，默认 24 小时
+RESPONSE_CACHE_LIVE_TTL = float(os.getenv("RESPONSE_CACHE_LIVE_TTL", "600"))                   # 包含今天的范围，兜底 10 分钟
+RESPONSE_CACHE_VERSION_POLL = float(os.getenv("RESPONSE_CACHE_VERSION_POLL", "2"))             # 版本号轮询间隔（秒）
+
+DateSpan = Tuple[date, date]
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "versions")
+
+    def __init__(self, value: Any, size: int, expires_at: float, versions: tuple):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.versions = versions
+
+
+class RangeResponseCache:
+    """日期范围响应缓存，可在多线程间共享"""
+
+    def __init__(
+        self,
+        ingest_version: str,
+        history_version: str,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        closed_ttl: float = RESPONSE_CACHE_CLOSED_TTL,
+        live_ttl: float = RESPONSE_CACHE_LIVE_TTL,
+        poll_seconds: float = RESPONSE_CACHE_VERSION_POLL,
+    ):
+        self.max_bytes = max_bytes
+        self.closed_ttl = closed_ttl
+        self.live_ttl = live_ttl
+
+        self._ingest = VersionWatcher(ingest_version, poll_seconds)
+        self._history = VersionWatcher(history_version, poll_seconds)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._metrics = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "uncacheable": 0}
+
+    # ======================
+    # 读写
+    # ======================
+    def _versions(self, live: bool) -> Optional[tuple]:
+        """条目依赖的版本号；读不到版本号时返回 None（不缓存）"""
+        history = self._history.current()
+        if history is None:
+            return None
+        if not live:
+            return (history,)
+        ingest = self._ingest.current()
+        return None if ingest is None else (history, ingest)
+
+    def get_or_compute(self, endpoint: str, spans: Sequence[DateSpan], compute: Callable[[], Any]) -> Any:
+        """
+        命中则直接返回缓存的响应，否则调用 compute() 计算并缓存
+
+        Args:
+            endpoint: 接口名
+            spans: 响应依赖的日期范围（含首尾），任一范围包含今天即按 ingest 版本号失效
+        """
+        key = (endpoint,) + tuple((start.isoformat(), end.isoformat()) for start, end in spans)
+        live = any(end >= forum_today() for _, end in spans)
+        versions = self._versions(live)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if versions is not None and entry.versions == versions and entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._metrics["hits"] += 1
+                    return entry.value
+                self._remove(key)
+                self._metrics["stale"] += 1
+            self._metrics["misses"] += 1
+
+        value = compute()
+        if versions is None:
+            with self._lock:
+                self._metrics["uncacheable"] += 1
+            return value
+
+        try:
+            size = len(dumps(value))
+        except (TypeError, ValueError):
+            return value
+        if size > self.max_bytes:
+            with self._lock:
+                self._metrics["uncacheable"] += 1
+            return value
+
+        ttl = self.live_ttl if live else self.closed_ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, time.monotonic() + ttl, versions)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._metrics["evictions"] += 1
+        return value
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def refresh_versions(self):
+        """本进程递增了版本号：下一次读取立即检查"""
+        self._ingest.invalidate()
+        self._history.invalidate()
+
+    # ======================
+    # 指标
+    # ======================
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._metrics["hits"] + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "hit_rate": round(self._metrics["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,126 @@
+# core/version_counter.py
+"""
+版本号计数器 + 进程内缓存
+
+数据变更时在 cache_versions 集合中把对应的版本号加一；
+各进程（API / Worker / 调度器）的缓存每隔 poll_seconds 才读一次版本号，
+版本号不变就一直复用本地数据，变了才重新加载。
+写入方进程在变更后立即失效本地缓存，不用等下一次轮询。
+"""
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+from pymongo import ReturnDocument
+
+from backend.core.mongo_client import db
+
+cache_versions_collection = db.cache_versions
+
+T = TypeVar("T")
+
+
+def get_version(name: str) -> int:
+    doc = cache_versions_collection.find_one({"_id": name}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+def bump_version(name: str) -> int:
+    """版本号加一（单调递增），返回新的版本号"""
+    doc = cache_versions_collection.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+
+class VersionWatcher:
+    """只读取版本号、不缓存数据：每隔 poll_seconds 才查一次库，其余时间返回上次读到的版本号"""
+
+    def __init__(self, name: str, poll_seconds: float = 2.0):
+        self.name = name
+        self.poll_seconds = poll_seconds
+
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def current(self) -> Optional[int]:
+        """当前版本号；库不可用且从未读到过时返回 None"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.poll_seconds:
+            return self._version
+
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self.poll_seconds:
+                return self._version
+            try:
+                self._version = get_version(self.name)
+            except Exception as e:
+                print(f"[错误] 读取版本号失败 {self.name}: {e}")
+            self._checked_at = now
+            return self._version
+
+    def invalidate(self):
+        """本进程递增版本号后调用：下一次读取立即查库"""
+        with self._lock:
+            self._checked_at = 0.0
+
+
+class VersionedCache(Generic[T]):
+    """按版本号失效的进程内缓存，可在多线程间共享"""
+
+    def __init__(self, name: str, loader: Callable[[], T], poll_seconds: float = 5.0):
+        self.name = name
+        self.loader = loader
+        self.poll_seconds = poll_seconds
+
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def get(self) -> T:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.poll_seconds:
+            return self._value
+
+        with self._lock:
+            now = time.monotonic()
+            if self._version is not None and now - self._checked_at < self.poll_seconds:
+                return self._value
+
+            try:
+                version = get_version(self.name)
+            except Exception as e:
+                # 版本号读取失败时继续使用旧数据，避免 Mongo 抖动影响所有请求
+                if self._version is not None:
+                    print(f"[错误] 读取缓存版本号失败，沿用本地缓存 {self.name}: {e}")
+                    self._checked_at = now
+                    return self._value
+                raise
+
+            # 先读版本号再加载数据：加载期间若有新的变更，下次轮询会看到更大的版本号
+            if version != self._version:
+                self._value = self.loader()
+                self._version = version
+            self._checked_at = now
+            return self._value
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def invalidate(self):
+        """本进程写入后调用：下一次读取立即检查版本号"""
+        with self._lock:
+            self._checked_at = 0.0
+            self._version = None
+
+    def bump(self) -> int:
+        """数据变更：递增全局版本号并失效本地缓存"""
+        version = bump_version(self.name)
+        self.invalidate()
+        return version
@@ -1,27 +1,45 @@
 import time
 import argparse
-import requests
-import re
+import functools
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta, UTC
+from urllib.parse import urljoin
 from lxml import etree
-from pymongo import MongoClient, ASCENDING
-from pymongo.errors import DuplicateKeyError
-from backend.core.mongo_client import keywords_collection
+from pymongo import MongoClient, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from backend.services.keyword_service import get_keyword_matcher, match_feedback_keywords
+from backend.core.image_store import get_image_store
+from backend.core.indexes import ensure_indexes
+from backend.services.image_dedup_service import record_image, MAX_IMAGES_PER_POST
+from backend.services.daily_stats_service import mark_days_dirty, refresh_days, to_day
+from backend.services.event_service import publish_new_feedbacks
+from backend.services.analysis_dispatch_service import dispatch_analysis
+from backend.crawler.parser import (
+    parse_created_at,
+    safe_int,
+    extract_post_content,
+    parse_post_list,
+)
+from backend.crawler.fetcher import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    SerialFetcher,
+    create_fetcher,
+)
+from backend.crawler.html_archive import HtmlArchive, KIND_LIST, KIND_THREAD, reparse_threads
 import os
 
 
 # ======================
 # 基础配置
 # ======================
-HEADERS = {
-    "user-agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0"
-    )
-}
-
 BASE_URL = "https://bbs.360.cn/forum.php?mod=forumdisplay&fid=140&page={page}"
+FORUM_ID = "fid_140"
+
+# 快速增量遇到整页已知且未变化的帖子就停止；每隔 N 小时做一次完整的 3 天回扫，
+# 捕获不会让帖子在列表中上浮的状态变化（例如被标记为已解决）
+FULL_SWEEP_INTERVAL_HOURS = float(os.getenv("CRAWL_FULL_SWEEP_HOURS", "6"))
 
 # ======================
 # MongoDB 初始化
@@ -38,180 +56,185 @@ client = MongoClient(MONGO_URI)
 
 db = client["SentinelEye"]
 collection = db["feedbacks"]
+crawl_state_collection = db["crawl_state"]
+
+
+def ensure_crawler_indexes() -> int:
+    """
+    按注册表确认 feedbacks 的索引（爬虫命令行 / 调度器启动时调用，导入本模块不访问数据库）
 
-collection.create_index([("post_id", ASCENDING)], unique=True)
-collection.create_index("created_at")
-collection.create_index("crawl_time")
+    爬虫独立运行，去重依赖 post_id 唯一索引
+    """
+    return ensure_indexes(db, ["feedbacks"])
 
 
 # ======================
-# 工具函数
+# 原始 HTML 归档
 # ======================
+# 设置 CRAWL_ARCHIVE_DIR（或命令行 --archive）后，抓到的列表页 / 详情页都会写入归档，
+# 排除规则调整后可用 --reparse 离线重建正文
+_archive: HtmlArchive | None = None
 
-def parse_created_at(text: str) -> datetime | None:
-    if not text:
-        return None
 
-    text = text.strip()
-    now = datetime.now(UTC)
-
-    # YYYY-MM-DD HH:MM
-    try:
-        return datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=UTC)
-    except ValueError:
-        pass
+def configure_archive(root: str | None) -> HtmlArchive | None:
+    global _archive
+    if _archive is not None:
+        _archive.close()
+    _archive = HtmlArchive(root) if root else None
+    return _archive
 
-    # YYYY-MM-DD
-    try:
-        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=UTC)
-    except ValueError:
-        pass
 
-    # 支持其他格式：YYYY/MM/DD, YYYY.MM.DD
+def archive_html(html: str, kind: str, url: str, post_id: str | None = None, page: int | None = None):
+    """写入归档；归档失败只打印日志，不影响爬取"""
+    if _archive is None:
+        return
     try:
-        text = text.replace("/", "-").replace(".", "-")
-        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=UTC)
-    except ValueError:
-        pass
-
-    # 今天
-    if text == "今天":
-        return now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # 昨天
-    if text == "昨天":
-        return (now - timedelta(days=1)).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
-
-    # HH:MM → 今天
-    if re.match(r"^\d{1,2}:\d{2}$", text):
-        hour, minute = map(int, text.split(":"))
-        return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
-    return None
+        _archive.put(html, kind, url, post_id=post_id, page=page)
+    except Exception as e:
+        print(f"归档页面失败: {url}, 错误: {e}")
 
 
-def safe_int(text: str) -> int:
-    try:
-        return int(text)
-    except Exception:
-        return 0
+configure_archive(os.getenv("CRAWL_ARCHIVE_DIR"))
 
 
 # ======================
 # HTTP 抓取
 # ======================
-def fetch_page(page: int) -> etree._Element:
-    url = BASE_URL.format(page=page)
-    resp = requests.get(url, headers=HEADERS, timeout=10)
-    resp.raise_for_status()
-    return etree.HTML(resp.text)
+# 未显式传入抓取器时使用的默认串行抓取器（共享 keep-alive 连接）
+_default_fetcher = SerialFetcher()
 
 
-def get_target_tbody_list(tree):
-    separatorline = tree.xpath("//tbody[@id='separatorline']")
-    if separatorline:
-        return tree.xpath("//tbody[@id='separatorline']/following-sibling::tbody")
-    return tree.xpath("//tbody")
+def fetch_page(page: int, fetcher=None) -> etree._Element:
+    fetcher = fetcher or _default_fetcher
+    url = BASE_URL.format(page=page)
+    html = fetcher.fetch_text(url)
+    archive_html(html, KIND_LIST, url, page=page)
+    return etree.HTML(html)
 
 
 # ======================
-# 内容解析
+# 详情抓取
 # ======================
-def extract_post_content(tree):
-    main_content = tree.xpath('(//td[contains(@class, "t_f")])[1]')
-    if not main_content:
-        return "", []
-
-    main = main_content[0]
-    texts = main.xpath('.//text()')
-
-    exclude_keywords = ['下载附件', '360社区', '上传', '本帖最后由', '编辑', 'B', 'KB', 'MB']
-    content_parts = []
-
-    for text in texts:
-        t = text.strip()
-        if (
-                t
-                and not any(k in t for k in exclude_keywords)
-                and not re.match(r'^\(\d+\.?\d*\s*(KB|MB|B)\)$', t)
-                and not ('.' in t and not re.search(r'[\u4e00-\u9fff]', t))
-        ):
-            content_parts.append(t)
-
-    images = [
-        img.get('zoomfile') or img.get('src')
-        for img in main.xpath('.//img')
-    ]
+# 列表页上可见、用于判断帖子是否有变化的字段
+CHANGE_DETECTION_FIELDS = ("reply_count", "view_count", "status")
 
-    return "\n".join(content_parts), images
 
+def list_meta_changed(post: dict, existing_post: dict) -> bool:
+    """比较列表页元数据与库中文档，任一字段不同即认为帖子有变化"""
+    return any(
+        post.get(field) != existing_post.get(field)
+        for field in CHANGE_DETECTION_FIELDS
+    )
 
-def parse_post_list(tree):
-    posts = []
 
-    for tbody in get_target_tbody_list(tree):
-        post_id = tbody.get("id")
-        if not post_id:
-            continue
+def compute_content_hash(content: str, images: list) -> str:
+    """主楼正文 + 图片列表的摘要，用于判断详情页内容是否真的变了"""
+    digest = hashlib.sha1(content.encode("utf-8"))
+    for image in images:
+        digest.update(b"\0")
+        digest.update((image or "").encode("utf-8"))
+    return digest.hexdigest()
 
-        post = {
-            "post_id": post_id,
-            "title": "",
-            "username": "",
-            "category": "",
-            "status": "",
-            "has_attachment": False,
-            "created_at": None,
-            "view_count": 0,
-            "reply_count": 0,
-            "url": "",
-            "content": "",
-            "images": [],
-            "crawl_time": datetime.now(UTC)  # 修复：使用 datetime.now(UTC)
-        }
 
-        category = tbody.xpath('./tr/th/div[2]/a[1]/span/text()')
-        if category:
-            post["category"] = category[0].strip()
-            post["title"] = "".join(tbody.xpath('./tr/th/div[2]/a[2]/text()')).strip()
-            post["url"] = "".join(tbody.xpath('./tr/th/div[2]/a[2]/@href')).strip()
-        else:
-            post["title"] = "".join(tbody.xpath('./tr/th/div[2]/a[1]/text()')).strip()
-            post["url"] = "".join(tbody.xpath('./tr/th/div[2]/a[1]/@href')).strip()
+def _fill_post_content(post: dict, html: str) -> dict:
+    tree = etree.HTML(html)
+    post["content"], post["images"] = extract_post_content(tree)
+    post["content_hash"] = compute_content_hash(post["content"], post["images"])
+    return post
+
 
-        post["username"] = "".join(
-            tbody.xpath('./tr/th/div[2]/div/span[1]/a/text()')
-        ).strip()
+def enrich_post(post: dict, fetcher=None) -> dict:
+    fetcher = fetcher or _default_fetcher
+    html = fetcher.fetch_text(post["url"])
+    archive_html(html, KIND_THREAD, post["url"], post_id=post["post_id"])
+    return _fill_post_content(post, html)
 
-        created_str = "".join(
-            tbody.xpath('./tr/th/div[2]/div/span[3]/text()')
-        ).strip()
 
-        post["created_at"] = parse_created_at(created_str)
+def enrich_posts(posts: list, fetcher=None, stats: dict | None = None) -> list:
+    """
+    批量抓取帖子详情（并发引擎下同时发出请求）
 
-        post["reply_count"] = safe_int(
-            "".join(tbody.xpath('./tr/th/div[2]/div/a[1]/text()'))
-        )
-        post["view_count"] = safe_int(
-            "".join(tbody.xpath('./tr/th/div[2]/div/a[2]/text()'))
+    Args:
+        stats: 可选，累计 detail_fetched / detail_bytes / detail_seconds
+
+    Returns:
+        抓取成功的帖子列表（保持原顺序），失败的帖子打印日志后丢弃
+    """
+    if not posts:
+        return []
+
+    fetcher = fetcher or _default_fetcher
+    start = time.perf_counter()
+    results = fetcher.fetch_many([post["url"] for post in posts])
+
+    if stats is not None:
+        stats["detail_fetched"] = stats.get("detail_fetched", 0) + len(posts)
+        stats["detail_seconds"] = stats.get("detail_seconds", 0.0) + time.perf_counter() - start
+        stats["detail_bytes"] = stats.get("detail_bytes", 0) + sum(
+            len(r.encode("utf-8")) for r in results if isinstance(r, str)
         )
 
-        alt_texts = tbody.xpath('./tr/th/div[2]/img/@alt')
-        post["status"] = next((x for x in alt_texts if x != "attach_img"), "")
-        post["has_attachment"] = "attach_img" in alt_texts
+    enriched = []
+    for post, result in zip(posts, results):
+        if isinstance(result, Exception):
+            print(f"处理帖子失败: {post.get('title', 'Unknown')}, 错误: {result}")
+            continue
+        archive_html(result, KIND_THREAD, post["url"], post_id=post["post_id"])
+        try:
+            enriched.append(_fill_post_content(post, result))
+        except Exception as e:
+            print(f"处理帖子失败: {post.get('title', 'Unknown')}, 错误: {e}")
+    return enriched
 
-        posts.append(post)
 
-    return posts
+def prefetch_images(posts: list, fetcher=None) -> int:
+    """
+    新帖子入库时预取图片（每帖最多 MAX_IMAGES_PER_POST 张）到本地图片缓存并登记感知哈希，
+    AI 分析（含重试）直接读本地文件。缓存以帖子中记录的原始地址为键，下载时按帖子 URL 补全相对路径
 
+    Returns:
+        本次写入缓存的图片数
+    """
+    fetcher = fetcher or _default_fetcher
+    try:
+        store = get_image_store()
+        pending = {}
+        for post in posts:
+            for image_url in [url for url in post.get("images") or [] if url][:MAX_IMAGES_PER_POST]:
+                if image_url not in pending and not store.contains(image_url):
+                    pending[image_url] = urljoin(post.get("url", ""), image_url)
+        if not pending:
+            return 0
+
+        saved = 0
+        results = fetcher.fetch_bytes_many(list(pending.values()))
+        for image_url, result in zip(pending, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ 图片预取失败: {image_url}, 错误: {result}")
+                continue
+            store.put(image_url, result)
+            # 同时登记感知哈希，Worker 分析前据此查找近似截图
+            record_image(result, image_url)
+            saved += 1
+        return saved
+    except Exception as e:
+        # 预取只是加速，失败时 Worker 会自行下载
+        print(f"⚠️ 图片预取失败: {e}")
+        return 0
 
-def enrich_post(post: dict) -> dict:
-    resp = requests.get(post["url"], headers=HEADERS, timeout=10)
-    tree = etree.HTML(resp.text)
-    post["content"], post["images"] = extract_post_content(tree)
-    return post
+
+def load_keyword_matcher():
+    """关键词自动机（进程内缓存，关键词版本号变化后才重建）"""
+    return get_keyword_matcher()
+
+
+def tag_keywords(posts: list, matcher) -> list:
+    """入库前写入 matched_keywords（命中的关键词及次数），统计时直接按索引聚合"""
+    for post in posts:
+        post["matched_keywords"] = match_feedback_keywords(
+            post.get("title", ""), post.get("content", ""), matcher
+        )
+    return posts
 
 
 def save_post(post: dict) -> bool:
@@ -222,44 +245,207 @@ def save_post(post: dict) -> bool:
         return False
 
 
+# ======================
+# 批量读写
+# ======================
+# 爬虫判断新帖 / 变更检测 / 分析触发所需的字段
+EXISTING_POST_PROJECTION = {
+    "post_id": 1,
+    "status": 1,
+    "reply_count": 1,
+    "view_count": 1,
+    "content": 1,
+    "images": 1,
+    "content_hash": 1,
+    "ai_analyzed": 1,
+}
+
+
+def find_existing_posts(post_ids: list) -> dict:
+    """一次 $in 查询取回一页帖子在库中的文档，返回 post_id -> 文档"""
+    if not post_ids:
+        return {}
+    cursor = collection.find({"post_id": {"$in": post_ids}}, EXISTING_POST_PROJECTION)
+    return {doc["post_id"]: doc for doc in cursor}
+
+
+def bulk_write_posts(operations: list) -> set:
+    """
+    无序批量写入一页的新增 / 更新操作
+
+    Returns:
+        写入失败的操作下标集合（例如并发爬取导致的重复 post_id）
+    """
+    if not operations:
+        return set()
+    try:
+        collection.bulk_write(operations, ordered=False)
+        return set()
+    except BulkWriteError as e:
+        failed = set()
+        for error in e.details.get("writeErrors", []):
+            failed.add(error["index"])
+            if error.get("code") != 11000:
+                print(f"批量写入失败: {error.get('errmsg')}")
+        return failed
+
+
+def save_posts(posts: list) -> set:
+    """
+    批量保存帖子（无序 upsert，已存在的 post_id 不会被覆盖）
+
+    Returns:
+        本次新插入的 post_id 集合
+    """
+    if not posts:
+        return set()
+
+    operations = [
+        UpdateOne({"post_id": post["post_id"]}, {"$setOnInsert": post}, upsert=True)
+        for post in posts
+    ]
+    try:
+        upserted_ids = collection.bulk_write(operations, ordered=False).upserted_ids
+    except BulkWriteError as e:
+        upserted_ids = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+        for error in e.details.get("writeErrors", []):
+            if error.get("code") != 11000:
+                print(f"批量写入失败: {error.get('errmsg')}")
+
+    return {posts[index]["post_id"] for index in upserted_ids}
+
+
+# ======================
+# 爬取水位
+# ======================
+def thread_number(post_id: str) -> int:
+    """normalthread_16175330 -> 16175330，无法解析时返回 0"""
+    return safe_int(post_id.rsplit("_", 1)[-1]) if post_id else 0
+
+
+def is_quiet_page(candidates: list, to_fetch: list, watermark: int) -> bool:
+    """
+    快速增量的停止条件：本页有候选帖子、都不需要重新抓取，且都不高于上次的水位
+
+    没有新帖（都在水位之下且已入库）也没有变化时，后面的页只会更旧
+    """
+    return bool(candidates) and not to_fetch and all(
+        thread_number(post["post_id"]) <= watermark for post in candidates
+    )
+
+
+def load_crawl_state(forum_id: str = FORUM_ID) -> dict:
+    """读取论坛的爬取水位（最新帖子、上次完整回扫时间）"""
+    return crawl_state_collection.find_one({"_id": forum_id}) or {"_id": forum_id}
+
+
+def full_sweep_due(state: dict, now: datetime) -> bool:
+    last_full_sweep = state.get("last_full_sweep_at")
+    if last_full_sweep is None:
+        return True
+    if last_full_sweep.tzinfo is None:
+        last_full_sweep = last_full_sweep.replace(tzinfo=UTC)
+    return now - last_full_sweep >= timedelta(hours=FULL_SWEEP_INTERVAL_HOURS)
+
+
+def save_crawl_state(
+    newest_post: dict | None,
+    run_at: datetime,
+    full_sweep_completed: bool,
+    forum_id: str = FORUM_ID
+):
+    """推进水位：最新帖子只增不减；完整回扫成功结束时记录回扫时间"""
+    update = {"$set": {"last_run_at": run_at}}
+    if full_sweep_completed:
+        update["$set"]["last_full_sweep_at"] = run_at
+    if newest_post:
+        update["$max"] = {
+            "newest_thread_number": thread_number(newest_post["post_id"]),
+            "newest_created_at": newest_post["created_at"],
+        }
+
+    crawl_state_collection.update_one({"_id": forum_id}, update, upsert=True)
+    if newest_post:
+        # newest_post_id 跟随 newest_thread_number，只在水位前进时改写
+        crawl_state_collection.update_one(
+            {"_id": forum_id, "newest_thread_number": thread_number(newest_post["post_id"])},
+            {"$set": {"newest_post_id": newest_post["post_id"]}}
+        )
+
+
 # ======================
 # 爬虫模式
 # ======================
-def crawl_once(limit=3):
+def _with_fetcher(func):
+    """未传入 fetcher 时按默认引擎（CRAWL_ENGINE）创建抓取器，并在本次爬取结束后关闭"""
+    @functools.wraps(func)
+    def wrapper(*args, fetcher=None, **kwargs):
+        if fetcher is not None:
+            return func(*args, fetcher=fetcher, **kwargs)
+        with create_fetcher() as owned:
+            return func(*args, fetcher=owned, **kwargs)
+    return wrapper
+
+
+@_with_fetcher
+def crawl_once(limit=3, fetcher=None):
     page = 1
     count = 0
+    matcher = load_keyword_matcher()
 
     while count < limit:
-        tree = fetch_page(page)
+        tree = fetch_page(page, fetcher)
         posts = parse_post_list(tree)
 
-        for post in posts:
-            post = enrich_post(post)
-            save_post(post)
+        if not posts:
+            print("没有更多帖子")
+            return
+
+        batch = posts[:limit - count]
+        count += len(batch)
+
+        # 一次 $in 查询过滤已入库的帖子，只抓取新帖子的详情
+        existing_posts = find_existing_posts([post["post_id"] for post in batch])
+        for post in batch:
+            if post["post_id"] in existing_posts:
+                print(f"[SKIP] {post['title']} 已存在")
+
+        new_posts = tag_keywords(enrich_posts(
+            [post for post in batch if post["post_id"] not in existing_posts],
+            fetcher
+        ), matcher)
+        saved_ids = save_posts(new_posts)
+        saved_posts = [post for post in new_posts if post["post_id"] in saved_ids]
+        prefetch_images(saved_posts, fetcher)
+        mark_days_dirty(post["created_at"] for post in saved_posts)
+        publish_new_feedbacks(saved_posts)
+        for post in new_posts:
             print(f"[ONCE] {post['title']}")
-            count += 1
-            if count >= limit:
-                return
         page += 1
 
 
-def crawl_until_date(target_date: datetime):
+@_with_fetcher
+def crawl_until_date(target_date: datetime, fetcher=None):
     """回溯爬取，直到指定日期"""
     if target_date is None:
         print("错误：提供的日期格式无法识别")
         return
 
     page = 1
+    matcher = load_keyword_matcher()
     print(f"开始回溯爬取，直到日期: {target_date.strftime('%Y-%m-%d')}")
 
     while True:
-        tree = fetch_page(page)
+        tree = fetch_page(page, fetcher)
         posts = parse_post_list(tree)
 
         if not posts:
             print("没有更多帖子")
             break
 
+        # 先按日期筛出本页需要抓取详情的帖子，再批量抓取
+        reached_target = False
+        batch = []
         for post in posts:
             # 如果帖子没有日期，跳过比较
             if post["created_at"] is None:
@@ -269,18 +455,38 @@ def crawl_until_date(target_date: datetime):
             # 如果帖子日期早于目标日期，停止爬取
             if post["created_at"] < target_date:
                 print(f"达到目标日期，停止爬取 (帖子日期: {post['created_at'].strftime('%Y-%m-%d')})")
-                return
+                reached_target = True
+                break
 
-            # 爬取帖子内容
-            try:
-                post = enrich_post(post)
-                saved = save_post(post)
-                if saved:
+            batch.append(post)
+
+        # 一次 $in 查询过滤已入库的帖子，只抓取新帖子的详情
+        existing_posts = find_existing_posts([post["post_id"] for post in batch])
+        for post in batch:
+            if post["post_id"] in existing_posts:
+                print(f"[SKIP] {post['title']} 已存在")
+
+        # 爬取帖子内容，整页一次批量写入
+        new_posts = tag_keywords(enrich_posts(
+            [post for post in batch if post["post_id"] not in existing_posts],
+            fetcher
+        ), matcher)
+        try:
+            saved_ids = save_posts(new_posts)
+            saved_posts = [post for post in new_posts if post["post_id"] in saved_ids]
+            prefetch_images(saved_posts, fetcher)
+            mark_days_dirty(post["created_at"] for post in saved_posts)
+            publish_new_feedbacks(saved_posts)
+            for post in new_posts:
+                if post["post_id"] in saved_ids:
                     print(f"[DATE] {post['title']} ({post['created_at'].strftime('%Y-%m-%d')})")
                 else:
                     print(f"[SKIP] {post['title']} 已存在")
-            except Exception as e:
-                print(f"处理帖子失败: {post['title']}, 错误: {e}")
+        except Exception as e:
+            print(f"保存第{page}页帖子失败: {e}")
+
+        if reached_target:
+            return
 
         page += 1
         time.sleep(1)  # 添加延迟避免被封
@@ -290,17 +496,34 @@ from datetime import datetime, timedelta, UTC
 import time
 from bson import ObjectId
 
-def crawl_incremental_once():
-    """增量爬取：爬取最近3天的帖子，更新状态，并统一触发 AI 分析"""
-    cutoff_date = datetime.now(UTC) - timedelta(days=3)
-    print(f"增量爬取最近3天的帖子（从{cutoff_date.strftime('%Y-%m-%d %H:%M:%S')}到现在）")
+@_with_fetcher
+def crawl_incremental_once(full_sweep: bool | None = None, fetcher=None):
+    """
+    增量爬取：爬取最近3天的帖子，更新状态，并统一触发 AI 分析
+
+    Args:
+        full_sweep: True 完整回扫最近3天；False 快速增量，遇到整页已知且未变化的帖子即停止；
+                    None（默认）根据 crawl_state 中上次完整回扫时间自动选择
+    """
+    run_at = datetime.now(UTC)
+    cutoff_date = run_at - timedelta(days=3)
+
+    crawl_state = load_crawl_state()
+    if full_sweep is None:
+        full_sweep = full_sweep_due(crawl_state, run_at)
+    watermark = crawl_state.get("newest_thread_number", 0)
+
+    if full_sweep:
+        print(f"增量爬取最近3天的帖子（完整回扫，从{cutoff_date.strftime('%Y-%m-%d %H:%M:%S')}到现在）")
+    else:
+        print(f"快速增量爬取（水位: {crawl_state.get('newest_post_id', '无')}），"
+              f"遇到整页已知且未变化的帖子即停止")
 
     # ==========================================
-    # 性能优化：在循环外一次性加载所有关键词
-    # 避免每爬一个帖子就查一次数据库
+    # 性能优化：在循环外一次性取出关键词自动机
+    # 关键词走进程内缓存，只在关键词版本号变化时重新读库
     # ==========================================
-    keyword_docs = list(keywords_collection.find({}, {"keyword": 1, "_id": 0}))
-    keywords = [doc["keyword"].lower().strip() for doc in keyword_docs if doc.get("keyword")]
+    keywords = load_keyword_matcher()
     
     if not keywords:
         print("⚠️ 警告: 关键词数据库为空，本次爬取将不会触发任何 AI 分析！")
@@ -308,17 +531,30 @@ def crawl_incremental_once():
     page = 1
     new_post_count = 0
     updated_post_count = 0
+    skipped_fetch_count = 0
+    fetch_stats = {}
+    touched_days = set()   # 写入过帖子的日期，结束后统一刷新每日统计
+    newest_post = None
+    completed = False
 
     while True:
         try:
-            # 假设 fetch_page 和 parse_post_list 在外部已定义
-            tree = fetch_page(page)
+            tree = fetch_page(page, fetcher)
             posts = parse_post_list(tree)
 
             if not posts:
                 print("没有更多帖子")
+                completed = True
                 break
 
+            # 记录本次看到的最新帖子，用于推进水位
+            for post in posts:
+                if post["created_at"] is not None and (
+                    newest_post is None
+                    or thread_number(post["post_id"]) > thread_number(newest_post["post_id"])
+                ):
+                    newest_post = post
+
             # 检查本页帖子是否都早于3天
             earliest_date_in_page = min(
                 (post["created_at"] for post in posts if post["created_at"] is not None),
@@ -333,9 +569,11 @@ def crawl_incremental_once():
                 )
                 if all_old:
                     print(f"本页所有帖子都早于{cutoff_date.strftime('%Y-%m-%d')}，停止增量爬取")
+                    completed = True
                     break
 
-            # 处理本页帖子
+            # 筛选本页需要处理的帖子
+            candidates = []
             for post in posts:
                 # 如果帖子没有日期，跳过
                 if post["created_at"] is None:
@@ -346,95 +584,141 @@ def crawl_incremental_once():
                     print(f"跳过3天前的帖子: {post.get('title', 'Unknown')} ({post['created_at'].strftime('%Y-%m-%d')})")
                     continue
 
-                existing_post = collection.find_one({"post_id": post["post_id"]})
-
-                try:
-                    # 获取帖子详情（假设 enrich_post 在外部已定义）
-                    enriched_post = enrich_post(post)
-                    enriched_post["crawl_time"] = datetime.now(UTC)
-
-                    # 初始化统一变量
-                    inserted_id = None
-                    is_analyzed = False
+                candidates.append(post)
+
+            # ==========================================
+            # 0. 批量读取：本页帖子一次 $in 查询
+            #    变更检测：列表页的回复数 / 浏览数 / 状态与库中一致的老帖子，
+            #    不再重新抓取详情页，直接沿用库里的正文
+            # ==========================================
+            existing_posts = find_existing_posts([post["post_id"] for post in candidates])
+            to_fetch = []
+            unchanged = []
+            for post in candidates:
+                existing_post = existing_posts.get(post["post_id"])
+                if existing_post and not list_meta_changed(post, existing_post):
+                    post["content"] = existing_post.get("content", "")
+                    post["images"] = existing_post.get("images", [])
+                    unchanged.append(post)
+                else:
+                    to_fetch.append(post)
+
+            skipped_fetch_count += len(unchanged)
+
+            # 批量获取新帖子 / 有变化帖子的详情（并发引擎下同时抓取）
+            fetched = enrich_posts(to_fetch, fetcher, fetch_stats)
+            fetched_ids = {post["post_id"] for post in fetched}
+            unchanged_ids = {post["post_id"] for post in unchanged}
+            page_posts = [
+                post for post in candidates
+                if post["post_id"] in fetched_ids or post["post_id"] in unchanged_ids
+            ]
+
+            # ==========================================
+            # 1. 组装本页的全部写操作（新增 / 更新 / pending 标记），
+            #    最后一次无序 bulk_write 提交
+            # ==========================================
+            operations = []
+            operation_posts = []   # 与 operations 一一对应: (帖子, feedback _id, 是否新帖)
+            to_analyze = []
+            crawl_time = datetime.now(UTC)
+
+            for enriched_post in tag_keywords(page_posts, keywords):
+                existing_post = existing_posts.get(enriched_post["post_id"])
+                enriched_post["crawl_time"] = crawl_time
+
+                if existing_post:
+                    # 帖子已存在
+                    feedback_id = existing_post["_id"]
+                    is_analyzed = existing_post.get("ai_analyzed", False)  # 读取旧的分析状态
                     is_new = False
 
-                    # ==========================================
-                    # 1. 数据库入库与状态更新逻辑
-                    # ==========================================
-                    if existing_post:
-                        # 帖子已存在
-                        inserted_id = str(existing_post['_id'])
-                        is_analyzed = existing_post.get("ai_analyzed", False)  # 读取旧的分析状态
-                        
-                        old_status = existing_post.get("status", "")
-                        new_status = enriched_post.get("status", "")
-
-                        update_data = {
-                            "crawl_time": enriched_post["crawl_time"],
-                            "reply_count": enriched_post.get("reply_count", 0),
-                            "view_count": enriched_post.get("view_count", 0),
-                        }
-
-                        if old_status != new_status:
-                            update_data["status"] = new_status
-                            print(f"[UPDATE] 状态更新: {enriched_post['title']} - {old_status} → {new_status}")
-                        else:
-                            print(f"[UPDATE] 信息更新: {enriched_post['title']}")
-                        
-                        collection.update_one({"_id": existing_post['_id']}, {"$set": update_data})
-                        updated_post_count += 1
-                        
-                    else:
-                        # 新帖子
-                        result = collection.insert_one(enriched_post)
-                        inserted_id = str(result.inserted_id)
-                        is_analyzed = False
-                        is_new = True
-                        print(f"[NEW] 新增帖子: {enriched_post['title']} (feedback_id={inserted_id})")
-                        new_post_count += 1
-
-                    # ==========================================
-                    # 2. 统一的 AI 分析触发逻辑（核心修复区域）
-                    # 无论 NEW 还是 UPDATE，只要没分析过，就走这里的判断
-                    # ==========================================
-                    if not is_analyzed:
-                        title = enriched_post.get("title", "").lower()
-                        content = enriched_post.get("content", "").lower()
-
-                        # 关键词匹配
-                        if keywords and any(k in title or k in content for k in keywords):
-                            print(f"🎯 关键词命中触发分析: {inserted_id}")
-                                                # 有图片（尤其是可能截图）
-                        # if enriched_post.get("images"):
-                        # need_analyze = True
-
-                        # # 回复数或浏览数较高（表示关注度高）
-                        # if enriched_post.get("reply_count", 0) >= 5 or enriched_post.get("view_count", 0) >= 100:
-                        #     need_analyze = True
-                            
-                            try:
-                                from backend.celery_app.tasks import async_analyze_feedback
-                                async_analyze_feedback.delay(inserted_id)  # 异步投递
-                                print(f"🚀 已投递异步AI分析任务: {inserted_id}")
-                                
-                                # 【极度重要】立即打上标记，防止下次爬虫（40分钟后）重复投递
-                                collection.update_one(
-                                    {"_id": ObjectId(inserted_id)}, 
-                                    {"$set": {"ai_analyzed": "pending"}}
-                                )
-                            except Exception as celery_err:
-                                # 异常隔离：Redis 挂了不会导致爬虫崩溃，跳过即可
-                                print(f"❌ Celery 任务投递失败 (请检查 Redis): {celery_err}")
+                    old_status = existing_post.get("status", "")
+                    new_status = enriched_post.get("status", "")
+
+                    update_data = {
+                        "crawl_time": crawl_time,
+                        "reply_count": enriched_post.get("reply_count", 0),
+                        "view_count": enriched_post.get("view_count", 0),
+                        "matched_keywords": enriched_post["matched_keywords"],
+                    }
+
+                    # 重新抓过详情页且正文摘要变化时，同步更新正文和图片
+                    new_hash = enriched_post.get("content_hash")
+                    if new_hash and new_hash != existing_post.get("content_hash"):
+                        update_data["content"] = enriched_post["content"]
+                        update_data["images"] = enriched_post["images"]
+                        update_data["content_hash"] = new_hash
+
+                    if old_status != new_status:
+                        update_data["status"] = new_status
+                        print(f"[UPDATE] 状态更新: {enriched_post['title']} - {old_status} → {new_status}")
+                    elif enriched_post["post_id"] in fetched_ids:
+                        print(f"[UPDATE] 信息更新: {enriched_post['title']}")
+                else:
+                    # 新帖子：预先分配 _id，写入前就能确定 feedback_id
+                    feedback_id = ObjectId()
+                    enriched_post["_id"] = feedback_id
+                    is_analyzed = False
+                    is_new = True
+                    update_data = None
+
+                # ==========================================
+                # 2. 统一的 AI 分析触发逻辑
+                # 无论 NEW 还是 UPDATE，只要没分析过，就走这里的判断
+                # ==========================================
+                if not is_analyzed:
+                    # 关键词匹配：入库前已计算出 matched_keywords（标题 + 正文，不区分大小写）
+                    if enriched_post["matched_keywords"]:
+                        print(f"🎯 关键词命中触发分析: {feedback_id}")
+                        # 【极度重要】pending 标记与帖子写入在同一批次提交，
+                        # 防止下次爬虫（40分钟后）重复投递
+                        if is_new:
+                            enriched_post["ai_analyzed"] = "pending"
                         else:
-                            # 只有新帖子才打印无需分析，减少 UPDATE 刷屏日志
-                            if is_new:
-                                print(f"无需深度分析，跳过投递: {inserted_id}")
-
-                except Exception as e:
-                    print(f"处理帖子失败: {post.get('title', 'Unknown')}, 错误: {e}")
+                            update_data["ai_analyzed"] = "pending"
+                        to_analyze.append(feedback_id)
+                    elif is_new:
+                        # 只有新帖子才打印无需分析，减少 UPDATE 刷屏日志
+                        print(f"无需深度分析，跳过投递: {feedback_id}")
+
+                if is_new:
+                    operations.append(InsertOne(enriched_post))
+                else:
+                    operations.append(UpdateOne({"_id": feedback_id}, {"$set": update_data}))
+                operation_posts.append((enriched_post, feedback_id, is_new))
+
+            failed_indexes = bulk_write_posts(operations)
+            failed_ids = set()
+            inserted_posts = []
+            for index, (enriched_post, feedback_id, is_new) in enumerate(operation_posts):
+                if index in failed_indexes:
+                    failed_ids.add(feedback_id)
                     continue
+                touched_days.add(enriched_post["created_at"].date())
+                if is_new:
+                    print(f"[NEW] 新增帖子: {enriched_post['title']} (feedback_id={feedback_id})")
+                    new_post_count += 1
+                    inserted_posts.append(enriched_post)
+                elif enriched_post["post_id"] in fetched_ids:
+                    updated_post_count += 1
+
+            # 投递前预取新帖首图，Worker 分析时不再现场下载
+            prefetch_images(inserted_posts, fetcher)
+
+            # 写入成功后再投递，保证 Worker 能读到帖子
+            dispatch_analysis([fid for fid in to_analyze if fid not in failed_ids], collection)
+
+            # 新帖推送给打开的仪表盘（每日统计在本轮结束时统一刷新）
+            publish_new_feedbacks(inserted_posts)
 
             print(f"已处理第{page}页")
+
+            # 快速增量：本页没有新帖也没有变化，后面的页只会更旧
+            if not full_sweep and is_quiet_page(candidates, to_fetch, watermark):
+                print(f"第{page}页均为已知且未变化的帖子，停止快速增量爬取")
+                completed = True
+                break
             page += 1
             time.sleep(1)  # 请求间隔
 
@@ -442,17 +726,44 @@ def crawl_incremental_once():
             print(f"获取第{page}页失败: {e}")
             break
 
-    print(f"🎉 增量爬取完成！新增 {new_post_count} 个帖子，更新 {updated_post_count} 个帖子")
+    save_crawl_state(newest_post, run_at, full_sweep_completed=full_sweep and completed)
+
+    # 新帖 / 状态 / 关键词 / 分析标记的变化都反映到每日统计（调度器合并重算）
+    mark_days_dirty(touched_days)
 
+    print(f"🎉 增量爬取完成！共抓取 {page} 个列表页，新增 {new_post_count} 个帖子，更新 {updated_post_count} 个帖子")
 
-def crawl_forever(interval_seconds=3600):
+    # 跳过的详情抓取按本次实际抓取的平均页面大小 / 耗时估算节省量
+    detail_fetched = fetch_stats.get("detail_fetched", 0)
+    if detail_fetched:
+        saved_kb = skipped_fetch_count * fetch_stats["detail_bytes"] / detail_fetched / 1024
+        saved_seconds = skipped_fetch_count * fetch_stats["detail_seconds"] / detail_fetched
+    else:
+        saved_kb = saved_seconds = 0.0
+    print(
+        f"📉 详情页抓取 {detail_fetched} 次，跳过未变化帖子 {skipped_fetch_count} 次"
+        f"（约节省 {saved_kb:.0f} KB / {saved_seconds:.1f} 秒）"
+    )
+
+    return {
+        "full_sweep": full_sweep,
+        "pages": page,
+        "new": new_post_count,
+        "updated": updated_post_count,
+        "detail_fetched": detail_fetched,
+        "skipped_fetch": skipped_fetch_count,
+    }
+
+
+@_with_fetcher
+def crawl_forever(interval_seconds=3600, fetcher=None):
     print(f"启动永久增量爬虫，检查间隔: {interval_seconds}秒")
     print(f"每次检查将爬取最近3天的帖子并更新状态")
 
     while True:
         try:
             print(f"\n[{datetime.now(UTC).strftime('%Y-%m-%d %H:%M:%S')}] 开始检查最近3天帖子...")
-            crawl_incremental_once()
+            crawl_incremental_once(fetcher=fetcher)
             print(f"[{datetime.now(UTC).strftime('%Y-%m-%d %H:%M:%S')}] 检查完成")
         except Exception as e:
             print(f"ERROR: {e}")
@@ -460,12 +771,114 @@ def crawl_forever(interval_seconds=3600):
         print(f"等待 {interval_seconds} 秒后再次检查...")
         time.sleep(interval_seconds)
 
+# ======================
+# 离线重新解析
+# ======================
+def reparse_from_archive(workers: int | None = None, batch_size: int = 500) -> dict:
+    """
+    从归档中取每个帖子最近一次抓取的详情页，用当前解析规则重建 content / images，
+    不访问网络。解析在进程池中进行，主进程按批 bulk_write，只改写正文摘要有变化的文档，
+    同时按新正文重新计算 matched_keywords；全部写完后刷新涉及日期的每日统计。
+    """
+    if _archive is None:
+        raise RuntimeError("未配置 HTML 归档，请设置 CRAWL_ARCHIVE_DIR 或使用 --archive")
+
+    workers = workers or os.cpu_count() or 1
+    total = _archive.count_threads()
+    print(f"开始重新解析归档: {total} 个帖子，{workers} 个进程，每批 {batch_size} 个")
+
+    stats = {"parsed": 0, "updated": 0, "failed": 0}
+    start = time.perf_counter()
+    matcher = load_keyword_matcher()
+    touched_days = set()
+
+    def write_results(results: list):
+        # 关键词命中依赖标题，一次 $in 取回本批帖子的标题 / 摘要 / 日期
+        existing = {
+            doc["post_id"]: doc
+            for doc in collection.find(
+                {"post_id": {"$in": [post_id for post_id, _, _ in results]}},
+                {"post_id": 1, "title": 1, "content_hash": 1, "created_at": 1}
+            )
+        }
+        operations = []
+        for post_id, content, images in results:
+            doc = existing.get(post_id)
+            content_hash = compute_content_hash(content, images)
+            if doc is None or doc.get("content_hash") == content_hash:
+                continue
+            operations.append(UpdateOne(
+                {"post_id": post_id, "content_hash": {"$ne": content_hash}},
+                {"$set": {
+                    "content": content,
+                    "images": images,
+                    "content_hash": content_hash,
+                    "matched_keywords": match_feedback_keywords(doc.get("title", ""), content, matcher),
+                }}
+            ))
+            touched_days.add(to_day(doc.get("created_at")))
+        if operations:
+            try:
+                stats["updated"] += collection.bulk_write(operations, ordered=False).modified_count
+            except BulkWriteError as e:
+                stats["updated"] += e.details.get("nModified", 0)
+                stats["failed"] += len(e.details.get("writeErrors", []))
+                print(f"批量写入失败: {len(e.details.get('writeErrors', []))} 条")
+
+    def collect(done: set, sizes: dict):
+        for future in done:
+            size = sizes.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"重新解析批次失败: {e}")
+                stats["failed"] += size
+                continue
+            stats["parsed"] += len(results)
+            stats["failed"] += size - len(results)
+            write_results(results)
+        print(f"已解析 {stats['parsed']}/{total}，更新 {stats['updated']}")
+
+    # 在途批次数有上限，避免百万级帖子时把整个索引读进内存
+    max_in_flight = workers * 2
+    in_flight = {}
+    root = str(_archive.root)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batch = []
+        for item in _archive.iter_latest_threads():
+            batch.append(item)
+            if len(batch) < batch_size:
+                continue
+            in_flight[executor.submit(reparse_threads, root, batch)] = len(batch)
+            batch = []
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done, in_flight)
+
+        if batch:
+            in_flight[executor.submit(reparse_threads, root, batch)] = len(batch)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done, in_flight)
+
+    # 正文变化可能增减关键词命中，刷新涉及日期的每日统计
+    if touched_days:
+        print(f"刷新 {len(touched_days)} 天的每日统计...")
+        refresh_days(touched_days)
+
+    elapsed = time.perf_counter() - start
+    rate = stats["parsed"] / elapsed if elapsed else 0.0
+    print(f"🎉 重新解析完成！解析 {stats['parsed']} 个，更新 {stats['updated']} 个，"
+          f"失败 {stats['failed']} 个，耗时 {elapsed:.1f} 秒（{rate:.0f} 帖/秒）")
+    return stats
+
+
 # ======================
 # CLI
 # ======================
 def main():
     parser = argparse.ArgumentParser(
-        description="360 论坛增量爬虫（支持单次 / 日期回溯 / 永久运行）"
+        description="360 论坛增量爬虫（支持单次 / 日期回溯 / 增量 / 永久运行）"
     )
 
     mode = parser.add_mutually_exclusive_group(required=True)
@@ -484,6 +897,16 @@ def main():
         action="store_true",
         help="永久运行的增量爬虫（默认每 1 小时执行一次）"
     )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="执行一次增量爬取（按 crawl_state 水位自动选择快速增量或完整回扫）"
+    )
+    mode.add_argument(
+        "--reparse",
+        action="store_true",
+        help="从 HTML 归档离线重建 content / images（不访问网络）"
+    )
 
     parser.add_argument(
         "--limit",
@@ -491,21 +914,79 @@ def main():
         default=3,
         help="--once 模式下抓取的最大帖子数量（默认 3）"
     )
+    parser.add_argument(
+        "--full-sweep",
+        action="store_true",
+        help="--incremental 模式下强制完整回扫最近 3 天"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=DEFAULT_ENGINE,
+        help=f"抓取引擎：serial 串行 / async 并发（默认 {DEFAULT_ENGINE}，可用 CRAWL_ENGINE 设置）"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="async 引擎下同时抓取的详情页数量上限（默认取 CRAWL_CONCURRENCY）"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="async 引擎下每个 host 每秒最多请求数，<=0 不限速（默认取 CRAWL_RATE_PER_HOST）"
+    )
+    parser.add_argument(
+        "--archive",
+        type=str,
+        default=None,
+        help="HTML 归档目录，爬取时写入、--reparse 时读取（默认取 CRAWL_ARCHIVE_DIR）"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="--reparse 模式下的解析进程数（默认 CPU 核数）"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="--reparse 模式下每批解析 / 写入的帖子数（默认 500）"
+    )
 
     args = parser.parse_args()
 
-    if args.once:
-        crawl_once(limit=args.limit)
-    elif args.date:
+    ensure_crawler_indexes()
+
+    if args.archive:
+        configure_archive(args.archive)
+
+    if args.reparse:
+        if _archive is None:
+            print("错误：--reparse 需要指定 --archive 或设置 CRAWL_ARCHIVE_DIR")
+            return
+        reparse_from_archive(workers=args.workers, batch_size=args.batch_size)
+        return
+
+    if args.date:
         # 验证日期格式
         target_date = parse_created_at(args.date)
         if target_date is None:
             print(f"错误：无法识别的日期格式 '{args.date}'")
             print("支持的格式: YYYY-MM-DD, YYYY/MM/DD, YYYY.MM.DD, YYYY-MM-DD HH:MM")
             return
-        crawl_until_date(target_date)
-    elif args.forever:
-        crawl_forever()
+
+    with create_fetcher(args.engine, args.concurrency, args.rate) as fetcher:
+        if args.once:
+            crawl_once(limit=args.limit, fetcher=fetcher)
+        elif args.date:
+            crawl_until_date(target_date, fetcher=fetcher)
+        elif args.forever:
+            crawl_forever(fetcher=fetcher)
+        elif args.incremental:
+            crawl_incremental_once(full_sweep=True if args.full_sweep else None, fetcher=fetcher)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+# crawler/fetcher.py
+"""
+抓取引擎
+
+- SerialFetcher: 串行抓取，复用一个 requests.Session（keep-alive）
+- AsyncFetcher:  asyncio + aiohttp 并发抓取，整个爬取过程共享一个连接池，
+                 支持并发上限和按 host 限速
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+
+# ======================
+# 基础配置
+# ======================
+HEADERS = {
+    "user-agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/142.0.0.0 Safari/537.36 Edg/142.0.0"
+    )
+}
+
+REQUEST_TIMEOUT = 10
+
+# 可通过环境变量调整默认引擎与并发参数
+DEFAULT_ENGINE = os.getenv("CRAWL_ENGINE", "serial")
+DEFAULT_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+DEFAULT_RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", "5"))  # 每个 host 每秒最多请求数，<=0 表示不限速
+
+ENGINES = ("serial", "async")
+
+# 单个 URL 的抓取结果：成功为 HTML 文本（fetch_bytes_many 为原始字节），失败为异常对象
+FetchResult = Union[str, bytes, Exception]
+
+
+# ======================
+# 串行引擎
+# ======================
+class SerialFetcher:
+    """串行抓取，所有请求复用同一个 Session 的连接池"""
+
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADERS)
+
+    def fetch_text(self, url: str) -> str:
+        resp = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return resp.text
+
+    def fetch_bytes(self, url: str) -> bytes:
+        resp = self.session.get(url, timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        return resp.content
+
+    def fetch_many(self, urls: List[str]) -> List[FetchResult]:
+        results: List[FetchResult] = []
+        for url in urls:
+            try:
+                results.append(self.fetch_text(url))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def fetch_bytes_many(self, urls: List[str]) -> List[FetchResult]:
+        results: List[FetchResult] = []
+        for url in urls:
+            try:
+                results.append(self.fetch_bytes(url))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# ======================
+# 并发引擎
+# ======================
+class HostRateLimiter:
+    """按 host 限速：同一 host 相邻两次请求的发出时间至少间隔 1/rate 秒"""
+
+    def __init__(self, rate_per_host: float):
+        self.interval = 1.0 / rate_per_host if rate_per_host and rate_per_host > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+
+        # 单线程事件循环内无需加锁：预约时间槽的操作之间没有 await
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncFetcher:
+    """
+    并发抓取
+
+    内部持有一个独立的事件循环和一个 aiohttp.ClientSession，
+    多次 fetch_many 调用（例如逐页抓取详情）共享同一个 keep-alive 连接池。
+    对外暴露同步接口，调用方（爬虫/调度器线程）无需改成 async。
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate_per_host: float = DEFAULT_RATE_PER_HOST
+    ):
+        import aiohttp  # 仅并发模式需要
+
+        self._aiohttp = aiohttp
+        self.concurrency = max(1, concurrency)
+        self.rate_per_host = rate_per_host
+        self._loop = asyncio.new_event_loop()
+        self._session = None
+        self._semaphore = None
+        self._limiter = HostRateLimiter(rate_per_host)
+
+    async def _ensure_session(self):
+        if self._session is None:
+            aiohttp = self._aiohttp
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.concurrency,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                headers=HEADERS,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def _fetch_one(self, url: str, binary: bool = False) -> str | bytes:
+        session = await self._ensure_session()
+        async with self._semaphore:
+            await self._limiter.wait(urlsplit(url).netloc)
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                if binary:
+                    return await resp.read()
+                return await resp.text(errors="replace")
+
+    async def _fetch_many(self, urls: List[str], binary: bool = False) -> List[FetchResult]:
+        await self._ensure_session()
+        return await asyncio.gather(
+            *(self._fetch_one(url, binary) for url in urls),
+            return_exceptions=True
+        )
+
+    def fetch_many(self, urls: List[str]) -> List[FetchResult]:
+        """并发抓取一批 URL，结果顺序与输入一致"""
+        if not urls:
+            return []
+        return self._loop.run_until_complete(self._fetch_many(list(urls)))
+
+    def fetch_bytes_many(self, urls: List[str]) -> List[FetchResult]:
+        """并发下载一批二进制资源（图片），结果顺序与输入一致"""
+        if not urls:
+            return []
+        return self._loop.run_until_complete(self._fetch_many(list(urls), binary=True))
+
+    def fetch_text(self, url: str) -> str:
+        result = self.fetch_many([url])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        if self._session is not None:
+            self._loop.run_until_complete(self._session.close())
+            self._session = None
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def create_fetcher(
+    engine: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    rate_per_host: Optional[float] = None
+):
+    """根据引擎名称创建抓取器（serial / async）"""
+    engine = engine or DEFAULT_ENGINE
+    if engine == "serial":
+        return SerialFetcher()
+    if engine == "async":
+        return AsyncFetcher(
+            concurrency=concurrency or DEFAULT_CONCURRENCY,
+            rate_per_host=DEFAULT_RATE_PER_HOST if rate_per_host is None else rate_per_host
+        )
+    raise ValueError(f"未知的抓取引擎: {engine}（可选: {', '.join(ENGINES)}）")
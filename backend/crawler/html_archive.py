@@ -0,0 +1,140 @@
+# crawler/html_archive.py
+"""
+原始 HTML 归档
+
+爬虫抓到的列表页 / 详情页按内容哈希（SHA-256）压缩存盘，相同内容只存一份；
+另用 SQLite 记录每次抓取（哈希、类型、URL、post_id、抓取时间），
+用于在排除规则调整后离线重建 content / images，无需重新访问论坛。
+
+目录结构:
+    <root>/objects/ab/cd/abcd....html.gz
+    <root>/index.sqlite
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from lxml import etree
+
+from backend.crawler.parser import extract_post_content
+
+KIND_LIST = "list"
+KIND_THREAD = "thread"
+
+
+def object_path(root: str | Path, sha: str) -> Path:
+    return Path(root) / "objects" / sha[:2] / sha[2:4] / f"{sha}.html.gz"
+
+
+def read_object(root: str | Path, sha: str) -> str:
+    with gzip.open(object_path(root, sha), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+class HtmlArchive:
+    """内容寻址的 HTML 归档，可在多线程爬虫中共享"""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetches (
+                sha TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                url TEXT,
+                post_id TEXT,
+                page INTEGER,
+                fetched_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetches_post ON fetches (post_id, fetched_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetches_time ON fetches (fetched_at)")
+        self._conn.commit()
+
+    def put(
+        self,
+        html: str,
+        kind: str,
+        url: str,
+        post_id: Optional[str] = None,
+        page: Optional[int] = None,
+        fetched_at: Optional[datetime] = None
+    ) -> str:
+        """写入一次抓取结果，返回内容哈希"""
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+
+        path = object_path(self.root, sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，避免并发写入时读到半个文件
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        fetched_at = (fetched_at or datetime.now(UTC)).isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fetches (sha, kind, url, post_id, page, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (sha, kind, url, post_id, page, fetched_at)
+            )
+            self._conn.commit()
+        return sha
+
+    def get(self, sha: str) -> str:
+        return read_object(self.root, sha)
+
+    def iter_latest_threads(self) -> Iterator[Tuple[str, str]]:
+        """按 post_id 遍历每个帖子最近一次抓取的详情页: (post_id, sha)"""
+        cursor = self._conn.execute(
+            """
+            SELECT post_id, sha, MAX(fetched_at)
+            FROM fetches
+            WHERE kind = ? AND post_id IS NOT NULL
+            GROUP BY post_id
+            """,
+            (KIND_THREAD,)
+        )
+        for post_id, sha, _ in cursor:
+            yield post_id, sha
+
+    def count_threads(self) -> int:
+        row = self._conn.execute(
+            "SELECT COUNT(DISTINCT post_id) FROM fetches WHERE kind = ? AND post_id IS NOT NULL",
+            (KIND_THREAD,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def reparse_threads(root: str, items: List[Tuple[str, str]]) -> List[Tuple[str, str, list]]:
+    """
+    进程池任务：从归档中读取一批详情页并重新解析
+
+    Returns:
+        [(post_id, content, images), ...]，读取或解析失败的帖子跳过
+    """
+    results = []
+    for post_id, sha in items:
+        try:
+            tree = etree.HTML(read_object(root, sha))
+            content, images = extract_post_content(tree)
+            results.append((post_id, content, images))
+        except Exception as e:
+            print(f"重新解析失败: {post_id} ({sha[:12]}), 错误: {e}")
+    return results
@@ -0,0 +1,188 @@
+# crawler/parser.py
+"""
+论坛页面解析
+
+XPath 表达式和正则在模块加载时预编译一次，解析每页 / 每个 tbody 时直接复用，
+输出结构与原先 fans_feedback 中的解析函数完全一致。
+"""
+import re
+from datetime import datetime, timedelta, UTC
+
+from lxml import etree
+
+from backend.core.forum_time import forum_now
+
+# ======================
+# 预编译表达式
+# ======================
+_SEPARATOR_XPATH = etree.XPath("//tbody[@id='separatorline']")
+_THREAD_TBODY_XPATH = etree.XPath("//tbody[@id='separatorline']/following-sibling::tbody")
+_ALL_TBODY_XPATH = etree.XPath("//tbody")
+
+# 以下路径均相对于单个帖子的 tbody
+_CATEGORY_XPATH = etree.XPath("./tr/th/div[2]/a[1]/span/text()")
+_TITLE_WITH_CATEGORY_XPATH = etree.XPath("./tr/th/div[2]/a[2]/text()")
+_URL_WITH_CATEGORY_XPATH = etree.XPath("./tr/th/div[2]/a[2]/@href")
+_TITLE_XPATH = etree.XPath("./tr/th/div[2]/a[1]/text()")
+_URL_XPATH = etree.XPath("./tr/th/div[2]/a[1]/@href")
+_USERNAME_XPATH = etree.XPath("./tr/th/div[2]/div/span[1]/a/text()")
+_CREATED_XPATH = etree.XPath("./tr/th/div[2]/div/span[3]/text()")
+_REPLY_COUNT_XPATH = etree.XPath("./tr/th/div[2]/div/a[1]/text()")
+_VIEW_COUNT_XPATH = etree.XPath("./tr/th/div[2]/div/a[2]/text()")
+_STATUS_ALT_XPATH = etree.XPath("./tr/th/div[2]/img/@alt")
+
+# 详情页：主楼正文
+_MAIN_CONTENT_XPATH = etree.XPath('(//td[contains(@class, "t_f")])[1]')
+_TEXT_NODES_XPATH = etree.XPath(".//text()")
+_IMG_XPATH = etree.XPath(".//img")
+
+# 正文过滤规则
+EXCLUDE_KEYWORDS = ['下载附件', '360社区', '上传', '本帖最后由', '编辑', 'B', 'KB', 'MB']
+_EXCLUDE_RE = re.compile("|".join(re.escape(k) for k in EXCLUDE_KEYWORDS))
+_ATTACHMENT_SIZE_RE = re.compile(r'^\(\d+\.?\d*\s*(KB|MB|B)\)$')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+_CLOCK_RE = re.compile(r"^\d{1,2}:\d{2}$")
+
+
+# ======================
+# 工具函数
+# ======================
+def parse_created_at(text: str) -> datetime | None:
+    if not text:
+        return None
+
+    text = text.strip()
+    # 相对时间按论坛时区的“现在”换算，与页面上的绝对时间一致
+    now = forum_now()
+
+    # YYYY-MM-DD HH:MM
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=UTC)
+    except ValueError:
+        pass
+
+    # YYYY-MM-DD
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=UTC)
+    except ValueError:
+        pass
+
+    # 支持其他格式：YYYY/MM/DD, YYYY.MM.DD
+    try:
+        text = text.replace("/", "-").replace(".", "-")
+        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=UTC)
+    except ValueError:
+        pass
+
+    # 今天
+    if text == "今天":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # 昨天
+    if text == "昨天":
+        return (now - timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    # HH:MM → 今天
+    if _CLOCK_RE.match(text):
+        hour, minute = map(int, text.split(":"))
+        return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    return None
+
+
+def safe_int(text: str) -> int:
+    try:
+        return int(text)
+    except Exception:
+        return 0
+
+
+def get_target_tbody_list(tree):
+    if _SEPARATOR_XPATH(tree):
+        return _THREAD_TBODY_XPATH(tree)
+    return _ALL_TBODY_XPATH(tree)
+
+
+# ======================
+# 内容解析
+# ======================
+def _keep_text(t: str) -> bool:
+    return (
+        bool(t)
+        and not _EXCLUDE_RE.search(t)
+        and not _ATTACHMENT_SIZE_RE.match(t)
+        and not ('.' in t and not _CJK_RE.search(t))
+    )
+
+
+def extract_post_content(tree):
+    main_content = _MAIN_CONTENT_XPATH(tree)
+    if not main_content:
+        return "", []
+
+    main = main_content[0]
+
+    content_parts = []
+    for text in _TEXT_NODES_XPATH(main):
+        t = text.strip()
+        if _keep_text(t):
+            content_parts.append(t)
+
+    images = [
+        img.get('zoomfile') or img.get('src')
+        for img in _IMG_XPATH(main)
+    ]
+
+    return "\n".join(content_parts), images
+
+
+def parse_post_list(tree):
+    posts = []
+
+    for tbody in get_target_tbody_list(tree):
+        post_id = tbody.get("id")
+        if not post_id:
+            continue
+
+        post = {
+            "post_id": post_id,
+            "title": "",
+            "username": "",
+            "category": "",
+            "status": "",
+            "has_attachment": False,
+            "created_at": None,
+            "view_count": 0,
+            "reply_count": 0,
+            "url": "",
+            "content": "",
+            "images": [],
+            "crawl_time": datetime.now(UTC)
+        }
+
+        category = _CATEGORY_XPATH(tbody)
+        if category:
+            post["category"] = category[0].strip()
+            post["title"] = "".join(_TITLE_WITH_CATEGORY_XPATH(tbody)).strip()
+            post["url"] = "".join(_URL_WITH_CATEGORY_XPATH(tbody)).strip()
+        else:
+            post["title"] = "".join(_TITLE_XPATH(tbody)).strip()
+            post["url"] = "".join(_URL_XPATH(tbody)).strip()
+
+        post["username"] = "".join(_USERNAME_XPATH(tbody)).strip()
+
+        created_str = "".join(_CREATED_XPATH(tbody)).strip()
+        post["created_at"] = parse_created_at(created_str)
+
+        post["reply_count"] = safe_int("".join(_REPLY_COUNT_XPATH(tbody)))
+        post["view_count"] = safe_int("".join(_VIEW_COUNT_XPATH(tbody)))
+
+        alt_texts = _STATUS_ALT_XPATH(tbody)
+        post["status"] = next((x for x in alt_texts if x != "attach_img"), "")
+        post["has_attachment"] = "attach_img" in alt_texts
+
+        posts.append(post)
+
+    return posts
@@ -5,6 +5,7 @@ from pymongo import MongoClient
 
 from backend.crawler.fans_feedback import crawl_once  # 使用 crawl_once
 from backend.celery_app.tasks import async_analyze_feedback
+from backend.core.keyword_matcher import KeywordMatcher
 # from backend.core.mongo_client import keywords_collection  # 注释掉，不用动态加载
 
 load_dotenv(override=True)
@@ -47,7 +48,7 @@ def init_historical_data(limit: int = 300):
         "蓝屏", "bsod", "崩溃", "卡死", "黑屏", "驱动", "死机", "闪退", "异常",
         "核晶防护", "蓝屏记录", "显卡", "驱动异常" 
     ]
-    keywords = [k.lower() for k in keywords]
+    matcher = KeywordMatcher(keywords)  # 编译一次，不区分大小写
     print(f"使用硬编码关键词（共 {len(keywords)} 个）：{keywords[:10]}{'...' if len(keywords) > 10 else ''}")
     
     # ======================
@@ -61,14 +62,14 @@ def init_historical_data(limit: int = 300):
         total_count += 1
         feedback_id = str(post["_id"])
         
-        title_lower = post.get("title", "").lower()
-        content_lower = post.get("content", "").lower()
+        title = post.get("title", "")
+        content = post.get("content", "")
         
         need_analyze = False
         reasons = []
         
         # 关键词触发
-        if any(k in title_lower or k in content_lower for k in keywords) and post.get("images"):
+        if (matcher.contains_any(title) or matcher.contains_any(content)) and post.get("images"):
             need_analyze = True
             reasons.append("关键词命中且有图片附件")
         
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Request
 import uvicorn
 from typing import Optional, List, Any, Dict
 from pydantic import BaseModel
@@ -11,11 +11,12 @@ from contextlib import asynccontextmanager
 ## feedback 相关导入
 from backend.services.feedback_service import (
     get_recent_feedbacks,
-    get_all_feedbacks,
+    get_feedbacks_page,
     get_feedback_by_id,
     get_feedback_count
 )
-from backend.schemas.feedback import FeedbackResponse
+from backend.schemas.feedback import FeedbackResponse, FeedbackPage
+from backend.core.pagination import encode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 ## keyword 相关导入
 from backend.schemas.keyword import KeywordCreate, KeywordUpdate
@@ -23,30 +24,40 @@ from backend.services import keyword_service
 
 ## Dashboard
 import asyncio
-from backend.services.dashboard_service import today_feedbacks_stats, get_chart_data
+from backend.services.dashboard_service import get_dashboard_stats as load_dashboard_stats, get_dashboard_chart_data
+from backend.services.daily_stats_service import GRANULARITIES, MAX_RANGE_DAYS
 
 ## Analytics相关导入
-from backend.services.analytics_service import generate_overview, generate_type_distribution, generate_trend, generate_category_analysis, generate_keyword_analysis, DateRange
+from backend.services.analytics_service import AnalyticsEngine, generate_overview, generate_type_distribution, generate_trend, generate_category_analysis, generate_keyword_analysis, generate_all_analytics, cached_analytics, analytics_cache, DateRange
 
 ## AI service导入
-from backend.services.ai_analysis_service import get_ai_analysis_by_post_id, get_all_ai_analyses
+from backend.services.ai_analysis_service import get_ai_analysis_by_post_id, get_all_ai_analyses, get_ai_analyses_page
 
 ## report导入
 from backend.services.report_service import report_service
 import os
 
 # ============ 静态文件服务（用于PDF下载） ============
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from backend.services.event_service import event_broadcaster, SSE_HEADERS
+from backend.services.export_service import prepare_export
+from backend.core.db_executor import run_db, shutdown_db_executors
+from backend.core.fast_json import FastJSONResponse
+from backend.core.indexes import ensure_indexes
+from backend.services.keyword_backfill_service import ensure_initial_backfill
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from urllib.parse import quote
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 启动时
-    keyword_service.init_indexes()
+    # 启动时：按注册表创建全部集合的索引；历史帖子还没有 matched_keywords 时排队首次回填
+    ensure_indexes()
+    ensure_initial_backfill()
     yield
-    # 关闭时（这里暂时不需要做事）
+    # 关闭时：停止实时事件订阅，等待数据库线程池中的查询结束
+    await event_broadcaster.close()
+    shutdown_db_executors()
 
 # 创建FastAPI应用实例
 app = FastAPI(
@@ -109,33 +120,66 @@ async def health_check():
     }
 
 ## 用户反馈信息接口
-@app.get("/api/feedback/recent", response_model=List[FeedbackResponse])
-async def api_get_recent_feedbacks(limit: int = 5):
+# 反馈接口直接返回 FastJSONResponse，传 fields 时每行只有 id 和所请求的字段：
+# 不声明 response_model（FastAPI 不会对 Response 对象做校验，声明了也只是与实际输出不符的文档），
+# 完整行的结构通过 responses 写进 OpenAPI 文档
+FEEDBACK_FIELDS_NOTE = "未传 fields 时每行包含全部字段；传 fields 时每行只包含 id 和所请求的字段"
+
+
+@app.get(
+    "/api/feedback/recent",
+    responses={200: {"model": List[FeedbackResponse], "description": FEEDBACK_FIELDS_NOTE}}
+)
+async def api_get_recent_feedbacks(
+    limit: int = 5,
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
+):
     """
     获取最近的反馈
     
     Args:
         limit: 返回条数，默认5条
+        fields: 逗号分隔的返回字段（如 title,category,created_at），id 始终返回
         
     Returns:
         最近的反馈列表
     """
     try:
-        return get_recent_feedbacks(limit)
+        # 已是响应格式的 dict，直接编码返回
+        return FastJSONResponse(await run_db(get_recent_feedbacks, limit, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取反馈数据失败: {str(e)}")
 
 
-@app.get("/api/feedback/all", response_model=List[FeedbackResponse])
-async def api_get_all_feedbacks():
+@app.get(
+    "/api/feedback/all",
+    responses={200: {"model": FeedbackPage, "description": FEEDBACK_FIELDS_NOTE}}
+)
+async def api_get_all_feedbacks(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="每页条数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，为空时取第一页"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
+):
     """
-    获取所有反馈
+    游标分页获取所有反馈（按创建时间倒序）
+
+    fields 只返回指定字段（id 始终返回），未请求的字段不会从数据库读取
     
     Returns:
-        所有反馈列表
+        当前页反馈列表和下一页游标（next_cursor 为空表示没有下一页）
     """
     try:
-        return get_all_feedbacks()
+        feedbacks, next_cursor = await run_db(get_feedbacks_page, limit=limit, cursor=cursor, fields=fields)
+        return FastJSONResponse({
+            "code": 200,
+            "data": feedbacks,
+            "next_cursor": next_cursor,
+            "msg": "success"
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取反馈数据失败: {str(e)}")
     
@@ -188,7 +232,8 @@ async def get_dashboard_stats():
     获取仪表盘统计卡片数据
     """
     try:
-        stats = today_feedbacks_stats()
+        # 读取调度器每分钟刷新的快照
+        stats = await run_db(load_dashboard_stats)
         
         # 直接构造响应，Pydantic 会自动验证和序列化
         return stats
@@ -198,15 +243,17 @@ async def get_dashboard_stats():
 
 
 @app.get("/api/dashboard/chart-data")
-async def get_chart_data_api(days: int = 7):
+async def get_chart_data_api(days: int = 7, granularity: str = "day"):
     """
-    获取图表数据（近 days 天的分类和趋势）
+    获取图表数据（近 days 天的分类和趋势，趋势按 hour / day / week 分桶）
     """
-    if days <= 0 or days > 30:
-        raise HTTPException(status_code=400, detail="days 参数必须在 1-30 之间")
+    if days <= 0 or days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"days 参数必须在 1-{MAX_RANGE_DAYS} 之间")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity 只能是 {' / '.join(GRANULARITIES)}")
         
     try:
-        chart_data = get_chart_data(days)
+        chart_data = await run_db(get_dashboard_chart_data, days, granularity)
         
         return chart_data
         
@@ -214,48 +261,114 @@ async def get_chart_data_api(days: int = 7):
         raise HTTPException(status_code=500, detail=f"获取图表数据失败: {str(e)}")
 
 
+## 实时事件
+@app.get("/api/events/stream")
+async def event_stream(request: Request):
+    """
+    实时事件流（Server-Sent Events）：新反馈、新 AI 分析、待发送告警及告警状态变化的增量
+    """
+    return StreamingResponse(event_broadcaster.stream(request), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.get("/api/events/stats")
+async def event_stream_stats():
+    """
+    本进程实时事件的连接数 / 收到 / 分发 / 丢弃数
+    """
+    return event_broadcaster.stats()
+
+
+## 数据导出
+def export_response(kind: str, format: str, start_date, end_date, category, risk_level, fields):
+    """流式导出：参数在开始发送之前校验，不合法时返回 400"""
+    try:
+        export = prepare_export(kind, format, start_date, end_date, category, risk_level, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        export["body"],
+        media_type=export["media_type"],
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(export['filename'])}"}
+    )
+
+
+@app.get("/api/export/feedbacks")
+async def export_feedbacks(
+    format: str = Query("ndjson", description="导出格式 ndjson / csv"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD（按创建时间，含当天）"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD（含当天）"),
+    category: Optional[str] = Query(None, description="只导出该分类"),
+    fields: Optional[str] = Query(None, description="逗号分隔的导出字段，为空时导出全部")
+):
+    """
+    流式导出反馈（NDJSON / CSV），内存占用与导出量无关
+    """
+    return export_response("feedbacks", format, start_date, end_date, category, None, fields)
+
+
+@app.get("/api/export/ai-analyses")
+async def export_ai_analyses(
+    format: str = Query("ndjson", description="导出格式 ndjson / csv"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD（按分析时间，含当天）"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD（含当天）"),
+    risk_level: Optional[str] = Query(None, description="只导出该风险等级 high / medium / low"),
+    fields: Optional[str] = Query(None, description="逗号分隔的导出字段，为空时导出全部")
+):
+    """
+    流式导出 AI 分析记录（NDJSON / CSV），内存占用与导出量无关
+    """
+    return export_response("ai-analyses", format, start_date, end_date, None, risk_level, fields)
+
+
 ## 数据分析页面
+async def analytics_response(endpoint: str, date_ranges: list, compute):
+    """分析接口统一出口：在重查询线程池中走响应缓存，日期范围 / 分桶粒度不合法时返回 400"""
+    try:
+        return await run_db(cached_analytics, endpoint, date_ranges, compute, heavy=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/api/analytics/overview")
 async def get_overview(date_range: DateRange):
     """获取概览统计数据"""
-    return generate_overview(date_range.start_date, date_range.end_date)
+    return await analytics_response("overview", [date_range], lambda: generate_overview(date_range.start_date, date_range.end_date))
 
 @app.post("/api/analytics/type-distribution")
 async def get_type_distribution(date_range: DateRange):
     """获取反馈类型分布"""
-    return generate_type_distribution()
+    return await analytics_response("type_distribution", [date_range], lambda: generate_type_distribution(date_range.start_date, date_range.end_date))
 
 @app.post("/api/analytics/trend")
 async def get_trend(date_range: DateRange):
     """获取反馈趋势"""
-    return generate_trend(date_range.start_date, date_range.end_date)
+    return await analytics_response("trend", [date_range], lambda: generate_trend(date_range.start_date, date_range.end_date, date_range.granularity))
 
 @app.post("/api/analytics/category")
 async def get_category_analysis(date_range: DateRange):
     """获取分类分析"""
-    return generate_category_analysis(date_range.start_date, date_range.end_date)
+    return await analytics_response("category", [date_range], lambda: generate_category_analysis(date_range.start_date, date_range.end_date))
 
 @app.post("/api/analytics/keywords")
 async def get_keyword_analysis(date_range: DateRange):
     """获取关键词分析"""
-    return generate_keyword_analysis(date_range.start_date, date_range.end_date)
+    return await analytics_response("keywords", [date_range], lambda: generate_keyword_analysis(date_range.start_date, date_range.end_date, date_range.granularity))
 
 @app.post("/api/analytics/all")
 async def get_all_analytics(date_range: DateRange):
-    """获取所有分析数据（一次性获取）"""
-    return {
-        "overview": generate_overview(date_range.start_date, date_range.end_date),
-        "type_distribution": generate_type_distribution(date_range.start_date, date_range.end_date),
-        "trend": generate_trend(date_range.start_date, date_range.end_date),
-        "category_analysis": generate_category_analysis(date_range.start_date, date_range.end_date),
-        "keyword_analysis": generate_keyword_analysis(date_range.start_date, date_range.end_date),
-    }
+    """获取所有分析数据（一次性获取，各报表共用同一次数据读取）"""
+    return await analytics_response("all", [date_range], lambda: generate_all_analytics(date_range.start_date, date_range.end_date, date_range.granularity))
+
+@app.get("/api/analytics/cache-stats")
+async def get_analytics_cache_stats():
+    """分析接口响应缓存的命中 / 未命中 / 淘汰统计"""
+    return analytics_cache.stats()
 
 @app.post("/api/analytics/generate-report")
 async def generate_report(date_range: DateRange):
     """生成周报（模拟）"""
     import time
-    time.sleep(1)  # 模拟生成时间
+    await asyncio.sleep(1)  # 模拟生成时间（不能用 time.sleep 阻塞事件循环）
     
     return {
         "success": True,
@@ -284,33 +397,39 @@ async def download_report(report_id: str):
 @app.post("/api/analytics/compare")
 async def compare_data(current_range: DateRange, compare_range: DateRange):
     """对比两个时间段的数据"""
-    current_data = {
-        "overview": generate_overview(current_range.start_date, current_range.end_date),
-        "trend": generate_trend(current_range.start_date, current_range.end_date)
-    }
-    
-    compare_data = {
-        "overview": generate_overview(compare_range.start_date, compare_range.end_date),
-        "trend": generate_trend(compare_range.start_date, compare_range.end_date)
-    }
-    
-    # 计算增长率
-    current_total = current_data["overview"]["total_feedback"]
-    compare_total = compare_data["overview"]["total_feedback"]
-    growth_rate = ((current_total - compare_total) / compare_total * 100) if compare_total > 0 else 0
-    
-    return {
-        "current_period": current_data,
-        "compare_period": compare_data,
-        "comparison": {
-            "total_feedback_growth": round(growth_rate, 2),
-            "resolution_rate_change": round(
-                current_data["overview"]["resolution_rate"] - compare_data["overview"]["resolution_rate"], 2
-            ),
-            "urgent_feedback_change": 
-                current_data["overview"]["urgent_feedback"] - compare_data["overview"]["urgent_feedback"]
+    def build():
+        current_engine = AnalyticsEngine(current_range.start_date, current_range.end_date, current_range.granularity)
+        current_data = {
+            "overview": current_engine.overview(),
+            "trend": current_engine.trend()
         }
-    }
+        
+        compare_engine = AnalyticsEngine(compare_range.start_date, compare_range.end_date, compare_range.granularity)
+        compare_data = {
+            "overview": compare_engine.overview(),
+            "trend": compare_engine.trend()
+        }
+        
+        # 计算增长率
+        current_total = current_data["overview"]["total_feedback"]
+        compare_total = compare_data["overview"]["total_feedback"]
+        growth_rate = ((current_total - compare_total) / compare_total * 100) if compare_total > 0 else 0
+        
+        return {
+            "current_period": current_data,
+            "compare_period": compare_data,
+            "comparison": {
+                "total_feedback_growth": round(growth_rate, 2),
+                "resolution_rate_change": round(
+                    current_data["overview"]["resolution_rate"] - compare_data["overview"]["resolution_rate"], 2
+                ),
+                # 概览中没有 urgent_feedback 字段，缺失时按 0 计
+                "urgent_feedback_change": 
+                    current_data["overview"].get("urgent_feedback", 0) - compare_data["overview"].get("urgent_feedback", 0)
+            }
+        }
+    
+    return await analytics_response("compare", [current_range, compare_range], build)
 
 
 ## AI 分析获取接口
@@ -325,15 +444,18 @@ async def compare_data(current_range: DateRange, compare_range: DateRange):
 # 【调试专用】新增返回全部的接口
 @app.get("/api/ai-analysis/recent")
 async def all_ai_analyses_recent(
-    limit: Optional[int] = Query(None, ge=1, le=1000, description="不传表示返回全部")
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="不传表示返回全部"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
 ):
     """
     调试用：返回所有 AI 分析记录
     """
     try:
         limit = 4
-        analyses = get_all_ai_analyses(limit=limit)
-        return analyses
+        analyses = await run_db(get_all_ai_analyses, limit=limit, fields=fields)
+        return FastJSONResponse(analyses)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取全部AI分析失败: {str(e)}")
     
@@ -341,30 +463,47 @@ async def all_ai_analyses_recent(
 
 @app.get("/api/ai-analysis/all")
 async def all_ai_analyses(
-    skip: int = Query(0, ge=0, description="跳过的记录数(用于分页)"),
-    limit: int = Query(10, ge=1, le=100, description="每次拉取的记录数")
+    skip: int = Query(0, ge=0, description="跳过的记录数(兼容旧版分页，建议改用 cursor)"),
+    limit: int = Query(10, ge=1, le=100, description="每次拉取的记录数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，为空时取第一页"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
 ):
     """
     分页获取所有 AI 分析记录，供前端懒加载使用
+
+    传 cursor 时按 (analyzed_at, _id) 游标翻页，每一页的代价相同；
+    只传 skip 时沿用旧的 skip 分页，同样返回 next_cursor 以便切换到游标分页。
+    fields 支持 ai_result.risk_level 这样的子字段，_id 和 analyzed_at 始终返回
     """
     try:
-        # 你需要确保你的底层数据库查询函数支持 skip 和 limit
-        # 例如 MongoDB: collection.find().skip(skip).limit(limit)
-        analyses = get_all_ai_analyses(skip=skip, limit=limit)
+        if cursor or skip == 0:
+            analyses, next_cursor = await run_db(get_ai_analyses_page, limit=limit, cursor=cursor, fields=fields)
+        else:
+            analyses = await run_db(get_all_ai_analyses, skip=skip, limit=limit, fields=fields)
+            next_cursor = encode_cursor(analyses[-1], "analyzed_at") if len(analyses) == limit else None
         
         # 建议统一返回结构
-        return {
+        return FastJSONResponse({
             "code": 200,
             "data": analyses,
+            "next_cursor": next_cursor,
             "msg": "success"
-        }
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取全部AI分析失败: {str(e)}")
 
 # 根据 post_id 查询单条
 @app.get("/api/ai-analysis/post/{post_id}")
-async def ai_analysis_by_post_id(post_id: str):
-    analysis = await get_ai_analysis_by_post_id(post_id)
+async def ai_analysis_by_post_id(
+    post_id: str,
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
+):
+    try:
+        analysis = await run_db(get_ai_analysis_by_post_id, post_id, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not analysis:
         raise HTTPException(status_code=404, detail="未找到该帖子的AI分析")
     return analysis
@@ -445,7 +584,7 @@ async def download_report(report_id: str):
         if report_data["status"] != "completed":
             raise HTTPException(status_code=400, detail="报告尚未完成")
 
-        report_detail = report_service.storage.get_report(report_id)
+        report_detail = await run_db(report_service.storage.get_report, report_id)
         if not report_detail:
             raise HTTPException(status_code=404, detail="报告不存在")
 
@@ -497,19 +636,26 @@ from backend.services.alarm_service import get_pending_alarms, mark_alarm_sent,
 from fastapi import Body, Header
 
 @app.get("/api/alarm/pending")
-async def pending_alarms(limit: int = 10):
+async def pending_alarms(
+    limit: int = 10,
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
+):
     """
     获取待处理的告警列表 (聚合了 feedbacks 和 ai_analysis)
+
+    fields 可选 post / ai_result 整组或 post.title、ai_result.trigger 等子字段，以及 risk_level
     """
     try:
         # 调用我们之前写的聚合查询逻辑
-        data = get_pending_alarms(limit)
+        data = await run_db(get_pending_alarms, limit, fields)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(data),
             "data": data
-        }
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取告警失败: {str(e)}")
 
@@ -523,7 +669,7 @@ async def mark_as_sent(payload: dict = Body(...)):
         raise HTTPException(status_code=400, detail="缺少 post_id")
     
     try:
-        mark_alarm_sent(post_id)
+        await run_db(mark_alarm_sent, post_id)
         return {
             "success": True,
             "message": f"Post {post_id} 状态已更新为已发送"
@@ -532,13 +678,15 @@ async def mark_as_sent(payload: dict = Body(...)):
         raise HTTPException(status_code=500, detail=f"更新状态失败: {str(e)}")
     
 @app.post("/api/alarm/resend_latest")
-async def resend_latest_alarm():
+async def resend_latest_alarm(
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，为空时返回全部")
+):
     """
     手动触发：获取最近一次告警数据并返回
     前端拿到这个数据后，可以调用发送逻辑（如发钉钉/飞书）
     """
     try:
-        data = get_latest_alarm_manual()
+        data = await run_db(get_latest_alarm_manual, fields)
         
         if not data:
             return {
@@ -551,6 +699,8 @@ async def resend_latest_alarm():
             "data": data,
             "message": "已成功获取最近一次告警详情"
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"触发手动告警失败: {str(e)}")
     
@@ -566,7 +716,7 @@ async def reset_single_status(
     """
     if x_debug_key != "tuituitui123": # 只有 Postman 带有这个 Header 才能执行
         raise HTTPException(status_code=403, detail="Forbidden")
-    success = update_alarm_status(post_id, status)
+    success = await run_db(update_alarm_status, post_id, status)
     if success:
         return {"success": True, "message": f"Post {post_id} status updated to {status}"}
     return {"success": False, "message": "Post ID not found or status unchanged"}
@@ -579,7 +729,7 @@ async def batch_reset(limit: int = Body(...), x_debug_key: str = Header(None)):
     """
     if x_debug_key != "tuituitui123": # 只有 Postman 带有这个 Header 才能执行
         raise HTTPException(status_code=403, detail="Forbidden")
-    count = reset_all_alarms(limit)
+    count = await run_db(reset_all_alarms, limit)
     return {
         "success": True, 
         "message": f"已重置最近 {count} 条数据的告警状态，Worker 将重新抓取它们。"
@@ -10,6 +10,7 @@ from langchain_community.chat_models.tongyi import ChatTongyi
 from langchain_core.messages import SystemMessage, HumanMessage
 from pymongo import MongoClient
 from bson import ObjectId
+from backend.core.image_store import get_image_store
 
 # =========================
 # 1. 环境变量
@@ -104,14 +105,15 @@ def get_db_connection():
     return client[DB_NAME]
 
 def image_url_to_base64(url: str) -> str:
-    """下载图片并转为 base64"""
+    """读取图片（优先本地缓存，未命中时下载）并转为 base64"""
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        return base64.b64encode(resp.content).decode("utf-8")
+        data = get_image_store().fetch(url, timeout=10)
     except Exception as e:
-        print(f"⚠️ 图片下载失败: {url}, 错误: {e}")
+        print(f"⚠️ 图片缓存不可用: {url}, 错误: {e}")
+        data = None
+    if not data:
         return ""
+    return base64.b64encode(data).decode("utf-8")
 
 # def build_messages(image_base64: str, forum_text: str):
 #     """构造多模态输入-> Langchain -> Tongyi"""
@@ -4,7 +4,10 @@ from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
 import logging
 from datetime import datetime
 
-from backend.crawler.fans_feedback import crawl_incremental_once  # 👈 你的爬虫函数
+from backend.crawler.fans_feedback import crawl_incremental_once, ensure_crawler_indexes  # 👈 你的爬虫函数
+from backend.services.keyword_backfill_service import run_pending_backfills, ensure_initial_backfill
+from backend.services.dashboard_service import refresh_dashboard_snapshot
+from backend.services.daily_stats_service import flush_dirty_days, DAILY_STATS_FLUSH_SECONDS
 
 # ======================
 # 日志
@@ -45,8 +48,12 @@ scheduler.add_listener(
 # ======================
 def crawl_job():
     logging.info("开始执行增量爬虫")
-    crawl_incremental_once()
-    logging.info("增量爬虫执行完成")
+    stats = crawl_incremental_once()
+    logging.info(
+        f"增量爬虫执行完成（{'完整回扫' if stats['full_sweep'] else '快速增量'}，{stats['pages']} 页）: "
+        f"新增 {stats['new']} / 更新 {stats['updated']} / "
+        f"详情抓取 {stats['detail_fetched']} / 跳过抓取 {stats['skipped_fetch']}"
+    )
 
 # 每小时执行一次
 scheduler.add_job(
@@ -59,10 +66,62 @@ scheduler.add_job(
     coalesce=True        # 堆积时合并
 )
 
+def keyword_backfill_job():
+    # 每次最多跑 110 秒后写回检查点，下一轮从检查点继续，不长期占用线程和数据库
+    finished = run_pending_backfills(max_seconds=110)
+    if finished:
+        logging.info(f"关键词回填任务完成 {finished} 个")
+
+# 每 2 分钟检查一次关键词回填任务（关键词增删改时创建）
+scheduler.add_job(
+    keyword_backfill_job,
+    trigger="interval",
+    minutes=2,
+    id="keyword_backfill",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
+
+def dashboard_snapshot_job():
+    # 仪表盘统计卡片和图表的快照写入 Redis，接口直接读取
+    refresh_dashboard_snapshot()
+
+# 每分钟刷新一次仪表盘快照
+scheduler.add_job(
+    dashboard_snapshot_job,
+    trigger="interval",
+    minutes=1,
+    id="dashboard_snapshot",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
+
+def daily_stats_flush_job():
+    # 爬虫 / Worker / 回填只标记待重算的日期，这里按天合并重算
+    flushed = flush_dirty_days()
+    if flushed:
+        logging.info(f"每日统计重算 {flushed} 天")
+
+# 默认每 30 秒合并重算一次每日统计
+scheduler.add_job(
+    daily_stats_flush_job,
+    trigger="interval",
+    seconds=DAILY_STATS_FLUSH_SECONDS,
+    id="daily_stats_flush",
+    replace_existing=True,
+    max_instances=1,
+    coalesce=True
+)
+
 # ======================
 # 启动
 # ======================
 if __name__ == "__main__":
     logging.info("SentinelEye 调度器启动")
+    ensure_crawler_indexes()  # 爬虫去重依赖 post_id 唯一索引
+    ensure_initial_backfill()  # 历史帖子还没有 matched_keywords 时排队首次回填
     crawl_job()  # 启动立刻跑一次
+    dashboard_snapshot_job()
     scheduler.start()
@@ -20,4 +20,12 @@ class FeedbackResponse(BaseModel):
     content: str
     images: List[str]
     tags: List[str]
-    crawl_time: Optional[str] = None
\ No newline at end of file
+    crawl_time: Optional[str] = None
+
+
+class FeedbackPage(BaseModel):
+    """游标分页的反馈列表"""
+    code: int = 200
+    data: List[FeedbackResponse]
+    next_cursor: Optional[str] = None  # 为空表示没有下一页
+    msg: str = "success"
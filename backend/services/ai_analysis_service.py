@@ -1,11 +1,38 @@
 # backend/services/ai_analysis_service.py
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from bson import ObjectId
 
 from backend.core.mongo_client import ai_analysis_collection
+from backend.core.pagination import fetch_page
+from backend.core.fieldsets import parse_fieldset, projection_for
 from datetime import datetime, date, timedelta
 
+ANALYSIS_LIST_QUERY = {"ai_result": {"$exists": True}}
+
+# fields= 可选的字段；ai_result 的子字段按原嵌套结构返回
+ANALYSIS_FIELDS = (
+    "_id", "post_id", "feedback_id", "title", "model_used", "analyzed_at",
+    "has_image", "alarm_sent", "reused_from_analysis_id", "image_distance", "text_similarity",
+    "ai_result",
+    "ai_result.scene", "ai_result.risk_type", "ai_result.risk_level", "ai_result.confidence",
+    "ai_result.key_evidence", "ai_result.analysis", "ai_result.suggestions", "ai_result.need_followup",
+)
+
+
+def analysis_projection(fields: Optional[str], always=("_id", "analyzed_at")) -> Optional[dict]:
+    """
+    fields 参数 → MongoDB 投影，为空时返回 None（整条记录）
+
+    列表接口始终返回 _id 和 analyzed_at（前端翻页和排序需要）
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    selected = parse_fieldset(fields, ANALYSIS_FIELDS, always=always)
+    return projection_for(selected) if selected is not None else None
+
+
 def convert_to_dict(doc: dict) -> dict:
     """
     把 MongoDB 文档转成前端友好的 dict
@@ -15,16 +42,19 @@ def convert_to_dict(doc: dict) -> dict:
         doc["_id"] = str(doc["_id"])
     return doc
 
-def get_all_ai_analyses(skip: int = 0, limit: int = 10) -> List[dict]:
+def get_all_ai_analyses(skip: int = 0, limit: int = 10, fields: Optional[str] = None) -> List[dict]:
     """
     获取所有 AI 分析记录（支持分页）
+
+    fields: 逗号分隔的返回字段，为空时返回整条记录（包含未知字段时抛出 ValueError）
     """
+    projection = analysis_projection(fields)
 
     try:
         cursor = (
             ai_analysis_collection
-            .find({"ai_result": {"$exists": True}})
-            .sort("analyzed_at", -1)
+            .find(ANALYSIS_LIST_QUERY, projection)
+            .sort([("analyzed_at", -1), ("_id", -1)])
             .skip(skip)
             .limit(limit)
         )
@@ -41,12 +71,38 @@ def get_all_ai_analyses(skip: int = 0, limit: int = 10) -> List[dict]:
         return []
 
 
-def get_ai_analysis_by_post_id(post_id: str) -> Optional[dict]:
+def get_ai_analyses_page(
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    游标分页获取 AI 分析记录（按分析时间倒序）
+
+    Args:
+        limit: 每页条数
+        cursor: 上一页返回的 next_cursor，为空时取第一页（不合法时抛出 ValueError）
+        fields: 逗号分隔的返回字段，为空时返回整条记录（包含未知字段时抛出 ValueError）
+
+    Returns:
+        (分析记录列表, 下一页游标)，没有下一页时游标为 None
+    """
+    projection = analysis_projection(fields)
+    docs, next_cursor = fetch_page(
+        ai_analysis_collection, ANALYSIS_LIST_QUERY, "analyzed_at", limit, cursor, projection=projection
+    )
+    return [convert_to_dict(doc) for doc in docs], next_cursor
+
+
+def get_ai_analysis_by_post_id(post_id: str, fields: Optional[str] = None) -> Optional[dict]:
     """
     根据 post_id 查询单条 AI 分析（你最常用的）
+
+    fields: 逗号分隔的返回字段，为空时返回整条记录（包含未知字段时抛出 ValueError）
     """
+    projection = analysis_projection(fields, always=("_id",))
     try:
-        doc = ai_analysis_collection.find_one({"post_id": post_id})
+        doc = ai_analysis_collection.find_one({"post_id": post_id}, projection)
         return convert_to_dict(doc)
     except Exception as e:
         print(f"[错误] 根据post_id查询AI分析失败: {e}")
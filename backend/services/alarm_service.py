@@ -1,42 +1,148 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from backend.core.mongo_client import ai_analysis_collection
+from backend.core.fieldsets import parse_fieldset
+from backend.services.event_service import publish_alarm_updated
 
-def get_pending_alarms(limit: int = 10) -> List[Dict]:
+# 待发送告警：未发送且已有分析结果（索引 alarm_sent + analyzed_at）
+PENDING_ALARM_MATCH = {
+    "alarm_sent": {"$ne": True},      # 过滤已发送
+    "ai_result": {"$exists": True}    # 确保有分析结果
+}
+
+# ======================
+# 稀疏字段
+# ======================
+# 告警字段 → 源文档字段（post.* 来自 feedbacks，ai_result.* 来自 ai_analysis.ai_result）
+ALARM_POST_SOURCES = {
+    "id": "post_id",
+    "title": "title",
+    "username": "username",
+    "category": "category",
+    "created_at": "created_at",
+    "content": "content",
+    "url": "url",
+    "images": "images",
+}
+ALARM_AI_SOURCES = {
+    "trigger": "scene",
+    "analysis": "analysis",
+    "evidence": "key_evidence",
+    "suggestions": "suggestions",
+}
+ALARM_FIELDS = (
+    ("post", "ai_result", "risk_level")
+    + tuple(f"post.{name}" for name in ALARM_POST_SOURCES)
+    + tuple(f"ai_result.{name}" for name in ALARM_AI_SOURCES)
+)
+
+
+def alarm_fieldset(fields: Optional[str]) -> Tuple[Optional[List[str]], dict, dict]:
+    """
+    解析告警接口的 fields 参数（post / ai_result 表示整组字段）
+
+    Returns:
+        (返回的字段，None 表示全部, ai_analysis 投影, feedbacks 投影)
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    selected = parse_fieldset(fields, ALARM_FIELDS)
+    if selected is not None:
+        expanded = []
+        for name in selected:
+            if name == "post":
+                names = [f"post.{key}" for key in ALARM_POST_SOURCES]
+            elif name == "ai_result":
+                names = [f"ai_result.{key}" for key in ALARM_AI_SOURCES]
+            else:
+                names = [name]
+            expanded += [item for item in names if item not in expanded]
+        selected = expanded
+
+    def wanted(group: str, key: str) -> bool:
+        return selected is None or f"{group}.{key}" in selected
+
+    # 风险等级用于过滤，始终取回
+    analysis_projection = {"post_id": 1, "analyzed_at": 1, "ai_result.risk_level": 1}
+    analysis_projection.update({
+        f"ai_result.{source}": 1 for key, source in ALARM_AI_SOURCES.items() if wanted("ai_result", key)
+    })
+    post_projection = {
+        source: 1 for key, source in ALARM_POST_SOURCES.items() if wanted("post", key)
+    } or {"_id": 1}
+    return selected, analysis_projection, post_projection
+
+
+def post_lookup(post_projection: dict) -> dict:
+    """关联 feedbacks，只取回需要的帖子字段"""
+    return {
+        "$lookup": {
+            "from": "feedbacks",             # 关联的集合名
+            "localField": "post_id",         # ai_analysis 中的字段
+            "foreignField": "post_id",       # feedbacks 中的字段
+            "pipeline": [{"$project": post_projection}, {"$limit": 1}],
+            "as": "post_details"             # 存入的临时数组名
+        }
+    }
+
+
+def format_alarm(ai: dict, post: dict, risk: str, selected: Optional[List[str]] = None) -> Dict:
+    """组装告警数据；传入 selected 时只保留这些字段"""
+    alarm = {
+        "post": {
+            "id": post.get("post_id"),
+            "title": post.get("title"),
+            "username": post.get("username"),
+            "category": post.get("category"),
+            "created_at": post.get("created_at"),
+            "content": post.get("content"),
+            "url": post.get("url"),
+            "images": post.get("images", [])
+        },
+        "ai_result": {
+            "trigger": ai.get("scene"),
+            "analysis": [ai.get("analysis")],
+            "evidence": ai.get("key_evidence"),
+            "suggestions": ai.get("suggestions")
+        },
+        "risk_level": risk
+    }
+    if selected is None:
+        return alarm
+
+    picked = {}
+    for name in selected:
+        group, _, key = name.partition(".")
+        if key:
+            picked.setdefault(group, {})[key] = alarm[group][key]
+        else:
+            picked[group] = alarm[group]
+    return picked
+
+
+def get_pending_alarms(limit: int = 10, fields: Optional[str] = None) -> List[Dict]:
     """
     1. 在 ai_analysis 查找 alarm_sent != True 的记录
     2. 通过 lookup 关联 feedbacks 获取帖子基础信息
+
+    fields: 逗号分隔的返回字段，为空时返回全部（包含未知字段时抛出 ValueError）
     """
+    selected, analysis_projection, post_projection = alarm_fieldset(fields)
     pipeline = [
         # STEP 1: 筛选未发送且已有结果的 AI 分析记录
-        {
-            "$match": {
-                "alarm_sent": {"$ne": True},      # 过滤已发送
-                "ai_result": {"$exists": True}    # 确保有分析结果
-            }
-        },
-        # STEP 2: 关联 feedbacks 集合获取帖子详情
-        {
-            "$lookup": {
-                "from": "feedbacks",             # 关联的集合名
-                "localField": "post_id",         # ai_analysis 中的字段
-                "foreignField": "post_id",       # feedbacks 中的字段
-                "as": "post_details"             # 存入的临时数组名
-            }
-        },
-        # STEP 3: 过滤掉那些在 feedbacks 中找不到原始帖子的记录（可选，增加健壮性）
+        { "$match": PENDING_ALARM_MATCH },
+        # STEP 2: 先排序并裁剪字段，后面的 lookup 只对最终需要的前几条执行
+        { "$sort": { "analyzed_at": -1 } },
+        { "$project": analysis_projection },
+        # STEP 3: 关联 feedbacks 集合获取帖子详情
+        post_lookup(post_projection),
+        # STEP 4: 过滤掉那些在 feedbacks 中找不到原始帖子的记录（可选，增加健壮性）
         {
             "$match": {
                 "post_details": { "$not": { "$size": 0 } }
             }
         },
-        # STEP 4: 取出关联数组中的第一个对象
-        {
-            "$addFields": {
-                "post": { "$arrayElemAt": ["$post_details", 0] }
-            }
-        },
-        # STEP 5: 排序并限制条数
-        { "$sort": { "analyzed_at": -1 } },
+        # STEP 5: 限制条数
         { "$limit": limit }
     ]
 
@@ -46,7 +152,7 @@ def get_pending_alarms(limit: int = 10) -> List[Dict]:
 
         for item in cursor:
             ai = item["ai_result"]
-            post = item["post"]
+            post = item["post_details"][0]
             
             # 统一风险等级格式
             risk = str(ai.get("risk_level", "")).upper()
@@ -54,25 +160,7 @@ def get_pending_alarms(limit: int = 10) -> List[Dict]:
                 continue
 
             # 按照你之前的格式进行组装
-            result.append({
-                "post": {
-                    "id": post.get("post_id"),
-                    "title": post.get("title"),
-                    "username": post.get("username"),
-                    "category": post.get("category"),
-                    "created_at": post.get("created_at"),
-                    "content": post.get("content"),
-                    "url": post.get("url"),
-                    "images": post.get("images", [])
-                },
-                "ai_result": {
-                    "trigger": ai.get("scene"),
-                    "analysis": [ai.get("analysis")],
-                    "evidence": ai.get("key_evidence"),
-                    "suggestions": ai.get("suggestions")
-                },
-                "risk_level": risk
-            })
+            result.append(format_alarm(ai, post, risk, selected))
 
         return result
 
@@ -89,13 +177,17 @@ def mark_alarm_sent(post_id: str):
             {"post_id": post_id},
             {"$set": {"alarm_sent": True}}
         )
+        publish_alarm_updated([post_id], True)
     except Exception as e:
         print(f"[错误] 更新告警状态失败: {e}")
 
-def get_latest_alarm_manual() -> Dict:
+def get_latest_alarm_manual(fields: Optional[str] = None) -> Dict:
     """
     获取最近的一条告警记录（无论是否已发送），用于手动触发
+
+    fields: 逗号分隔的返回字段，为空时返回全部（包含未知字段时抛出 ValueError）
     """
+    selected, analysis_projection, post_projection = alarm_fieldset(fields)
     pipeline = [
         # 1. 确保有 AI 结果即可，不看 alarm_sent 状态
         {
@@ -103,19 +195,13 @@ def get_latest_alarm_manual() -> Dict:
                 "ai_result": {"$exists": True}
             }
         },
-        # 2. 关联帖子详情
-        {
-            "$lookup": {
-                "from": "feedbacks",
-                "localField": "post_id",
-                "foreignField": "post_id",
-                "as": "post_details"
-            }
-        },
-        # 3. 按分析时间倒序
+        # 2. 按分析时间倒序
         { "$sort": { "analyzed_at": -1 } },
-        # 4. 只取最新的一条
+        # 3. 只取最新的一条
         { "$limit": 1 },
+        { "$project": analysis_projection },
+        # 4. 关联帖子详情
+        post_lookup(post_projection),
         # 5. 展开
         {
             "$addFields": {
@@ -134,25 +220,7 @@ def get_latest_alarm_manual() -> Dict:
         post = item.get("post", {}) # 考虑到可能帖子被删，给个空字典
 
         # 统一格式化返回（复用之前的逻辑）
-        return {
-            "post": {
-                "id": post.get("post_id"),
-                "title": post.get("title"),
-                "username": post.get("username"),
-                "category": post.get("category"),
-                "created_at": post.get("created_at"),
-                "content": post.get("content"),
-                "url": post.get("url"),
-                "images": post.get("images", [])
-            },
-            "ai_result": {
-                "trigger": ai.get("scene"),
-                "analysis": [ai.get("analysis")],
-                "evidence": ai.get("key_evidence"),
-                "suggestions": ai.get("suggestions")
-            },
-            "risk_level": str(ai.get("risk_level", "")).upper()
-        }
+        return format_alarm(ai, post, str(ai.get("risk_level", "")).upper(), selected)
     except Exception as e:
         print(f"[错误] 获取手动告警数据失败: {e}")
         return None
@@ -167,6 +235,8 @@ def update_alarm_status(post_id: str, status: bool) -> bool:
             {"post_id": post_id},
             {"$set": {"alarm_sent": status}}
         )
+        if result.modified_count > 0:
+            publish_alarm_updated([post_id], status)
         return result.modified_count > 0
     except Exception as e:
         print(f"[错误] 修改状态失败: {e}")
@@ -186,6 +256,7 @@ def reset_all_alarms(limit: int = 10):
             {"post_id": {"$in": ids}},
             {"$set": {"alarm_sent": False}}
         )
+        publish_alarm_updated(ids, False)
         return len(ids)
     except Exception as e:
         print(f"[错误] 批量重置失败: {e}")
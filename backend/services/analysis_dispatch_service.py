@@ -0,0 +1,48 @@
+# backend/services/analysis_dispatch_service.py
+"""
+AI 分析任务投递
+
+爬虫（新帖 / 更新帖）和关键词回填（新命中的历史帖）共用：
+调用方先把帖子的 ai_analyzed 写成 "pending"，再调用 dispatch_analysis 投递 Celery 任务，
+投递失败的帖子撤销 pending 标记，之后由爬虫 / 回填重新判断。
+"""
+from backend.core.mongo_client import feedbacks_collection
+
+
+def dispatch_analysis(feedback_ids: list, collection=None) -> int:
+    """
+    投递异步 AI 分析任务（帖子已在写入时打上 pending 标记）
+
+    Args:
+        feedback_ids: 帖子 _id 列表
+        collection: 撤销 pending 标记使用的 feedbacks 集合，默认 mongo_client.feedbacks_collection
+
+    Returns:
+        投递成功的任务数
+    """
+    if not feedback_ids:
+        return 0
+    collection = feedbacks_collection if collection is None else collection
+
+    failed = []
+    try:
+        from backend.celery_app.tasks import async_analyze_feedback
+    except Exception as celery_err:
+        print(f"❌ Celery 任务投递失败 (请检查 Redis): {celery_err}")
+        failed = list(feedback_ids)
+    else:
+        for feedback_id in feedback_ids:
+            try:
+                async_analyze_feedback.delay(str(feedback_id))  # 异步投递
+                print(f"🚀 已投递异步AI分析任务: {feedback_id}")
+            except Exception as celery_err:
+                # 异常隔离：Redis 挂了不会导致爬虫 / 回填崩溃，跳过即可
+                print(f"❌ Celery 任务投递失败 (请检查 Redis): {celery_err}")
+                failed.append(feedback_id)
+
+    if failed:
+        collection.update_many(
+            {"_id": {"$in": failed}, "ai_analyzed": "pending"},
+            {"$unset": {"ai_analyzed": ""}}
+        )
+    return len(feedback_ids) - len(failed)
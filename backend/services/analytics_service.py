@@ -2,10 +2,22 @@ from datetime import datetime, timedelta, date
 import random
 from pydantic import BaseModel
 from typing import Optional, List, Any, Dict
-from backend.services.feedback_service import get_feedbacks_before_date, get_feedbacks_in_date_range, get_analyzed_feedbacks_in_date_range
-from collections import Counter, defaultdict
+from collections import Counter
 import re
-from backend.services.keyword_service import load_keywords
+from backend.services.keyword_service import load_keywords, get_keyword_matcher
+from backend.services.daily_stats_service import (
+    get_daily_stats,
+    merge_daily_stats,
+    validate_range,
+    bucket_counts,
+    category_items,
+    category_hour_items,
+    keyword_hit_items,
+    keyword_hour_hit_items,
+    INGEST_VERSION,
+    HISTORY_VERSION,
+)
+from backend.core.response_cache import RangeResponseCache
 
 # 预定义颜色列表（可以扩展）
 PREDEFINED_COLORS = [
@@ -73,137 +85,9 @@ def str_to_date(date_str):
 class DateRange(BaseModel):
     start_date: str
     end_date: str
+    granularity: str = "day"   # 趋势分桶粒度：hour / day / week
 
 
-def generate_overview(start_date: str, end_date: str) -> Dict[str, Any]:
-    """生成概览统计数据"""
-
-    start_date = str_to_date(start_date)
-    end_date = str_to_date(end_date)
-    last_start_date = start_date - timedelta(days=7)
-    last_end_date = end_date - timedelta(days=7)
-    
-    this_week_feedbacks = get_feedbacks_in_date_range(start_date, end_date)
-    last_week_feedbacks = get_feedbacks_in_date_range(last_start_date, last_end_date)
-
-    this_week_total_feedback = len(this_week_feedbacks)
-    this_week_pending_feedback = len([f for f in this_week_feedbacks if f.get('status') not in ['已解决', '确认解决', '已答复']])
-    this_week_resolved_feedback = len([f for f in this_week_feedbacks if f.get('status') in ['已解决', '确认解决', '已答复']])
-
-    last_week_total_feedback = len(last_week_feedbacks)
-    last_week_pending_feedback = len([f for f in last_week_feedbacks if f.get('status') not in ['已解决', '确认解决', '已答复']])
-    last_week_resolved_feedback = len([f for f in last_week_feedbacks if f.get('status') in ['已解决', '确认解决', '已答复']])
-
-    # 计算增长率 - 修正运算符优先级
-    if last_week_total_feedback > 0:
-        feedback_growth = round((this_week_total_feedback - last_week_total_feedback) / last_week_total_feedback * 100, 2)
-    else:
-        feedback_growth = 0.0
-
-    pending_change = this_week_pending_feedback - last_week_pending_feedback
-
-    # 计算解决率变化 - 修正运算符优先级
-    if last_week_resolved_feedback > 0:
-        resolution_rate = this_week_resolved_feedback - last_week_resolved_feedback
-    else:
-        resolution_rate = 0.0
-
-    this_week_ai_check = len(get_analyzed_feedbacks_in_date_range(start_date, end_date))
-    ai_check_week_percentage = round((this_week_ai_check / this_week_total_feedback * 100), 2) if this_week_total_feedback > 0 else 0.0
-
-    return {
-        "total_feedback": this_week_total_feedback,
-        "resolved_feedback": this_week_resolved_feedback,
-        "pending_feedback": this_week_pending_feedback,
-        "this_week_ai_check": this_week_ai_check,
-        "feedback_growth": feedback_growth,
-        "pending_change": pending_change,
-        "resolution_rate": resolution_rate,
-        "ai_check_week_percentage": ai_check_week_percentage,
-    }
-
-def generate_type_distribution(start_date: str, end_date: str) -> List[Dict[str, Any]]:
-    """生成反馈类型分布"""
-
-    start_date_dt = str_to_date(start_date)
-    end_date_dt = str_to_date(end_date)
-    this_week_feedbacks = get_feedbacks_in_date_range(start_date_dt, end_date_dt)  # 建议改用这个更清晰的函数
-    
-    categories = []
-    for fb in this_week_feedbacks:
-        cat = fb.get("category", "").strip()  # 去掉前后空格
-        if not cat:  # 如果为空字符串或None
-            cat = "未知"
-        categories.append(cat)
-    
-    counter = Counter(categories)
-    
-    distribution = []
-    for i, (category, count) in enumerate(counter.most_common()):
-        color = PREDEFINED_COLORS[i % len(PREDEFINED_COLORS)]
-        distribution.append({
-            "name": category,
-            "value": count,
-            "color": color
-        })
-    
-    return distribution
-
-def generate_trend(start_date: str, end_date: str) -> Dict[str, Any]:
-    """生成周趋势数据：Top3 类型在日期范围内的每日数量"""
-    
-    # 解析日期
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
-    
-    # 获取日期范围内的所有反馈（包含结束日）
-    feedbacks = get_feedbacks_in_date_range(start_dt, end_dt, include_end_day=True)
-    
-    # 清理 category：空字符串或 None 转为 "未知"
-    def normalize_category(cat: str) -> str:
-        return cat.strip() if cat and str(cat).strip() else "未知"
-    
-    # 统计总数量，找出 Top3
-    category_counter = Counter(normalize_category(fb.get("category", "")) for fb in feedbacks)
-    top3_categories = [item[0] for item in category_counter.most_common(3)]
-    
-    # 如果不足3个，用 "未知" 补齐（可选，这里直接取实际有的）
-    # top3_categories = top3_categories[:3]  # 自然最多3个
-    
-    # 生成日期序列（最多7天）
-    dates = []
-    current = start_dt
-    while current <= end_dt and len(dates) < 7:
-        dates.append(current.strftime("%m-%d"))
-        current += timedelta(days=1)
-    
-    # 按天按类别统计数量
-    daily_stats = defaultdict(lambda: defaultdict(int))
-    for fb in feedbacks:
-        created = fb["created_at"]
-        if isinstance(created, dict):  # 如果是 {"$date": ...} 格式，需要处理（建议提前转好）
-            continue  # 或用 parser 解析，这里假设已经是 datetime
-        day = created.date()
-        if start_dt <= day <= end_dt:
-            cat = normalize_category(fb.get("category", ""))
-            daily_stats[day.strftime("%m-%d")][cat] += 1
-    
-    # 构建 series
-    series = []
-    predefined_colors = ["#10b981", "#f59e0b", "#3b82f6"]  # 绿色、橙色、蓝色
-    for i, cat in enumerate(top3_categories):
-        data = [daily_stats[date].get(cat, 0) for date in dates]
-        series.append({
-            "name": cat,
-            "data": data,
-            "color": predefined_colors[i % len(predefined_colors)]
-        })
-    
-    return {
-        "dates": dates,
-        "series": series
-    }
-
 def parse_date(date_str: str) -> date:
     """尝试多种日期格式解析"""
     formats = [
@@ -219,152 +103,266 @@ def parse_date(date_str: str) -> date:
     
     return datetime.strptime(date_str, "%Y-%m-%d").date()
 
+
+# ======================
+# 分析引擎
+# ======================
+class AnalyticsEngine:
+    """
+    一个日期范围的全部分析报表
+
+    本周期与上一周期（各前移 7 天）的每日统计只读取一次（get_daily_stats 一次 $in 查询 + 今天实时聚合），
+    概览 / 类型分布 / 趋势 / 分类 / 关键词各报表都从这份结果计算，不再各自查询同一范围。
+    趋势按 granularity（hour / day / week）分桶，范围最长 366 天，返回补零的稠密数组
+    """
+
+    def __init__(self, start_date: str, end_date: str, granularity: str = "day"):
+        self.start_dt = parse_date(start_date)
+        self.end_dt = parse_date(end_date)
+        self.granularity = granularity
+        validate_range(self.start_dt, self.end_dt, granularity)
+        self.last_start_dt = self.start_dt - timedelta(days=7)
+        self.last_end_dt = self.end_dt - timedelta(days=7)
+
+        self._days: Optional[Dict[date, dict]] = None
+        self._this_period: Optional[dict] = None
+        self._last_period: Optional[dict] = None
+
+    # ======================
+    # 数据加载（只执行一次）
+    # ======================
+    @property
+    def days(self) -> Dict[date, dict]:
+        """日期 → 当天统计，覆盖上一周期起点到本周期终点"""
+        if self._days is None:
+            first_day = min(self.start_dt, self.last_start_dt)
+            try:
+                day_stats = get_daily_stats(first_day, self.end_dt)
+            except Exception as e:
+                print(f"[错误] 读取每日统计失败: {e}")
+                day_stats = []
+            self._days = {stats["date"].date(): stats for stats in day_stats}
+        return self._days
+
+    def _period_days(self, start_dt: date, end_dt: date) -> List[dict]:
+        return [stats for day, stats in sorted(self.days.items()) if start_dt <= day <= end_dt]
+
+    def _period(self, start_dt: date, end_dt: date) -> dict:
+        return merge_daily_stats(self._period_days(start_dt, end_dt))
+
+    def _buckets(self, daily_items, hourly_items):
+        """本周期按粒度分桶：(标签列表, 每个桶的 {名称: 数量})"""
+        return bucket_counts(
+            self._period_days(self.start_dt, self.end_dt),
+            self.start_dt, self.end_dt, self.granularity,
+            daily_items, hourly_items
+        )
+
+    @property
+    def this_period(self) -> dict:
+        if self._this_period is None:
+            self._this_period = self._period(self.start_dt, self.end_dt)
+        return self._this_period
+
+    @property
+    def last_period(self) -> dict:
+        if self._last_period is None:
+            self._last_period = self._period(self.last_start_dt, self.last_end_dt)
+        return self._last_period
+
+    # ======================
+    # 报表
+    # ======================
+    def overview(self) -> Dict[str, Any]:
+        """概览统计数据"""
+        this_week, last_week = self.this_period, self.last_period
+
+        this_week_total_feedback = this_week["total"]
+        this_week_resolved_feedback = this_week["resolved"]
+        this_week_pending_feedback = this_week_total_feedback - this_week_resolved_feedback
+
+        last_week_total_feedback = last_week["total"]
+        last_week_resolved_feedback = last_week["resolved"]
+        last_week_pending_feedback = last_week_total_feedback - last_week_resolved_feedback
+
+        # 计算增长率 - 修正运算符优先级
+        if last_week_total_feedback > 0:
+            feedback_growth = round((this_week_total_feedback - last_week_total_feedback) / last_week_total_feedback * 100, 2)
+        else:
+            feedback_growth = 0.0
+
+        pending_change = this_week_pending_feedback - last_week_pending_feedback
+
+        # 计算解决率变化 - 修正运算符优先级
+        if last_week_resolved_feedback > 0:
+            resolution_rate = this_week_resolved_feedback - last_week_resolved_feedback
+        else:
+            resolution_rate = 0.0
+
+        this_week_ai_check = this_week["ai_analyzed"]["analyzed"]
+        ai_check_week_percentage = round((this_week_ai_check / this_week_total_feedback * 100), 2) if this_week_total_feedback > 0 else 0.0
+
+        return {
+            "total_feedback": this_week_total_feedback,
+            "resolved_feedback": this_week_resolved_feedback,
+            "pending_feedback": this_week_pending_feedback,
+            "this_week_ai_check": this_week_ai_check,
+            "feedback_growth": feedback_growth,
+            "pending_change": pending_change,
+            "resolution_rate": resolution_rate,
+            "ai_check_week_percentage": ai_check_week_percentage,
+        }
+
+    def type_distribution(self) -> List[Dict[str, Any]]:
+        """反馈类型分布（分类数量降序；数量相同时按最早出现时间排序）"""
+        distribution = []
+        for i, (category, count) in enumerate(self.this_period["categories"]):
+            distribution.append({
+                "name": category,
+                "value": count,
+                "color": PREDEFINED_COLORS[i % len(PREDEFINED_COLORS)]
+            })
+        return distribution
+
+    def trend(self) -> Dict[str, Any]:
+        """趋势数据：Top3 类型在日期范围内每个时间桶的数量"""
+        top3_categories = [item[0] for item in self.this_period["categories"][:3]]
+        labels, buckets = self._buckets(category_items, category_hour_items)
+
+        series = []
+        predefined_colors = ["#10b981", "#f59e0b", "#3b82f6"]  # 绿色、橙色、蓝色
+        for i, cat in enumerate(top3_categories):
+            series.append({
+                "name": cat,
+                "data": [bucket.get(cat, 0) for bucket in buckets],
+                "color": predefined_colors[i % len(predefined_colors)]
+            })
+
+        return {
+            "dates": labels,
+            "granularity": self.granularity,
+            "series": series
+        }
+
+    def category_analysis(self) -> List[Dict[str, Any]]:
+        """分类分析数据：取数量前8的类型（不足则全部）"""
+        colors = [
+            "#10b981", "#f59e0b", "#3b82f6", "#8b5cf6", "#ef4444",
+            "#06b6d4", "#ec4899", "#84cc16", "#f97316"
+        ]
+        result = []
+        for i, (category, count) in enumerate(self.this_period["categories"][:8]):
+            result.append({
+                "name": category if category != "未知" else "未分类",  # 可选美化
+                "value": count,
+                "color": colors[i % len(colors)]
+            })
+        return result
+
+    def keyword_analysis(self) -> Dict[str, Any]:
+        """关键词分析数据：高频前8个关键词（不足则全部） + Top4趋势"""
+        # 加载关键词库
+        all_keywords = load_keywords()
+        if not all_keywords:
+            all_keywords = ["蓝屏", "崩溃", "错误", "无法启动", "闪退", "卡顿", "数据丢失", "系统错误"]
+        keyword_set = set(get_keyword_matcher(all_keywords).keywords)
+
+        # 爬虫入库时已写入 matched_keywords（标题 + 正文的命中次数），
+        # 每日统计中按天 / 按小时记录了各关键词的命中次数
+        total_counter = Counter({                    # 关键词 → 总次数
+            kw: item["hits"] for kw, item in self.this_period["keywords"].items() if kw in keyword_set
+        })
+        labels, buckets = self._buckets(keyword_hit_items, keyword_hour_hit_items)
+
+        # ========== 高频关键词：前8个（不足8个就显示全部）==========
+        top_keywords = []
+        colors = ["#ef4444", "#f59e0b", "#8b5cf6", "#10b981", "#3b82f6", "#ec4899", "#f97316", "#22c55e"]
+        for i, (kw, count) in enumerate(total_counter.most_common(8)):
+            top_keywords.append({
+                "keyword": kw,
+                "count": count,
+                "color": colors[i % len(colors)]
+            })
+
+        # ========== 趋势图：Top4 关键词 ==========
+        top4_keywords = [item[0] for item in total_counter.most_common(4)]
+
+        # 如果一个都没匹配，兜底显示“蓝屏”（避免趋势图为空报错）
+        if not top4_keywords:
+            top4_keywords = ["蓝屏"]
+
+        keyword_trend = {
+            "dates": labels,
+            "granularity": self.granularity,
+            "keywords": top4_keywords,
+            "data": {kw: [bucket.get(kw, 0) for bucket in buckets] for kw in top4_keywords}
+        }
+
+        return {
+            "top_keywords": top_keywords,      # 前8个或全部
+            "keyword_trend": keyword_trend      # Top4（或兜底蓝屏）的每日数据
+        }
+
+    def all(self) -> Dict[str, Any]:
+        """全部报表（共用同一次数据加载）"""
+        return {
+            "overview": self.overview(),
+            "type_distribution": self.type_distribution(),
+            "trend": self.trend(),
+            "category_analysis": self.category_analysis(),
+            "keyword_analysis": self.keyword_analysis(),
+        }
+
+
+# ======================
+# 单项报表（引擎的薄封装）
+# ======================
+def generate_overview(start_date: str, end_date: str) -> Dict[str, Any]:
+    """生成概览统计数据"""
+    return AnalyticsEngine(start_date, end_date).overview()
+
+
+def generate_type_distribution(start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """生成反馈类型分布"""
+    return AnalyticsEngine(start_date, end_date).type_distribution()
+
+
+def generate_trend(start_date: str, end_date: str, granularity: str = "day") -> Dict[str, Any]:
+    """生成趋势数据：Top3 类型在日期范围内按 小时 / 天 / 周 分桶的数量"""
+    return AnalyticsEngine(start_date, end_date, granularity).trend()
+
+
 def generate_category_analysis(start_date: str | None = None, end_date: str | None = None) -> List[Dict[str, Any]]:
     """生成分类分析数据：取数量前8的类型（不足则全部）"""
-    
-    if start_date and end_date:
-        start_dt = parse_date(start_date)
-        end_dt = parse_date(end_date)
-        feedbacks = get_feedbacks_in_date_range(start_dt, end_dt, include_end_day=True)
-    else:
+    if not (start_date and end_date):
         # 如果不传日期，就默认周
-        default_week_dt = get_current_week_range()
-        start_dt = datetime.strptime(default_week_dt['week_start_date'], "%Y.%m.%d").date()
-        end_dt = datetime.strptime(default_week_dt['week_end_date'], "%Y.%m.%d").date()
-        feedbacks = get_feedbacks_in_date_range(start_dt, end_dt, include_end_day=True)
-
-    print(f"Found {len(feedbacks)} feedbacks")  # 调试
-    def normalize_category(cat: Any) -> str:
-        return str(cat).strip() if cat and str(cat).strip() else "未知"
-    
-    counter = Counter(normalize_category(fb.get("category", "")) for fb in feedbacks)
-    
-    # 取前8
-    top_categories = counter.most_common(8)
-    
-    # 预定义颜色循环（可以扩展更多）
-    colors = [
-        "#10b981", "#f59e0b", "#3b82f6", "#8b5cf6", "#ef4444",
-        "#06b6d4", "#ec4899", "#84cc16", "#f97316"
-    ]
-    
-    result = []
-    for i, (category, count) in enumerate(top_categories):
-        result.append({
-            "name": category if category != "未知" else "未分类",  # 可选美化
-            "value": count,
-            "color": colors[i % len(colors)]
-        })
-    
-    return result
+        default_week_dt = get_current_week_range(output_format="%Y-%m-%d")
+        start_date, end_date = default_week_dt['week_start_date'], default_week_dt['week_end_date']
+    return AnalyticsEngine(start_date, end_date).category_analysis()
 
-def generate_keyword_analysis(start_date: str, end_date: str) -> Dict[str, Any]:
+
+def generate_keyword_analysis(start_date: str, end_date: str, granularity: str = "day") -> Dict[str, Any]:
     """生成关键词分析数据：高频前8个关键词（不足则全部） + Top4趋势"""
-    
-    # 解析日期
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
-    
-    # 获取本周帖子
-    feedbacks = get_feedbacks_in_date_range(start_dt, end_dt, include_end_day=True)
-    
-    # 加载关键词库
-    all_keywords = load_keywords()
-    if not all_keywords:
-        all_keywords = ["蓝屏", "崩溃", "错误", "无法启动", "闪退", "卡顿", "数据丢失", "系统错误"]
-    
-    print(f"[DEBUG] 关键词库加载: {len(all_keywords)} 个 → {all_keywords}")
-    print(f"[DEBUG] 本周帖子数量: {len(feedbacks)} 条")
-    
-    # 生成日期序列（最多7天）
-    dates = []
-    current = start_dt
-    while current <= end_dt and len(dates) < 7:
-        dates.append(current.strftime("%m-%d"))
-        current += timedelta(days=1)
-    
-    # 统计：总出现次数 + 每日出现次数
-    total_counter = Counter()                    # 关键词 → 总次数
-    daily_counter = defaultdict(lambda: defaultdict(int))  # 日期 → 关键词 → 次数
-    
-    for fb in feedbacks:
-        title = (fb.get("title") or "").strip()
-        content = (fb.get("content") or "").strip()
-        text = (title + " " + content).lower()  # 统一转小写
-        
-        if not text:
-            continue
-        
-        # 处理 created_at 各种可能格式
-        created = fb.get("created_at")
-        if isinstance(created, str):
-            try:
-                created_dt = datetime.fromisoformat(created.replace("Z", "+00:00"))
-            except:
-                continue
-        elif isinstance(created, dict) and "$date" in created:
-            try:
-                created_dt = datetime.fromisoformat(created["$date"].replace("Z", "+00:00"))
-            except:
-                continue
-        elif isinstance(created, datetime):
-            created_dt = created
-        else:
-            continue
-        
-        post_day_str = created_dt.date().strftime("%m-%d")
-        if post_day_str not in dates:
-            continue
-        
-        # 匹配关键词（子串计数，不区分大小写）
-        for kw in all_keywords:
-            kw_lower = kw.lower()
-            count = text.count(kw_lower)
-            if count > 0:
-                total_counter[kw] += count
-                daily_counter[post_day_str][kw] += count
-    
-    print(f"[DEBUG] 本周关键词匹配统计: {dict(total_counter)}")
-    
-    # ========== 高频关键词：前8个（不足8个就显示全部）==========
-    top_keywords_list = total_counter.most_common(8)  # 最多取8个
-    # 如果少于8个，most_common(8) 会返回全部，不需要额外处理
-    
-    top_keywords = []
-    colors = ["#ef4444", "#f59e0b", "#8b5cf6", "#10b981", "#3b82f6", "#ec4899", "#f97316", "#22c55e"]
-    for i, (kw, count) in enumerate(top_keywords_list):
-        top_keywords.append({
-            "keyword": kw,
-            "count": count,
-            "color": colors[i % len(colors)]
-        })
-    
-    # 如果一个都没匹配到，至少返回空数组（前端不会报错）
-    if not top_keywords:
-        print("[DEBUG] 本周无任何关键词匹配")
-    
-    # ========== 趋势图：Top4 关键词 ==========
-    top4_keywords = [item[0] for item in total_counter.most_common(4)]
-    
-    # 如果一个都没匹配，兜底显示“蓝屏”（避免趋势图为空报错）
-    if not top4_keywords:
-        top4_keywords = ["蓝屏"]
-    
-    keyword_trend = {
-        "dates": dates,
-        "keywords": top4_keywords,
-        "data": {}
-    }
-    
-    for kw in top4_keywords:
-        keyword_trend["data"][kw] = [daily_counter[date].get(kw, 0) for date in dates]
-    
-    print(f"[DEBUG] 趋势图关键词: {top4_keywords}")
-    
-    return {
-        "top_keywords": top_keywords,      # 前8个或全部
-        "keyword_trend": keyword_trend      # Top4（或兜底蓝屏）的每日数据
-    }
+    return AnalyticsEngine(start_date, end_date, granularity).keyword_analysis()
+
+
+def generate_all_analytics(start_date: str, end_date: str, granularity: str = "day") -> Dict[str, Any]:
+    """一次性生成全部分析数据（只读取一次日期范围）"""
+    return AnalyticsEngine(start_date, end_date, granularity).all()
+
+
+# ======================
+# 响应缓存
+# ======================
+# 已结束的范围长期缓存（历史统计版本号变化才失效），包含今天的范围随 ingest 版本号失效
+analytics_cache = RangeResponseCache(INGEST_VERSION, HISTORY_VERSION)
+
+
+def cached_analytics(endpoint: str, date_ranges: List[DateRange], compute) -> Any:
+    """按 (接口名, 分桶粒度, 规范化日期范围) 缓存分析接口的响应"""
+    spans = [(parse_date(r.start_date), parse_date(r.end_date)) for r in date_ranges]
+    key = f"{endpoint}:{','.join(r.granularity for r in date_ranges)}"
+    return analytics_cache.get_or_compute(key, spans, compute)
 
 # 使用示例
 print(get_current_week_range())  # 默认使用今天
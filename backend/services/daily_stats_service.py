@@ -0,0 +1,566 @@
+# backend/services/daily_stats_service.py
+"""
+反馈每日统计（feedback_daily_stats）
+
+每天一条汇总文档：帖子总数，以及按分类 / 状态 / AI 分析标记 / 风险等级 / 关键词的计数。
+仪表盘和分析报表的范围查询读取已结束日期的汇总文档，只有今天实时聚合，
+90 天的报表只读约 90 条小文档，不再扫描上万条帖子。
+
+- 爬虫写入 / 更新帖子、Worker 写入 ai_analysis、关键词回填改写帖子后，
+  调用 mark_days_dirty() 把受影响的日期记入 feedback_daily_stats_dirty（每次写入只是一次 upsert），
+  调度器每隔 DAILY_STATS_FLUSH_SECONDS 调用 flush_dirty_days() 按天整体重算（不做增量加减，重复计算结果一致）。
+  崩溃潮时同一天的成百上千次写入合并成每个周期一次重算，写入成本不随当天帖子数增长
+- 读取时发现缺失或待重算的历史日期会当场计算并补写；今天始终实时聚合，因此读到的统计不受合并延迟影响
+- 标记待重算时递增版本号：今天变化递增 stats_ingest，历史日期变化递增 stats_history，
+  分析报表的响应缓存据此失效
+- “今天”按论坛时区（core.forum_time）计算，与帖子 created_at 的日期边界一致
+- 分类、状态、关键词可能包含 "."，统一存成数组，不用作字段名
+- 另存按小时的分类 / 关键词计数，趋势图可按 小时 / 天 / 周 分桶，不必回查帖子
+
+用法:
+    python -m backend.services.daily_stats_service --rebuild                       # 重建全部日期
+    python -m backend.services.daily_stats_service --rebuild --start 2026-01-01 --end 2026-01-31
+    python -m backend.services.daily_stats_service --flush                         # 立即重算待重算的日期
+"""
+import argparse
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from backend.core.forum_time import forum_today
+from backend.core.mongo_client import db, feedbacks_collection, ai_analysis_collection
+from backend.core.version_counter import bump_version
+
+daily_stats_collection = db.feedback_daily_stats
+# 待重算的日期：_id 为日期，dirty_at 为最后一次标记的时间
+dirty_days_collection = db.feedback_daily_stats_dirty
+
+# 调度器合并重算待重算日期的间隔
+DAILY_STATS_FLUSH_SECONDS = int(os.getenv("DAILY_STATS_FLUSH_SECONDS", "30"))
+
+# 统计版本号（cache_versions 集合）
+INGEST_VERSION = "stats_ingest"      # 今天的统计有变化（爬虫新帖 / Worker 分析）
+HISTORY_VERSION = "stats_history"    # 已结束日期的统计有变化（迟到的分析、状态变化、回填、重建）
+
+# 汇总文档结构版本：结构变化后，旧版本的汇总在读取时视为缺失并重算
+DAILY_STATS_SCHEMA = 2
+
+# 趋势分桶粒度，以及单次查询允许的最大天数
+GRANULARITIES = ("hour", "day", "week")
+MAX_RANGE_DAYS = 366
+
+# 视为已解决的帖子状态
+RESOLVED_STATUSES = ['已解决', '确认解决', '已答复']
+
+# 分类归一化：去掉前后空格，空字符串 / 缺失记为 "未知"
+NORMALIZED_CATEGORY = {
+    "$let": {
+        "vars": {"cat": {"$trim": {"input": {"$ifNull": ["$category", ""]}}}},
+        "in": {"$cond": [{"$eq": ["$$cat", ""]}, "未知", "$$cat"]},
+    }
+}
+
+# ai_analyzed 标记：True → analyzed，"pending" → pending，其余（缺失 / False）→ not_analyzed
+_AI_FLAG = {
+    "$switch": {
+        "branches": [
+            {"case": {"$eq": ["$ai_analyzed", True]}, "then": "analyzed"},
+            {"case": {"$eq": ["$ai_analyzed", "pending"]}, "then": "pending"},
+        ],
+        "default": "not_analyzed",
+    }
+}
+
+
+# ======================
+# 日期工具
+# ======================
+def day_key(day: date) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+def to_day(value) -> Optional[date]:
+    """帖子的 created_at（datetime / date）→ 所属日期"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def day_range(start_dt: date, end_dt: date) -> Dict[str, datetime]:
+    """[start_dt 00:00, end_dt 次日 00:00)，与 get_feedbacks_in_date_range(include_end_day=True) 一致"""
+    return {
+        "$gte": datetime.combine(start_dt, datetime.min.time()),
+        "$lt": datetime.combine(end_dt + timedelta(days=1), datetime.min.time()),
+    }
+
+
+def empty_day_stats(day: date) -> dict:
+    return {
+        "_id": day_key(day),
+        "schema": DAILY_STATS_SCHEMA,
+        "date": datetime.combine(day, datetime.min.time()),
+        "total": 0,
+        "resolved": 0,
+        "categories": [],
+        "statuses": [],
+        "ai_analyzed": {"analyzed": 0, "pending": 0, "not_analyzed": 0},
+        "risk_levels": [],
+        "keywords": [],
+        "hours": [],           # [{"hour", "category", "count"}]
+        "keyword_hours": [],   # [{"hour", "keyword", "posts", "hits"}]
+    }
+
+
+# ======================
+# 计算单日统计
+# ======================
+def _risk_level_counts(analysis_ids: List[str]) -> List[dict]:
+    """已分析帖子对应的 ai_analysis 按风险等级计数（统一转大写，缺失记为 UNKNOWN）"""
+    object_ids = [ObjectId(aid) for aid in analysis_ids if ObjectId.is_valid(aid)]
+    if not object_ids:
+        return []
+    pipeline = [
+        {"$match": {"_id": {"$in": object_ids}}},
+        {"$group": {
+            "_id": {"$toUpper": {"$ifNull": ["$ai_result.risk_level", ""]}},
+            "count": {"$sum": 1},
+        }},
+    ]
+    counts = defaultdict(int)
+    for row in ai_analysis_collection.aggregate(pipeline):
+        counts[row["_id"] or "UNKNOWN"] += row["count"]
+    return [{"name": name, "count": count} for name, count in sorted(counts.items(), key=lambda x: (-x[1], x[0]))]
+
+
+def compute_day_stats(day: date) -> dict:
+    """
+    直接从 feedbacks 聚合某一天的统计（一次 $facet 聚合 + 一次风险等级聚合）
+
+    各数组都有确定的排序，重算结果相同时与已存储的汇总完全相等（用于判断是否需要递增版本号）
+    """
+    stats = empty_day_stats(day)
+    pipeline = [
+        {"$match": {"created_at": day_range(day, day)}},
+        {"$project": {
+            "_id": 0,
+            "created_at": 1,
+            "category": NORMALIZED_CATEGORY,
+            "status": {"$ifNull": ["$status", ""]},
+            "ai_flag": _AI_FLAG,
+            "analysis_id": 1,
+            "matched_keywords": 1,
+        }},
+        {"$facet": {
+            "categories": [
+                {"$group": {"_id": "$category", "count": {"$sum": 1}, "first_seen": {"$min": "$created_at"}}},
+                {"$sort": {"count": -1, "first_seen": 1, "_id": 1}},
+            ],
+            "statuses": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+            ],
+            "ai_flags": [
+                {"$group": {"_id": "$ai_flag", "count": {"$sum": 1}}},
+            ],
+            "keywords": [
+                {"$unwind": "$matched_keywords"},
+                {"$group": {
+                    "_id": "$matched_keywords.keyword",
+                    "posts": {"$sum": 1},
+                    "hits": {"$sum": "$matched_keywords.count"},
+                }},
+                {"$sort": {"posts": -1, "_id": 1}},
+            ],
+            "hours": [
+                {"$group": {
+                    "_id": {"hour": {"$hour": "$created_at"}, "category": "$category"},
+                    "count": {"$sum": 1},
+                }},
+                {"$sort": {"_id.hour": 1, "_id.category": 1}},
+            ],
+            "keyword_hours": [
+                {"$unwind": "$matched_keywords"},
+                {"$group": {
+                    "_id": {"hour": {"$hour": "$created_at"}, "keyword": "$matched_keywords.keyword"},
+                    "posts": {"$sum": 1},
+                    "hits": {"$sum": "$matched_keywords.count"},
+                }},
+                {"$sort": {"_id.hour": 1, "_id.keyword": 1}},
+            ],
+            "analysis_ids": [
+                {"$match": {"ai_flag": "analyzed", "analysis_id": {"$type": "string"}}},
+                {"$group": {"_id": None, "ids": {"$push": "$analysis_id"}}},
+            ],
+        }},
+    ]
+    facets = next(feedbacks_collection.aggregate(pipeline), {})
+
+    stats["categories"] = [
+        {"name": row["_id"], "count": row["count"], "first_seen": row["first_seen"]}
+        for row in facets.get("categories", [])
+    ]
+    stats["statuses"] = [{"name": row["_id"], "count": row["count"]} for row in facets.get("statuses", [])]
+    for row in facets.get("ai_flags", []):
+        stats["ai_analyzed"][row["_id"]] = row["count"]
+    stats["keywords"] = [
+        {"keyword": row["_id"], "posts": row["posts"], "hits": row["hits"]}
+        for row in facets.get("keywords", [])
+    ]
+    stats["hours"] = [
+        {"hour": row["_id"]["hour"], "category": row["_id"]["category"], "count": row["count"]}
+        for row in facets.get("hours", [])
+    ]
+    stats["keyword_hours"] = [
+        {"hour": row["_id"]["hour"], "keyword": row["_id"]["keyword"], "posts": row["posts"], "hits": row["hits"]}
+        for row in facets.get("keyword_hours", [])
+    ]
+    analysis_ids = (facets.get("analysis_ids") or [{"ids": []}])[0]["ids"]
+    stats["risk_levels"] = _risk_level_counts(analysis_ids)
+
+    stats["total"] = sum(item["count"] for item in stats["categories"])
+    stats["resolved"] = sum(item["count"] for item in stats["statuses"] if item["name"] in RESOLVED_STATUSES)
+    return stats
+
+
+# ======================
+# 写入汇总
+# ======================
+def refresh_day(day: date) -> Tuple[dict, bool]:
+    """
+    重新计算某一天并写入汇总集合；并发重算时只保留计算时间更晚的结果
+
+    计算开始前已有的待重算标记随之清除，计算期间新增的标记保留到下一次重算
+
+    Returns:
+        (当天统计, 与已存储的汇总相比是否有变化)
+    """
+    computed_at = datetime.utcnow()   # 先记时间再聚合：写入时比较的是数据快照的时间
+    stats = compute_day_stats(day)
+    previous = daily_stats_collection.find_one({"_id": stats["_id"]}, {"computed_at": 0})
+    changed = previous != stats
+
+    stats["computed_at"] = computed_at
+    try:
+        daily_stats_collection.replace_one(
+            {"_id": stats["_id"], "computed_at": {"$lt": computed_at}},
+            stats,
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass  # 已有更新的结果
+    dirty_days_collection.delete_one({"_id": stats["_id"], "dirty_at": {"$lte": computed_at}})
+    return stats, changed
+
+
+def bump_stats_versions(days: Iterable[date]):
+    """统计有变化的日期 → 递增对应的版本号（今天 / 历史），失败只打印"""
+    today = forum_today()
+    names = {INGEST_VERSION if day >= today else HISTORY_VERSION for day in days}
+    for name in sorted(names):
+        try:
+            bump_version(name)
+        except Exception as e:
+            print(f"[错误] 递增统计版本号失败 {name}: {e}")
+
+
+def mark_days_dirty(values: Iterable) -> int:
+    """
+    标记受影响的日期待重算（爬虫 / Worker / 回填写入后调用），不抛异常
+
+    只做一次批量 upsert 并递增版本号，重算由 flush_dirty_days 合并执行
+
+    Args:
+        values: 帖子的 created_at（datetime / date），自动去重
+
+    Returns:
+        标记的天数
+    """
+    days = {day for day in (to_day(value) for value in values) if day}
+    if not days:
+        return 0
+    now = datetime.utcnow()
+    try:
+        dirty_days_collection.bulk_write(
+            [UpdateOne({"_id": day_key(day)}, {"$set": {"dirty_at": now}}, upsert=True) for day in sorted(days)],
+            ordered=False
+        )
+    except Exception as e:
+        print(f"[错误] 标记每日统计待重算失败: {e}")
+        return 0
+    bump_stats_versions(days)
+    return len(days)
+
+
+def flush_dirty_days() -> int:
+    """重算所有待重算的日期（调度器定时调用），返回重算的天数"""
+    try:
+        keys = [doc["_id"] for doc in dirty_days_collection.find({}, {"_id": 1})]
+    except Exception as e:
+        print(f"[错误] 读取待重算日期失败: {e}")
+        return 0
+    days = []
+    for key in keys:
+        try:
+            days.append(datetime.strptime(key, "%Y-%m-%d").date())
+        except ValueError:
+            dirty_days_collection.delete_one({"_id": key})
+    return refresh_days(days)
+
+
+def refresh_days(values: Iterable) -> int:
+    """
+    立即重新计算受影响的日期（合并重算、重建时调用），不抛异常
+
+    Args:
+        values: 帖子的 created_at（datetime / date），自动去重
+
+    Returns:
+        成功刷新的天数
+    """
+    days = {day for day in (to_day(value) for value in values) if day}
+    refreshed = 0
+    changed_days = []
+    for day in sorted(days):
+        try:
+            _, changed = refresh_day(day)
+            refreshed += 1
+            if changed:
+                changed_days.append(day)
+        except Exception as e:
+            print(f"[错误] 刷新每日统计失败 {day_key(day)}: {e}")
+    bump_stats_versions(changed_days)
+    return refreshed
+
+
+def rebuild_daily_stats(start_dt: Optional[date] = None, end_dt: Optional[date] = None) -> int:
+    """按天重建汇总（默认从最早的帖子到今天），返回重建的天数"""
+    if start_dt is None:
+        first = feedbacks_collection.find_one(
+            {"created_at": {"$type": "date"}}, {"created_at": 1}, sort=[("created_at", ASCENDING)]
+        )
+        if not first:
+            return 0
+        start_dt = first["created_at"].date()
+    end_dt = end_dt or forum_today()
+
+    rebuilt = 0
+    changed_days = []
+    day = start_dt
+    while day <= end_dt:
+        _, changed = refresh_day(day)
+        if changed:
+            changed_days.append(day)
+        rebuilt += 1
+        if rebuilt % 30 == 0:
+            print(f"已重建 {rebuilt} 天（{day_key(day)}）")
+        day += timedelta(days=1)
+    bump_stats_versions(changed_days)
+    return rebuilt
+
+
+# ======================
+# 范围读取
+# ======================
+def get_daily_stats(start_dt: date, end_dt: date) -> List[dict]:
+    """
+    日期范围内每天的统计（按日期升序，每天一条）
+
+    已结束的日期读汇总集合（缺失或待重算的当场计算并补写），今天实时聚合，未来日期为空
+    """
+    today = forum_today()
+    days = [start_dt + timedelta(days=i) for i in range((end_dt - start_dt).days + 1)]
+    closed_days = [day for day in days if day < today]
+
+    stored = {}
+    if closed_days:
+        closed_keys = [day_key(day) for day in closed_days]
+        cursor = daily_stats_collection.find({
+            "_id": {"$in": closed_keys},
+            "schema": DAILY_STATS_SCHEMA,
+        })
+        stored = {doc["_id"]: doc for doc in cursor}
+        # 已标记待重算但还没合并重算的日期，按缺失处理
+        for doc in dirty_days_collection.find({"_id": {"$in": closed_keys}}, {"_id": 1}):
+            stored.pop(doc["_id"], None)
+
+    result = []
+    for day in days:
+        if day > today:
+            result.append(empty_day_stats(day))
+        elif day == today:
+            result.append(compute_day_stats(day))
+        else:
+            result.append(stored.get(day_key(day)) or refresh_day(day)[0])
+    return result
+
+
+def merge_daily_stats(days: List[dict]) -> dict:
+    """
+    合并多天的统计
+
+    Returns:
+        {
+            "total", "resolved",
+            "categories": [(分类, 数量), ...]  数量降序，相同按最早出现时间（与 Counter.most_common 一致）,
+            "statuses" / "risk_levels": {名称: 数量},
+            "ai_analyzed": {"analyzed", "pending", "not_analyzed"},
+            "keywords": {关键词: {"posts": 命中帖子数, "hits": 命中次数}},
+        }
+    """
+    category_counts = defaultdict(int)
+    category_first_seen = {}
+    statuses = defaultdict(int)
+    risk_levels = defaultdict(int)
+    ai_analyzed = {"analyzed": 0, "pending": 0, "not_analyzed": 0}
+    keywords = defaultdict(lambda: {"posts": 0, "hits": 0})
+    total = resolved = 0
+
+    for stats in days:
+        total += stats.get("total", 0)
+        resolved += stats.get("resolved", 0)
+        for item in stats.get("categories", []):
+            category_counts[item["name"]] += item["count"]
+            first_seen = item.get("first_seen")
+            if item["name"] not in category_first_seen or (
+                first_seen and first_seen < category_first_seen[item["name"]]
+            ):
+                category_first_seen[item["name"]] = first_seen
+        for item in stats.get("statuses", []):
+            statuses[item["name"]] += item["count"]
+        for item in stats.get("risk_levels", []):
+            risk_levels[item["name"]] += item["count"]
+        for flag, count in stats.get("ai_analyzed", {}).items():
+            ai_analyzed[flag] = ai_analyzed.get(flag, 0) + count
+        for item in stats.get("keywords", []):
+            keywords[item["keyword"]]["posts"] += item["posts"]
+            keywords[item["keyword"]]["hits"] += item["hits"]
+
+    categories = sorted(
+        category_counts.items(),
+        key=lambda item: (-item[1], category_first_seen.get(item[0]) or datetime.max)
+    )
+    return {
+        "total": total,
+        "resolved": resolved,
+        "categories": categories,
+        "statuses": dict(statuses),
+        "risk_levels": dict(risk_levels),
+        "ai_analyzed": ai_analyzed,
+        "keywords": dict(keywords),
+    }
+
+
+def get_range_stats(start_dt: date, end_dt: date) -> dict:
+    """日期范围内的合并统计"""
+    return merge_daily_stats(get_daily_stats(start_dt, end_dt))
+
+
+# ======================
+# 趋势分桶
+# ======================
+def validate_range(start_dt: date, end_dt: date, granularity: str = "day"):
+    """校验趋势查询的范围与粒度，不合法时抛出 ValueError"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity 只能是 {' / '.join(GRANULARITIES)}")
+    if end_dt < start_dt:
+        raise ValueError("结束日期不能早于开始日期")
+    if (end_dt - start_dt).days + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"日期范围不能超过 {MAX_RANGE_DAYS} 天")
+
+
+def bucket_labels(start_dt: date, end_dt: date, granularity: str) -> List[str]:
+    """分桶标签：小时 "MM-DD HH:00"，天 "MM-DD"，周为该周在范围内的第一天 "MM-DD"（周一开始）"""
+    day_count = (end_dt - start_dt).days + 1
+    if granularity == "hour":
+        return [
+            f"{(start_dt + timedelta(days=i)).strftime('%m-%d')} {hour:02d}:00"
+            for i in range(day_count) for hour in range(24)
+        ]
+    if granularity == "week":
+        week_start = start_dt - timedelta(days=start_dt.weekday())
+        week_count = (day_count + start_dt.weekday() + 6) // 7
+        return [max(start_dt, week_start + timedelta(weeks=i)).strftime("%m-%d") for i in range(week_count)]
+    return [(start_dt + timedelta(days=i)).strftime("%m-%d") for i in range(day_count)]
+
+
+def bucket_counts(
+    days: List[dict],
+    start_dt: date,
+    end_dt: date,
+    granularity: str,
+    daily_items: Callable[[dict], Iterable[Tuple[str, int]]],
+    hourly_items: Callable[[dict], Iterable[Tuple[int, str, int]]],
+) -> Tuple[List[str], List[Dict[str, int]]]:
+    """
+    把每日统计按粒度分桶，返回稠密的（无数据的桶为空字典）标签和计数
+
+    Args:
+        days: get_daily_stats 的结果（范围外的日期会被忽略）
+        daily_items: 从一天的统计中取出 (名称, 数量)，用于 天 / 周 粒度
+        hourly_items: 从一天的统计中取出 (小时, 名称, 数量)，用于 小时 粒度
+
+    Returns:
+        (标签列表, 与标签一一对应的 {名称: 数量})
+    """
+    labels = bucket_labels(start_dt, end_dt, granularity)
+    buckets: List[Dict[str, int]] = [defaultdict(int) for _ in labels]
+    for stats in days:
+        offset = (stats["date"].date() - start_dt).days
+        if offset < 0 or stats["date"].date() > end_dt:
+            continue
+        if granularity == "hour":
+            for hour, name, value in hourly_items(stats):
+                buckets[offset * 24 + hour][name] += value
+        else:
+            index = offset if granularity == "day" else (offset + start_dt.weekday()) // 7
+            for name, value in daily_items(stats):
+                buckets[index][name] += value
+    return labels, [dict(bucket) for bucket in buckets]
+
+
+def category_items(stats: dict) -> Iterable[Tuple[str, int]]:
+    return ((item["name"], item["count"]) for item in stats.get("categories", []))
+
+
+def category_hour_items(stats: dict) -> Iterable[Tuple[int, str, int]]:
+    return ((item["hour"], item["category"], item["count"]) for item in stats.get("hours", []))
+
+
+def keyword_hit_items(stats: dict) -> Iterable[Tuple[str, int]]:
+    return ((item["keyword"], item["hits"]) for item in stats.get("keywords", []))
+
+
+def keyword_hour_hit_items(stats: dict) -> Iterable[Tuple[int, str, int]]:
+    return ((item["hour"], item["keyword"], item["hits"]) for item in stats.get("keyword_hours", []))
+
+
+# ======================
+# CLI
+# ======================
+def main():
+    parser = argparse.ArgumentParser(description="反馈每日统计")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--rebuild", action="store_true", help="按天重建汇总")
+    mode.add_argument("--flush", action="store_true", help="立即重算待重算的日期")
+    parser.add_argument("--start", type=str, default=None, help="起始日期 YYYY-MM-DD（默认最早的帖子）")
+    parser.add_argument("--end", type=str, default=None, help="结束日期 YYYY-MM-DD（默认今天）")
+    args = parser.parse_args()
+
+    if args.flush:
+        print(f"🎉 已重算 {flush_dirty_days()} 天")
+        return
+
+    start_dt = datetime.strptime(args.start, "%Y-%m-%d").date() if args.start else None
+    end_dt = datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else None
+    print(f"🎉 每日统计重建完成，共 {rebuild_daily_stats(start_dt, end_dt)} 天")
+
+
+if __name__ == "__main__":
+    main()
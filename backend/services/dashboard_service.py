@@ -1,50 +1,67 @@
 """
 仪表盘数据服务
+
+统计卡片和图表都从一次 get_daily_stats（近 N 天的每日统计汇总 + 今天的实时聚合）计算。
+调度器每分钟生成一次快照写入 Redis，/api/dashboard/stats 和 /api/dashboard/chart-data 直接读取快照；
+Redis 不可用或快照过期时在本进程内生成并缓存。
 """
-from datetime import datetime, date, timedelta
-from backend.services.feedback_service import get_feedbacks_on_date, get_analyzed_feedbacks_on_date
-from backend.services.keyword_service import load_keywords
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import List, Optional
+from backend.services.keyword_service import get_keyword_matcher
+from backend.services.daily_stats_service import get_daily_stats, merge_daily_stats, bucket_counts, GRANULARITIES
+from backend.core.redis_client import get_redis
+from backend.core.forum_time import forum_today
+
+# ======================
+# 快照配置
+# ======================
+DASHBOARD_SNAPSHOT_KEY = "sentineleye:dashboard:snapshot"
+DASHBOARD_SNAPSHOT_MAX_AGE = int(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE", "180"))   # 超过该秒数的快照视为过期（调度器每分钟刷新）
+DASHBOARD_SNAPSHOT_LOCAL_SECONDS = 5                                              # 本进程内复用快照的秒数，避免每个请求都读 Redis
+DASHBOARD_SNAPSHOT_FALLBACK_SECONDS = 60                                          # Redis 不可用时本地生成的快照复用秒数
+SNAPSHOT_CHART_DAYS = (1, 7, 30)                                                  # 快照中预先计算的图表天数（× 全部分桶粒度）
+KEYWORD_TRIGGER_DAYS = 3
 
 
-def get_keyword_triggers_stats(days=3):
+def get_keyword_triggers_stats(days=KEYWORD_TRIGGER_DAYS, day_stats: Optional[List[dict]] = None):
     """
     统计近N天的关键词触发情况
     
     Args:
         days: 统计天数，默认3天
+        day_stats: 已加载的每日统计（以今天结尾），不传时自行读取
         
     Returns:
         list: 关键词触发统计列表
     """
-    # 获取近N天的反馈数据
     keyword_stats = []
     
-    # 获取近N天的所有反馈
-    recent_feedbacks = get_recent_feedbacks(days)
-    
     # 加载关键词列表
-    keywords = load_keywords()
-    print("关键词列表:", keywords)  # ['核晶防护', '游戏闪退', '蓝屏']
-    
-    # 统计每个关键词在近N天的触发次数
+    keywords = list(get_keyword_matcher().keywords)
+
+    # 近N天：每日统计汇总中记录了每个关键词命中的反馈数（今天实时聚合），
+    # 不再逐条扫描标题和正文
+    try:
+        if day_stats is None:
+            day_stats = get_daily_stats(forum_today() - timedelta(days=days - 1), forum_today())
+        keyword_totals = merge_daily_stats(day_stats[-days:])["keywords"]
+        trigger_counts = {keyword: item["posts"] for keyword, item in keyword_totals.items()}
+    except Exception as e:
+        print(f"[错误] 读取关键词触发统计失败: {e}")
+        trigger_counts = {}
+
     for keyword_name in keywords:
-        count = 0
-        
-        for feedback in recent_feedbacks:
-            # 获取标题和内容
-            title = feedback.get('title', '').lower()
-            content = feedback.get('content', '').lower()
-            keyword_lower = keyword_name.lower()
-            
-            # 检查标题或内容中是否包含关键词（不区分大小写）
-            if keyword_lower in title or keyword_lower in content:
-                count += 1
-        
+        count = trigger_counts.get(keyword_name, 0)
+
         # 判断趋势（这里简化处理，只返回有触发的关键词）
         trend = "stable"  # 默认稳定
         if count > 0:
             trend = "up"  # 有触发就标记为上升
-        
+
         # 只返回有触发的关键词
         if count > 0:
             keyword_stats.append({
@@ -52,48 +69,28 @@ def get_keyword_triggers_stats(days=3):
                 "count": count,
                 "trend": trend
             })
-    
+
     # 按触发次数降序排序
     keyword_stats.sort(key=lambda x: x['count'], reverse=True)
     
     return keyword_stats
 
 
-def get_recent_feedbacks(days):
-    """
-    获取近N天的反馈数据
-    
-    Args:
-        days: 天数
-        
-    Returns:
-        list: 反馈数据列表
-    """
-    recent_feedbacks = []
-    
-    for i in range(days):
-        target_date = date.today() - timedelta(days=i)
-        day_feedbacks = get_feedbacks_on_date(target_date)
-        recent_feedbacks.extend(day_feedbacks)
-    
-    return recent_feedbacks
-
-
-def today_feedbacks_stats():
+def today_feedbacks_stats(day_stats: Optional[List[dict]] = None):
     """
     今日反馈 对比 昨天变化
+
+    Args:
+        day_stats: 已加载的每日统计（以今天结尾，至少 3 天），不传时自行读取
     """
-    # 获取日期
-    today = date.today()
-    yesterday = today - timedelta(days=1)
-    
-    # 获取对应日期的帖子信息
-    today_feedbacks = get_feedbacks_on_date(today)
-    yesterday_feedbacks = get_feedbacks_on_date(yesterday)
+    # 近3天：昨天及之前读每日统计汇总，今天实时聚合
+    if day_stats is None:
+        day_stats = get_daily_stats(forum_today() - timedelta(days=KEYWORD_TRIGGER_DAYS - 1), forum_today())
+    yesterday_stats, today_stats = day_stats[-2], day_stats[-1]
     
     # 统计帖子数量
-    count_today_feedbacks = len(today_feedbacks)
-    count_yesterday_feedbacks = len(yesterday_feedbacks)
+    count_today_feedbacks = today_stats["total"]
+    count_yesterday_feedbacks = yesterday_stats["total"]
     
     # 较昨日增减数量（可为负数）
     pending_difference = count_today_feedbacks - count_yesterday_feedbacks
@@ -106,20 +103,18 @@ def today_feedbacks_stats():
         # 如果昨天没有反馈，今天有反馈则增长率为100%，否则为0%
         feedback_growth_rate = 100 if count_today_feedbacks > 0 else 0
     
-    # 今日紧急反馈数量（根据您的数据结构，需要从content中分析）
-    today_ai_check =  get_analyzed_feedbacks_on_date(today)
-    yesterday_ai_check = get_analyzed_feedbacks_on_date(yesterday)
-    today_ai_check_num = len(today_ai_check)
-    yesterday_ai_check_num = len(yesterday_ai_check)
+    # 今日 AI 已分析数量
+    today_ai_check_num = today_stats["ai_analyzed"]["analyzed"]
+    yesterday_ai_check_num = yesterday_stats["ai_analyzed"]["analyzed"]
     ai_difference = today_ai_check_num - yesterday_ai_check_num
     
-    # 今日待处理问题数量（假设状态为'pending'或'未处理'的）
-    today_pending = len([f for f in today_feedbacks if f.get('status') not in ['已解决', '确认解决', '已答复']])
+    # 今日待处理问题数量（状态不是已解决 / 确认解决 / 已答复的）
+    today_pending = today_stats["total"] - today_stats["resolved"]
 
-    yesterday_pending = len([f for f in yesterday_feedbacks if f.get('status') not in ['已解决', '确认解决', '已答复']])
+    yesterday_pending = yesterday_stats["total"] - yesterday_stats["resolved"]
     
     # 统计近3天关键词触发情况
-    recent_keyword_triggers = get_keyword_triggers_stats(days=3)
+    recent_keyword_triggers = get_keyword_triggers_stats(days=KEYWORD_TRIGGER_DAYS, day_stats=day_stats)
     
     # 输出结果
     result = {
@@ -135,18 +130,29 @@ def today_feedbacks_stats():
     
     return result
 
-def get_chart_data(days=7):
+def get_chart_data(days=7, granularity="day", day_stats: Optional[List[dict]] = None):
     """
     获取图表数据（近N天的分类分布和趋势）
+
+    Args:
+        days: 天数（最多 366）
+        granularity: 趋势分桶粒度 hour / day / week，返回补零的稠密数组
+        day_stats: 已加载的每日统计（以今天结尾，至少 days 天），不传时自行读取
     """
-    recent_feedbacks = get_recent_feedbacks(days)
+    end_date = forum_today()
+    start_date = end_date - timedelta(days=days - 1)
+
+    # 近N天每天一条统计汇总（今天实时聚合），不再取回帖子
+    if day_stats is None:
+        day_stats = get_daily_stats(start_date, end_date)
+    day_stats = day_stats[-days:]
     
     # 1. 分类数据统计
     category_count = {}
-    for feedback in recent_feedbacks:
-        raw_category = feedback.get('category')
-        category = raw_category if raw_category and raw_category.strip() else '未分类'
-        category_count[category] = category_count.get(category, 0) + 1
+    for stats in day_stats:
+        for item in stats["categories"]:
+            category = item["name"] if item["name"] != '未知' else '未分类'
+            category_count[category] = category_count.get(category, 0) + item["count"]
     
     category_data = []
     for category, count in category_count.items():
@@ -155,22 +161,20 @@ def get_chart_data(days=7):
             "value": count
         })
     
-    # 2. 趋势数据统计（每日反馈数）
+    # 2. 趋势数据统计（每个时间桶的反馈数）
+    labels, buckets = bucket_counts(
+        day_stats, start_date, end_date, granularity,
+        lambda stats: [("total", stats["total"])],
+        lambda stats: ((item["hour"], "total", item["count"]) for item in stats.get("hours", []))
+    )
     trend_data = {
-        "dates": [],
-        "feedbacks": []
+        "dates": labels,
+        "granularity": granularity,
+        "feedbacks": [bucket.get("total", 0) for bucket in buckets]
     }
     
-    # 生成最近N天的日期列表
-    for i in range(days-1, -1, -1):
-        target_date = date.today() - timedelta(days=i)
-        day_feedbacks = get_feedbacks_on_date(target_date)
-        
-        trend_data["dates"].append(target_date.strftime("%m-%d"))
-        trend_data["feedbacks"].append(len(day_feedbacks))
-    
     # 3. 总反馈数
-    total_feedbacks = len(recent_feedbacks)
+    total_feedbacks = sum(stats["total"] for stats in day_stats)
     
     return {
         "total_feedbacks": total_feedbacks,
@@ -179,6 +183,111 @@ def get_chart_data(days=7):
     }
 
 
+# ======================
+# 快照
+# ======================
+_local_snapshot = {"snapshot": None, "valid_until": 0.0}
+_local_snapshot_lock = threading.Lock()     # 保护 _local_snapshot 的读写
+_snapshot_rebuild_lock = threading.Lock()   # 快照过期时同一进程只有一个线程重新生成
+
+
+def build_dashboard_snapshot() -> dict:
+    """一次读取近 30 天的每日统计，计算统计卡片和各预设图表"""
+    max_days = max(SNAPSHOT_CHART_DAYS + (KEYWORD_TRIGGER_DAYS,))
+    day_stats = get_daily_stats(forum_today() - timedelta(days=max_days - 1), forum_today())
+
+    return {
+        "generated_at": time.time(),
+        "date": forum_today().isoformat(),
+        "stats": today_feedbacks_stats(day_stats),
+        "charts": {
+            f"{days}:{granularity}": get_chart_data(days, granularity, day_stats)
+            for days in SNAPSHOT_CHART_DAYS for granularity in GRANULARITIES
+        },
+    }
+
+
+def refresh_dashboard_snapshot() -> dict:
+    """生成快照并写入 Redis（调度器每分钟调用），Redis 写入失败只打印"""
+    snapshot = build_dashboard_snapshot()
+    try:
+        get_redis().set(
+            DASHBOARD_SNAPSHOT_KEY,
+            json.dumps(snapshot, ensure_ascii=False),
+            ex=DASHBOARD_SNAPSHOT_MAX_AGE
+        )
+    except Exception as e:
+        print(f"[错误] 仪表盘快照写入 Redis 失败: {e}")
+    return snapshot
+
+
+def _snapshot_fresh(snapshot: Optional[dict]) -> bool:
+    return bool(snapshot) and snapshot.get("date") == forum_today().isoformat() and \
+        time.time() - snapshot.get("generated_at", 0) < DASHBOARD_SNAPSHOT_MAX_AGE
+
+
+def _local_fresh_snapshot() -> Optional[dict]:
+    """本进程内仍在复用期的快照"""
+    with _local_snapshot_lock:
+        snapshot = _local_snapshot["snapshot"]
+        if _snapshot_fresh(snapshot) and time.monotonic() < _local_snapshot["valid_until"]:
+            return snapshot
+        return None
+
+
+def _store_local_snapshot(snapshot: dict, redis_ok: bool):
+    reuse_seconds = DASHBOARD_SNAPSHOT_LOCAL_SECONDS if redis_ok else DASHBOARD_SNAPSHOT_FALLBACK_SECONDS
+    with _local_snapshot_lock:
+        _local_snapshot["snapshot"] = snapshot
+        _local_snapshot["valid_until"] = time.monotonic() + reuse_seconds
+
+
+def get_dashboard_snapshot() -> dict:
+    """
+    读取仪表盘快照：本进程内短时复用 → Redis → 快照过期时本进程生成并写回 Redis
+
+    Redis 不可用时在本进程内生成，复用 DASHBOARD_SNAPSHOT_FALLBACK_SECONDS 秒，避免每个请求都等待连接超时。
+    读 Redis 不持锁；只有快照过期需要重新生成时才串行，其他线程等待后复用生成结果
+    """
+    snapshot = _local_fresh_snapshot()
+    if snapshot:
+        return snapshot
+
+    try:
+        raw = get_redis().get(DASHBOARD_SNAPSHOT_KEY)
+        redis_ok = True
+    except Exception as e:
+        print(f"[错误] 读取 Redis 仪表盘快照失败，改为本地生成: {e}")
+        raw = None
+        redis_ok = False
+
+    snapshot = json.loads(raw) if raw else None
+    if not _snapshot_fresh(snapshot):
+        with _snapshot_rebuild_lock:
+            # 等锁期间其他线程可能已生成
+            snapshot = _local_fresh_snapshot()
+            if snapshot:
+                return snapshot
+            # 调度器没有按时刷新：本进程生成并写回，其他进程随后直接读取
+            snapshot = refresh_dashboard_snapshot() if redis_ok else build_dashboard_snapshot()
+            _store_local_snapshot(snapshot, redis_ok)
+            return snapshot
+
+    _store_local_snapshot(snapshot, redis_ok)
+    return snapshot
+
+
+def get_dashboard_stats() -> dict:
+    """仪表盘统计卡片（读快照）"""
+    return get_dashboard_snapshot()["stats"]
+
+
+def get_dashboard_chart_data(days: int = 7, granularity: str = "day") -> dict:
+    """仪表盘图表（预设的天数 / 粒度读快照，其他组合实时计算）"""
+    chart = get_dashboard_snapshot()["charts"].get(f"{days}:{granularity}")
+    return chart if chart is not None else get_chart_data(days, granularity)
+
+
 # 测试代码
 if __name__ == "__main__":
     print(today_feedbacks_stats())
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+实时事件推送（Server-Sent Events）
+
+爬虫、Celery Worker 和告警接口把增量事件发布到 Redis 频道 EVENTS_CHANNEL：
+- feedback.new   新入库的反馈（数量、今日新增 / 待处理增量、各分类增量、帖子摘要）
+- analysis.new   新的 AI 分析结果
+- alarm.pending  新的待发送告警（风险等级为 HIGH / MEDIUM / LOW 的分析）
+- alarm.updated  告警发送状态变化
+
+每个 API 进程只订阅一次频道，收到消息后格式化成 SSE 帧一次，再放入本进程内每个连接的 asyncio.Queue；
+打开再多的仪表盘也只是多几个队列，不会再触发任何数据库查询。
+"""
+import asyncio
+import json
+import time
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+import redis.asyncio as aioredis
+
+from backend.core.redis_client import REDIS_URL, get_redis
+from backend.core.forum_time import forum_today
+from backend.services.daily_stats_service import RESOLVED_STATUSES
+
+# ======================
+# 配置
+# ======================
+EVENTS_CHANNEL = "sentineleye:events"
+EVENT_QUEUE_SIZE = 100              # 每个连接最多积压的事件数，慢连接丢弃最旧的事件
+SSE_HEARTBEAT_SECONDS = 15          # 没有事件时发送注释行保活，避免代理断开空闲连接
+SSE_RETRY_MS = 5000                 # 浏览器断线重连间隔
+SUBSCRIBE_RETRY_SECONDS = 3         # Redis 订阅断开后的重连间隔
+EVENT_POST_LIMIT = 20               # feedback.new 中最多携带的帖子摘要数
+
+FEEDBACK_NEW = "feedback.new"
+ANALYSIS_NEW = "analysis.new"
+ALARM_PENDING = "alarm.pending"
+ALARM_UPDATED = "alarm.updated"
+
+ALARM_RISK_LEVELS = ("HIGH", "MEDIUM", "LOW")
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",      # 让 Nginx 不缓冲事件流
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+# ======================
+# 发布（爬虫 / Worker / 告警接口调用，失败只打印，不影响主流程）
+# ======================
+def publish_event(event_type: str, data: dict) -> bool:
+    """发布一个事件到 Redis 频道，返回是否发布成功"""
+    message = json.dumps(
+        {"type": event_type, "ts": time.time(), "data": data},
+        ensure_ascii=False,
+        default=_json_default
+    )
+    try:
+        get_redis().publish(EVENTS_CHANNEL, message)
+        return True
+    except Exception as e:
+        print(f"[错误] 发布事件 {event_type} 失败: {e}")
+        return False
+
+
+def _post_summary(post: dict) -> dict:
+    return {
+        "post_id": post.get("post_id"),
+        "title": post.get("title"),
+        "username": post.get("username"),
+        "category": post.get("category"),
+        "status": post.get("status"),
+        "created_at": post.get("created_at"),
+        "url": post.get("url"),
+    }
+
+
+def publish_new_feedbacks(posts: Iterable[dict]) -> bool:
+    """
+    发布新入库的反馈
+
+    today / today_pending 可直接累加到仪表盘的“今日新增反馈”和“待处理问题”
+    """
+    posts = list(posts)
+    if not posts:
+        return False
+
+    today = forum_today()
+    today_posts = [post for post in posts if isinstance(post.get("created_at"), datetime)
+                   and post["created_at"].date() == today]
+    categories: Dict[str, int] = {}
+    for post in posts:
+        category = str(post.get("category") or "").strip() or "未知"
+        categories[category] = categories.get(category, 0) + 1
+
+    return publish_event(FEEDBACK_NEW, {
+        "count": len(posts),
+        "today": len(today_posts),
+        "today_pending": sum(1 for post in today_posts if post.get("status") not in RESOLVED_STATUSES),
+        "categories": categories,
+        "posts": [_post_summary(post) for post in posts[:EVENT_POST_LIMIT]],
+    })
+
+
+def publish_analysis(analysis: dict, post: dict) -> bool:
+    """发布新的 AI 分析结果；风险等级有效且未发送告警时同时发布 alarm.pending"""
+    ai_result = analysis.get("ai_result") or {}
+    risk_level = str(ai_result.get("risk_level", "")).upper()
+    created_at = post.get("created_at")
+
+    published = publish_event(ANALYSIS_NEW, {
+        "analysis_id": str(analysis.get("_id", "")),
+        "post_id": analysis.get("post_id"),
+        "feedback_id": analysis.get("feedback_id"),
+        "title": analysis.get("title"),
+        "risk_level": risk_level,
+        "scene": ai_result.get("scene"),
+        "analyzed_at": analysis.get("analyzed_at"),
+        "created_today": isinstance(created_at, datetime) and created_at.date() == forum_today(),
+        "reused": "reused_from_analysis_id" in analysis,
+    })
+
+    if risk_level in ALARM_RISK_LEVELS and not analysis.get("alarm_sent"):
+        publish_event(ALARM_PENDING, {
+            "post": _post_summary(post),
+            "trigger": ai_result.get("scene"),
+            "risk_level": risk_level,
+        })
+    return published
+
+
+def publish_alarm_updated(post_ids: Iterable[str], alarm_sent: bool) -> bool:
+    """发布告警发送状态变化"""
+    post_ids = [post_id for post_id in post_ids if post_id]
+    if not post_ids:
+        return False
+    return publish_event(ALARM_UPDATED, {"post_ids": post_ids, "alarm_sent": alarm_sent})
+
+
+# ======================
+# 订阅与分发（API 进程）
+# ======================
+class EventBroadcaster:
+    """
+    每个进程一个：订阅 Redis 频道一次，把事件分发给本进程内的所有 SSE 连接
+
+    第一个连接到来时启动订阅任务，Redis 断开后自动重连；应用关闭时调用 close()
+    """
+
+    def __init__(self, channel: str = EVENTS_CHANNEL, queue_size: int = EVENT_QUEUE_SIZE):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._queues: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._metrics = {"received": 0, "delivered": 0, "dropped": 0, "reconnects": 0}
+
+    # ---------- 订阅 ----------
+    async def _listen(self):
+        while True:
+            client = aioredis.Redis.from_url(REDIS_URL, decode_responses=True, health_check_interval=30)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[错误] 事件订阅断开，{SUBSCRIBE_RETRY_SECONDS} 秒后重连: {e}")
+                self._metrics["reconnects"] += 1
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(SUBSCRIBE_RETRY_SECONDS)
+
+    def _dispatch(self, raw: str):
+        """一条消息只解析、格式化一次，所有连接共用同一个 SSE 帧"""
+        try:
+            event_type = json.loads(raw).get("type", "message")
+        except (TypeError, ValueError):
+            return
+        frame = f"event: {event_type}\ndata: {raw}\n\n"
+        self._metrics["received"] += 1
+
+        for queue in self._queues:
+            if queue.full():
+                # 慢连接：丢弃最旧的事件，保证最新的增量能送达
+                queue.get_nowait()
+                self._metrics["dropped"] += 1
+            queue.put_nowait(frame)
+            self._metrics["delivered"] += 1
+
+    def _ensure_listening(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    # ---------- 连接 ----------
+    def subscribe(self) -> asyncio.Queue:
+        self._ensure_listening()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+
+    async def stream(self, request) -> AsyncIterator[str]:
+        """
+        单个 SSE 连接的响应体
+
+        Args:
+            request: FastAPI Request，用于检测客户端断开
+        """
+        queue = self.subscribe()
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    # ---------- 指标 ----------
+    def stats(self) -> dict:
+        return {
+            **self._metrics,
+            "connections": len(self._queues),
+            "listening": self._task is not None and not self._task.done(),
+        }
+
+
+event_broadcaster = EventBroadcaster()
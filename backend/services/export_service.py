@@ -0,0 +1,242 @@
+"""
+数据导出服务（流式 NDJSON / CSV）
+
+直接迭代 MongoDB 游标，每读一批就编码并发送，不在 API 进程里攒整个结果：
+导出一整年的数据内存占用也是常数，CSV 表头在查询开始前就发出。
+参数（导出类型 / 格式 / 日期 / 字段）在开始发送之前校验，不合法时抛出 ValueError。
+"""
+import csv
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
+
+from bson import ObjectId
+
+from backend.core.mongo_client import feedbacks_collection, ai_analysis_collection
+from backend.core.fieldsets import parse_fieldset, projection_for
+from backend.services.analytics_service import parse_date
+
+# ======================
+# 配置
+# ======================
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))      # 每次从 MongoDB 取回的文档数
+EXPORT_CHUNK_CHARS = 64 * 1024                                       # 攒够约 64KB 再发送一次
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# 导出字段 → 文档中的路径
+FEEDBACK_EXPORT_FIELDS = {
+    "id": "_id",
+    "post_id": "post_id",
+    "title": "title",
+    "username": "username",
+    "category": "category",
+    "status": "status",
+    "has_attachment": "has_attachment",
+    "created_at": "created_at",
+    "view_count": "view_count",
+    "reply_count": "reply_count",
+    "url": "url",
+    "content": "content",
+    "images": "images",
+    "tags": "tags",
+    "crawl_time": "crawl_time",
+    "ai_analyzed": "ai_analyzed",
+    "analysis_id": "analysis_id",
+}
+
+ANALYSIS_EXPORT_FIELDS = {
+    "id": "_id",
+    "post_id": "post_id",
+    "feedback_id": "feedback_id",
+    "title": "title",
+    "model_used": "model_used",
+    "analyzed_at": "analyzed_at",
+    "has_image": "has_image",
+    "alarm_sent": "alarm_sent",
+    "scene": "ai_result.scene",
+    "risk_type": "ai_result.risk_type",
+    "risk_level": "ai_result.risk_level",
+    "confidence": "ai_result.confidence",
+    "analysis": "ai_result.analysis",
+    "key_evidence": "ai_result.key_evidence",
+    "suggestions": "ai_result.suggestions",
+    "need_followup": "ai_result.need_followup",
+}
+
+# 导出类型 → (集合, 日期字段, 可导出字段)
+EXPORTS = {
+    "feedbacks": (feedbacks_collection, "created_at", FEEDBACK_EXPORT_FIELDS),
+    "ai-analyses": (ai_analysis_collection, "analyzed_at", ANALYSIS_EXPORT_FIELDS),
+}
+
+
+# ======================
+# 参数
+# ======================
+def build_export_query(
+    date_field: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    risk_level: Optional[str] = None
+) -> dict:
+    """日期范围（含首尾）/ 分类 / 风险等级过滤条件"""
+    query = {}
+    date_range = {}
+    try:
+        start = parse_date(start_date) if start_date else None
+        end = parse_date(end_date) if end_date else None
+    except ValueError:
+        raise ValueError("日期格式错误，应为 YYYY-MM-DD")
+    if start and end and start > end:
+        raise ValueError("开始日期不能晚于结束日期")
+    if start:
+        date_range["$gte"] = datetime.combine(start, datetime.min.time())
+    if end:
+        date_range["$lt"] = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    if date_range:
+        query[date_field] = date_range
+
+    if category:
+        query["category"] = category
+    if risk_level:
+        # 模型输出的大小写不统一
+        query["ai_result.risk_level"] = {"$in": [risk_level.lower(), risk_level.upper()]}
+    return query
+
+
+# ======================
+# 编码
+# ======================
+def _get_path(doc: dict, path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (ObjectId, date)):
+        return str(value)
+    return value
+
+
+class _Echo:
+    """csv.writer 的写入目标：直接返回写入的字符串"""
+
+    def write(self, value):
+        return value
+
+
+def _ndjson_lines(docs: Iterator[dict], columns: List[str], paths: List[str]) -> Iterator[str]:
+    for doc in docs:
+        row = {column: _plain(_get_path(doc, path)) for column, path in zip(columns, paths)}
+        yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+
+def _csv_lines(docs: Iterator[dict], columns: List[str], paths: List[str]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    # 带 BOM，Excel 直接打开不会乱码
+    yield "\ufeff" + writer.writerow(columns)
+    for doc in docs:
+        row = []
+        for path in paths:
+            value = _plain(_get_path(doc, path))
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            row.append("" if value is None else value)
+        yield writer.writerow(row)
+
+
+def _chunked(lines: Iterator[str]) -> Iterator[bytes]:
+    """第一行立即发送，之后攒够 EXPORT_CHUNK_CHARS 再发送"""
+    buffer = []
+    size = 0
+    first = True
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if first or size >= EXPORT_CHUNK_CHARS:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+            first = False
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+# ======================
+# 导出
+# ======================
+def prepare_export(
+    kind: str,
+    fmt: str = "ndjson",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    fields: Optional[str] = None
+) -> dict:
+    """
+    校验参数并准备导出
+
+    Args:
+        kind: feedbacks / ai-analyses
+        fmt: ndjson / csv
+        start_date, end_date: 日期范围（含首尾，按创建时间 / 分析时间），可只传一端
+        category: 反馈分类（仅 feedbacks）
+        risk_level: 风险等级（仅 ai-analyses）
+        fields: 逗号分隔的导出字段，为空时导出全部
+
+    Returns:
+        dict: body（按块产出 bytes 的迭代器）、media_type、filename
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"导出类型只能是 {' / '.join(EXPORTS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format 只能是 {' / '.join(EXPORT_FORMATS)}")
+    if category and kind != "feedbacks":
+        raise ValueError("category 只能用于导出反馈")
+    if risk_level and kind != "ai-analyses":
+        raise ValueError("risk_level 只能用于导出 AI 分析")
+
+    collection, date_field, available = EXPORTS[kind]
+    # 为空时导出全部字段
+    columns = parse_fieldset(fields, list(available)) or list(available)
+    paths = [available[column] for column in columns]
+    query = build_export_query(date_field, start_date, end_date, category, risk_level)
+    # 只读取需要的字段（未选 content / images / ai_result 时不会读取这些大字段）
+    projection = projection_for(columns, available)
+
+    def body() -> Iterator[bytes]:
+        start = time.perf_counter()
+        count = 0
+        cursor = collection.find(query, projection, batch_size=EXPORT_BATCH_SIZE).sort(
+            [(date_field, 1), ("_id", 1)]
+        )
+
+        def counted():
+            nonlocal count
+            for doc in cursor:
+                count += 1
+                yield doc
+
+        encode = _csv_lines if fmt == "csv" else _ndjson_lines
+        try:
+            yield from _chunked(encode(counted(), columns, paths))
+        finally:
+            # 客户端中途断开时也释放服务端游标
+            cursor.close()
+            print(f"导出 {kind}（{fmt}）{count} 条，耗时 {time.perf_counter() - start:.2f} 秒")
+
+    filename = f"{kind}_{start_date or 'all'}_{end_date or 'now'}.{fmt}"
+    return {"body": body(), "media_type": EXPORT_FORMATS[fmt], "filename": filename}
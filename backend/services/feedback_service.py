@@ -1,13 +1,39 @@
 # services/feedback_service.py
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, date, timedelta
 # 修改为从 pymongo 导入
 from bson import ObjectId
 
 from backend.core.mongo_client import feedbacks_collection
+from backend.core.pagination import fetch_page, DEFAULT_PAGE_SIZE
+from backend.core.fieldsets import parse_fieldset, projection_for
 from backend.models.feedback import FeedbackInDB
 from backend.schemas.feedback import FeedbackResponse
 
+# 列表接口只读取响应需要的字段（_id 默认返回）
+FEEDBACK_RESPONSE_PROJECTION = {
+    field: 1 for field in FeedbackResponse.model_fields if field != "id"
+}
+
+# fields= 可选的字段（id 始终返回）
+FEEDBACK_FIELDS = tuple(FeedbackResponse.model_fields)
+
+
+def feedback_fieldset(fields: Optional[str]) -> Tuple[Optional[List[str]], dict]:
+    """
+    解析反馈接口的 fields 参数
+
+    Returns:
+        (返回的字段，None 表示全部, MongoDB 投影)
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    selected = parse_fieldset(fields, FEEDBACK_FIELDS, always=("id",))
+    if selected is None:
+        return None, FEEDBACK_RESPONSE_PROJECTION
+    return selected, projection_for(selected, {"id": "_id"})
+
 
 def _format_datetime(dt: datetime) -> str:
     """格式化datetime为字符串"""
@@ -52,50 +78,82 @@ def convert_to_response(feedback_data: dict) -> FeedbackResponse:
     )
 
 
-def get_recent_feedbacks(limit: int = 5) -> List[FeedbackResponse]:
+def _format_datetime_fast(dt: datetime) -> str:
+    """与 _format_datetime 输出相同（YYYY-MM-DD HH:MM:SS），isoformat 比 strftime 快得多"""
+    if dt:
+        return dt.isoformat(" ", "seconds")[:19]
+    return ""
+
+
+def feedback_row(doc: dict, fields: Optional[List[str]] = None) -> dict:
+    """
+    列表接口的快速路径：与 convert_to_response 字段和格式相同的普通 dict，不构造 Pydantic 对象
+
+    缺失或为 null 的字段按响应模型的类型给出默认值，保证输出始终符合 FeedbackResponse；
+    传入 fields 时只返回这些字段
+    """
+    row = {
+        "id": str(doc.get("_id", "")),
+        "post_id": doc.get("post_id") or "",
+        "title": doc.get("title") or "",
+        "username": doc.get("username") or "",
+        "category": doc.get("category") or "",
+        "status": doc.get("status") or "",
+        "has_attachment": bool(doc.get("has_attachment", False)),
+        "created_at": _format_datetime_fast(doc.get("created_at")),
+        "view_count": doc.get("view_count") or 0,
+        "reply_count": doc.get("reply_count") or 0,
+        "url": doc.get("url") or "",
+        "content": doc.get("content") or "",
+        "images": doc.get("images") or [],
+        "tags": doc.get("tags") or [],
+        "crawl_time": _format_datetime_fast(doc.get("crawl_time")),
+    }
+    return row if fields is None else {field: row[field] for field in fields}
+
+
+def get_recent_feedbacks(limit: int = 5, fields: Optional[str] = None) -> List[dict]:
     """
     获取最近的反馈
     
     Args:
         limit: 返回条数，默认5条
+        fields: 逗号分隔的返回字段，为空时返回全部（包含未知字段时抛出 ValueError）
         
     Returns:
-        反馈列表
+        反馈列表（FeedbackResponse 格式的 dict）
     """
+    selected, projection = feedback_fieldset(fields)
     try:
         # 按created_at倒序排序，获取最新的
-        cursor = feedbacks_collection.find().sort("created_at", -1).limit(limit)
-        
-        feedbacks = []
-        for item in cursor:
-            feedbacks.append(convert_to_response(item))
+        cursor = feedbacks_collection.find({}, projection).sort("created_at", -1).limit(limit)
         
-        return feedbacks
+        return [feedback_row(item, selected) for item in cursor]
         
     except Exception as e:
         print(f"[错误] 获取最近反馈失败: {e}")
         return []
 
 
-def get_all_feedbacks() -> List[FeedbackResponse]:
+def get_feedbacks_page(
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
     """
-    获取所有反馈
-    
+    游标分页获取反馈（按创建时间倒序）
+
+    Args:
+        limit: 每页条数
+        cursor: 上一页返回的 next_cursor，为空时取第一页（不合法时抛出 ValueError）
+        fields: 逗号分隔的返回字段，为空时返回全部（包含未知字段时抛出 ValueError）
+
     Returns:
-        所有反馈列表
+        (反馈列表（FeedbackResponse 格式的 dict）, 下一页游标)，没有下一页时游标为 None
     """
-    try:
-        cursor = feedbacks_collection.find().sort("created_at", -1)
-        
-        feedbacks = []
-        for item in cursor:
-            feedbacks.append(convert_to_response(item))
-        
-        return feedbacks
-        
-    except Exception as e:
-        print(f"[错误] 获取所有反馈失败: {e}")
-        return []
+    selected, projection = feedback_fieldset(fields)
+    docs, next_cursor = fetch_page(feedbacks_collection, {}, "created_at", limit, cursor, projection=projection)
+    return [feedback_row(doc, selected) for doc in docs], next_cursor
 
 
 def get_feedback_by_id(feedback_id: str) -> Optional[FeedbackResponse]:
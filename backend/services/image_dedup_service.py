@@ -0,0 +1,219 @@
+# backend/services/image_dedup_service.py
+"""
+截图感知哈希去重
+
+同一张蓝屏照片 / 报错弹窗常被用户在多个帖子里重复发布。
+每张入库图片计算 64 位 dHash，存入 image_hashes 集合；
+哈希按位切成若干段（band）建多键索引，汉明距离 <= BAND_COUNT - 1 的两张图
+至少有一段完全相同（抽屉原理），因此先用段精确匹配取候选，再逐个计算汉明距离。
+
+Worker 调用大模型前先查找已分析过的近似图片。帖子首图常是表情、签名横幅或通用报错弹窗，
+只凭图片相同不足以说明是同一个问题，因此：
+- 过小或信息量过低（灰度熵低）的图片不登记、不参与匹配
+- 命中的图片所属帖子必须与当前帖子分类相同、标题正文相似，才复用其分析结果
+"""
+import hashlib
+import io
+import math
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from bson import ObjectId
+from PIL import Image
+
+from backend.core.mongo_client import db, feedbacks_collection
+
+image_hashes_collection = db.image_hashes
+
+# ======================
+# 配置
+# ======================
+HASH_SIZE = 8                    # dHash 8x8 = 64 位
+BAND_COUNT = 5                   # 64 位切成 5 段（13/13/13/13/12 位）
+# 汉明距离不超过该值即视为同一张图；受分段数限制，最大为 BAND_COUNT - 1
+DEDUP_MAX_DISTANCE = min(int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "4")), BAND_COUNT - 1)
+MAX_CANDIDATES = 200             # 单次查询最多比较的候选数量
+MAX_IMAGES_PER_POST = int(os.getenv("IMAGE_DEDUP_MAX_IMAGES", "6"))   # 每个帖子最多登记的图片数
+MIN_IMAGE_SIDE = int(os.getenv("IMAGE_DEDUP_MIN_SIDE", "64"))          # 宽或高小于该值（表情、图标）不参与去重
+MIN_IMAGE_ENTROPY = float(os.getenv("IMAGE_DEDUP_MIN_ENTROPY", "3.0"))  # 灰度熵（比特）低于该值视为纯色 / 横幅
+# 复用分析结果要求的标题 + 正文相似度（字符二元组 Jaccard）
+MIN_TEXT_SIMILARITY = float(os.getenv("IMAGE_DEDUP_MIN_TEXT_SIMILARITY", "0.2"))
+
+
+# ======================
+# 哈希计算
+# ======================
+def gray_entropy(histogram: List[int]) -> float:
+    """灰度直方图的香农熵（比特），纯色图为 0，最大为 8"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    return -sum(count / total * math.log2(count / total) for count in histogram if count)
+
+
+def compute_dhash(data: bytes, hash_size: int = HASH_SIZE) -> Optional[int]:
+    """
+    计算图片的 dHash（相邻像素灰度差分）
+
+    无法解码、过小或信息量过低（表情、签名横幅、纯色图）时返回 None
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if min(image.size) < MIN_IMAGE_SIDE:
+                return None
+            gray = image.convert("L")
+            thumb = gray.copy()
+            thumb.thumbnail((128, 128))
+            if gray_entropy(thumb.histogram()) < MIN_IMAGE_ENTROPY:
+                return None
+            small = gray.resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+            pixels = list(small.getdata())
+    except Exception as e:
+        print(f"[错误] 图片解码失败，跳过感知哈希: {e}")
+        return None
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def split_bands(value: int, bits: int = HASH_SIZE * HASH_SIZE, band_count: int = BAND_COUNT) -> list:
+    """把哈希切成 band_count 段，每段编码为 "段号:值"，用于多键索引精确匹配"""
+    bands = []
+    base, extra = divmod(bits, band_count)
+    shift = bits
+    for index in range(band_count):
+        width = base + (1 if index < extra else 0)
+        shift -= width
+        bands.append(f"{index}:{(value >> shift) & ((1 << width) - 1):x}")
+    return bands
+
+
+def text_bigrams(text: str) -> set:
+    """去掉空白后的字符二元组（中文没有分词，二元组足以衡量相似度）"""
+    chars = "".join(text.split()).lower()
+    return {chars[i:i + 2] for i in range(len(chars) - 1)}
+
+
+def text_similarity(a: str, b: str) -> float:
+    """两段文本字符二元组的 Jaccard 相似度，任一为空时为 0"""
+    left, right = text_bigrams(a), text_bigrams(b)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def post_text(post: dict) -> str:
+    return f"{post.get('title') or ''} {post.get('content') or ''}"
+
+
+# ======================
+# 读写
+# ======================
+def record_image(data: bytes, image_url: str = "") -> Optional[dict]:
+    """
+    记录一张图片的感知哈希（按内容 SHA-256 去重）
+
+    Returns:
+        {"sha": 内容哈希, "dhash": 感知哈希}，无法解码或不参与去重的图片返回 None
+    """
+    dhash = compute_dhash(data)
+    if dhash is None:
+        return None
+
+    sha = hashlib.sha256(data).hexdigest()
+    try:
+        image_hashes_collection.update_one(
+            {"_id": sha},
+            {"$setOnInsert": {
+                "dhash": f"{dhash:016x}",
+                "bands": split_bands(dhash),
+                "image_url": image_url,
+                "created_at": datetime.utcnow(),
+            }},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"[错误] 保存图片感知哈希失败: {e}")
+    return {"sha": sha, "dhash": dhash}
+
+
+def find_analyzed_duplicate(
+    dhashes: Iterable[int],
+    post: dict,
+    max_distance: int = DEDUP_MAX_DISTANCE,
+    min_similarity: float = MIN_TEXT_SIMILARITY
+) -> Optional[dict]:
+    """
+    查找可以复用分析结果的近似图片（帖子中任意一张图片命中即可）
+
+    候选图片所属帖子必须与 post 分类相同、标题正文相似度不低于 min_similarity
+
+    Returns:
+        最佳候选的 image_hashes 文档（附带 distance / similarity 字段），没有则返回 None
+    """
+    dhashes = list(dhashes)
+    if not dhashes:
+        return None
+    try:
+        bands = sorted({band for dhash in dhashes for band in split_bands(dhash)})
+        cursor = image_hashes_collection.find(
+            {"bands": {"$in": bands}, "analysis_id": {"$exists": True}},
+            {"dhash": 1, "analysis_id": 1, "feedback_id": 1}
+        ).limit(MAX_CANDIDATES)
+
+        candidates = []
+        for doc in cursor:
+            distance = min(hamming_distance(dhash, int(doc["dhash"], 16)) for dhash in dhashes)
+            if distance <= max_distance:
+                doc["distance"] = distance
+                candidates.append(doc)
+        if not candidates:
+            return None
+
+        # 核对候选图片所属帖子的分类和文本
+        sources = {
+            str(doc["_id"]): doc
+            for doc in feedbacks_collection.find(
+                {"_id": {"$in": [ObjectId(c["feedback_id"]) for c in candidates if ObjectId.is_valid(c.get("feedback_id"))]}},
+                {"title": 1, "content": 1, "category": 1}
+            )
+        }
+        text = post_text(post)
+        best = None
+        for doc in candidates:
+            source = sources.get(str(doc.get("feedback_id")))
+            if not source or (source.get("category") or "") != (post.get("category") or ""):
+                continue
+            doc["similarity"] = round(text_similarity(text, post_text(source)), 3)
+            if doc["similarity"] < min_similarity:
+                continue
+            if best is None or (doc["distance"], -doc["similarity"]) < (best["distance"], -best["similarity"]):
+                best = doc
+        return best
+    except Exception as e:
+        print(f"[错误] 查询近似图片失败: {e}")
+        return None
+
+
+def attach_analysis(sha: str, analysis_id: str, feedback_id: str):
+    """图片首次被大模型分析后记录分析结果，后续近似图片可直接复用"""
+    try:
+        image_hashes_collection.update_one(
+            {"_id": sha, "analysis_id": {"$exists": False}},
+            {"$set": {
+                "analysis_id": analysis_id,
+                "feedback_id": feedback_id,
+                "analyzed_at": datetime.utcnow(),
+            }}
+        )
+    except Exception as e:
+        print(f"[错误] 关联图片分析结果失败: {e}")
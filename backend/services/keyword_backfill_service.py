@@ -0,0 +1,362 @@
+# backend/services/keyword_backfill_service.py
+"""
+关键词回填任务
+
+关键词增删改后，历史帖子的 matched_keywords 需要按新的关键词库重新计算，
+新命中且尚未分析的帖子需要补投 AI 分析。
+
+- 补投只针对最近 KEYWORD_BACKFILL_ANALYZE_DAYS 天的帖子，每个任务最多 KEYWORD_BACKFILL_MAX_ENQUEUE 个，
+  一个宽泛的新关键词不会给几年的历史帖子各投一次 LLM 分析；超出的帖子只改写命中结果，
+  数量和最近的 _id 记录在任务的 skipped / skipped_ids 上
+
+- 任务记录在 keyword_backfill_jobs 集合，按 _id 升序分批扫描 feedbacks，
+  每批写回进度（last_id），中断后从检查点继续
+- 执行者通过租约（lease）认领任务，同一时间只有一个进程在跑
+- 每批之间 sleep，避免百万级回填拖慢爬虫和 API
+
+用法:
+    python -m backend.services.keyword_backfill_service --create   # 手动创建任务
+    python -m backend.services.keyword_backfill_service --run      # 执行 / 续跑任务
+    python -m backend.services.keyword_backfill_service --run --analyze-days 0 --max-enqueue 0   # 不限制补投
+    python -m backend.services.keyword_backfill_service --status   # 查看最近的任务
+"""
+import argparse
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from backend.core.forum_time import forum_today
+from backend.core.mongo_client import db, feedbacks_collection
+from backend.services.analysis_dispatch_service import dispatch_analysis
+from backend.services.keyword_service import get_keyword_matcher, match_feedback_keywords
+from backend.services.daily_stats_service import mark_days_dirty
+
+backfill_jobs_collection = db.keyword_backfill_jobs
+
+# ======================
+# 配置
+# ======================
+BACKFILL_BATCH_SIZE = int(os.getenv("KEYWORD_BACKFILL_BATCH_SIZE", "500"))
+BACKFILL_SLEEP_SECONDS = float(os.getenv("KEYWORD_BACKFILL_SLEEP", "0.2"))  # 每批之间的间隔
+LEASE_SECONDS = 120                    # 租约时长，执行者每批续约；进程崩溃后租约过期可被接管
+# 补投 AI 分析的范围：只补投最近 N 天的帖子、每个任务最多 N 个，0 表示不限制
+BACKFILL_ANALYZE_DAYS = int(os.getenv("KEYWORD_BACKFILL_ANALYZE_DAYS", "30"))
+BACKFILL_MAX_ENQUEUE = int(os.getenv("KEYWORD_BACKFILL_MAX_ENQUEUE", "500"))
+SKIPPED_IDS_LIMIT = 1000               # 任务上保留最近跳过的帖子 _id 数
+
+BACKFILL_PROJECTION = {"title": 1, "content": 1, "matched_keywords": 1, "ai_analyzed": 1, "created_at": 1}
+
+
+# ======================
+# 创建任务
+# ======================
+def create_backfill_job(reason: str) -> Optional[str]:
+    """
+    创建回填任务（由关键词增删改触发）
+
+    已有未开始的任务时合并进去：任务运行时读取的是最新关键词库，不需要重复扫描
+    """
+    now = datetime.utcnow()
+    try:
+        job = backfill_jobs_collection.find_one_and_update(
+            {"status": "pending"},
+            {
+                "$setOnInsert": {
+                    "status": "pending",
+                    "created_at": now,
+                    "last_id": None,
+                    "scanned": 0,
+                    "updated": 0,
+                    "enqueued": 0,
+                    "skipped": 0,
+                },
+                "$push": {"reasons": reason},
+                "$set": {"updated_at": now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return str(job["_id"])
+    except Exception as e:
+        print(f"[错误] 创建关键词回填任务失败: {e}")
+        return None
+
+
+def ensure_initial_backfill() -> Optional[str]:
+    """
+    历史帖子的首次关键词标注（API / 调度器启动时调用）
+
+    matched_keywords 上线前入库的帖子只会在关键词增删改时被回填，在此之前关键词统计对它们全部记为 0。
+    从未有过回填任务、且存在没有 matched_keywords 的帖子时创建一次任务；完成后所有帖子都带有该字段，
+    之后入库的帖子由爬虫写入，不再需要此步骤。
+
+    Returns:
+        创建的任务 ID，不需要时返回 None
+    """
+    try:
+        if backfill_jobs_collection.find_one({}, {"_id": 1}):
+            return None
+        if not feedbacks_collection.find_one({"matched_keywords": {"$exists": False}}, {"_id": 1}):
+            return None
+    except Exception as e:
+        print(f"[错误] 检查历史帖子关键词标注失败: {e}")
+        return None
+    job_id = create_backfill_job("initial: tag historical feedbacks")
+    print(f"历史帖子缺少 matched_keywords，已创建首次回填任务: {job_id}")
+    return job_id
+
+
+def list_backfill_jobs(limit: int = 10) -> List[dict]:
+    return list(backfill_jobs_collection.find().sort("created_at", DESCENDING).limit(limit))
+
+
+# ======================
+# 执行任务
+# ======================
+def claim_backfill_job(owner: str) -> Optional[dict]:
+    """认领最早的待执行任务，或租约已过期的运行中任务"""
+    now = datetime.utcnow()
+    return backfill_jobs_collection.find_one_and_update(
+        {
+            "status": {"$in": ["pending", "running"]},
+            "$or": [
+                {"lease_until": {"$exists": False}},
+                {"lease_until": None},
+                {"lease_until": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": owner,
+                "lease_until": now + timedelta(seconds=LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$min": {"started_at": now},
+        },
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def analyze_horizon(analyze_days: int) -> Optional[datetime]:
+    """补投 AI 分析的最早 created_at（论坛时区零点），analyze_days 为 0 时不限制"""
+    if analyze_days <= 0:
+        return None
+    return datetime.combine(forum_today() - timedelta(days=analyze_days), datetime.min.time())
+
+
+def process_batch(
+    docs: List[dict],
+    matcher,
+    enqueue_budget: Optional[int] = None,
+    analyze_since: Optional[datetime] = None
+) -> dict:
+    """
+    重新计算一批帖子的 matched_keywords（没有该字段的帖子即使未命中也写入空数组），
+    并给新命中且未分析的帖子打 pending 标记后投递
+
+    Args:
+        enqueue_budget: 本批最多投递的分析任务数，None 表示不限制
+        analyze_since: 只投递 created_at 不早于此时间的帖子，None 表示不限制
+
+    Returns:
+        {"updated": 改写的文档数, "enqueued": 投递的分析任务数,
+         "skipped": 新命中但超出范围 / 配额未投递的帖子数, "skipped_ids": 这些帖子的 _id}
+    """
+    operations = []
+    operation_ids = []
+    touched_days = set()
+    to_analyze = []
+    skipped_ids = []
+    for doc in docs:
+        matched = match_feedback_keywords(doc.get("title", ""), doc.get("content", ""), matcher)
+        old_matched = doc.get("matched_keywords")
+        if matched == old_matched:
+            continue
+
+        update = {"matched_keywords": matched}
+        # 从未标注过的帖子（首次回填）只补写命中结果：它们入库时已按当时的规则决定过是否分析
+        old_keywords = {item["keyword"] for item in old_matched or []}
+        newly_matched = old_matched is not None and any(item["keyword"] not in old_keywords for item in matched)
+        if newly_matched and doc.get("ai_analyzed") not in (True, "pending"):
+            created_at = doc.get("created_at")
+            in_horizon = analyze_since is None or (created_at is not None and created_at >= analyze_since)
+            within_budget = enqueue_budget is None or len(to_analyze) < enqueue_budget
+            if in_horizon and within_budget:
+                update["ai_analyzed"] = "pending"
+                to_analyze.append(doc["_id"])
+            else:
+                skipped_ids.append(doc["_id"])
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+        operation_ids.append(doc["_id"])
+        touched_days.add(doc.get("created_at"))
+
+    if not operations:
+        return {"updated": 0, "enqueued": 0, "skipped": 0, "skipped_ids": []}
+
+    try:
+        feedbacks_collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        print(f"[错误] 回填批量写入部分失败: {len(e.details.get('writeErrors', []))} 条")
+        failed_ids = {operation_ids[err["index"]] for err in e.details.get("writeErrors", [])}
+        to_analyze = [fid for fid in to_analyze if fid not in failed_ids]
+
+    enqueued = dispatch_analysis(to_analyze)
+    # 关键词命中 / 分析标记变化后标记所在日期待重算
+    mark_days_dirty(touched_days)
+    return {"updated": len(operations), "enqueued": enqueued, "skipped": len(skipped_ids), "skipped_ids": skipped_ids}
+
+
+def run_backfill_job(
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    sleep_seconds: float = BACKFILL_SLEEP_SECONDS,
+    max_seconds: Optional[float] = None,
+    max_enqueue: int = BACKFILL_MAX_ENQUEUE,
+    analyze_days: int = BACKFILL_ANALYZE_DAYS
+) -> Optional[dict]:
+    """
+    认领并执行一个回填任务
+
+    Args:
+        max_seconds: 最长运行时间，到时写回检查点并释放租约，下次调用从检查点继续
+        max_enqueue: 每个任务最多补投的分析任务数（续跑时扣除已投递的），0 表示不限制
+        analyze_days: 只补投最近 N 天的帖子，0 表示不限制
+
+    Returns:
+        任务的最终状态；没有可执行的任务时返回 None
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    job = claim_backfill_job(owner)
+    if not job:
+        return None
+
+    job_id = job["_id"]
+    last_id = job.get("last_id")
+    matcher = get_keyword_matcher()  # 使用运行时的最新关键词库
+    analyze_since = analyze_horizon(analyze_days)
+    print(f"开始关键词回填任务 {job_id}（检查点: {last_id or '起点'}，关键词 {len(matcher)} 个）")
+
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    try:
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id else {}
+            docs = list(
+                feedbacks_collection.find(query, BACKFILL_PROJECTION)
+                .sort("_id", ASCENDING)
+                .limit(batch_size)
+            )
+            if not docs:
+                job = backfill_jobs_collection.find_one_and_update(
+                    {"_id": job_id, "lease_owner": owner},
+                    {"$set": {"status": "done", "finished_at": datetime.utcnow(), "lease_until": None}},
+                    return_document=ReturnDocument.AFTER
+                )
+                print(f"🎉 关键词回填任务完成: {job_id}")
+                return job
+
+            enqueue_budget = max(max_enqueue - job.get("enqueued", 0), 0) if max_enqueue > 0 else None
+            result = process_batch(docs, matcher, enqueue_budget, analyze_since)
+            last_id = docs[-1]["_id"]
+
+            # 写回检查点并续约；租约被其他执行者接管时停止
+            job = backfill_jobs_collection.find_one_and_update(
+                {"_id": job_id, "lease_owner": owner},
+                {
+                    "$set": {
+                        "last_id": last_id,
+                        "lease_until": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS),
+                        "updated_at": datetime.utcnow(),
+                    },
+                    "$inc": {
+                        "scanned": len(docs),
+                        "updated": result["updated"],
+                        "enqueued": result["enqueued"],
+                        "skipped": result["skipped"],
+                    },
+                    "$push": {"skipped_ids": {"$each": result["skipped_ids"], "$slice": -SKIPPED_IDS_LIMIT}},
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                print(f"⚠️ 回填任务 {job_id} 的租约已被接管，停止执行")
+                return None
+
+            print(f"回填进度 {job_id}: 已扫描 {job['scanned']}，改写 {job['updated']}，"
+                  f"投递 {job['enqueued']}，超出范围未投递 {job.get('skipped', 0)}")
+
+            if deadline and time.monotonic() >= deadline:
+                # 释放租约，下次调度从检查点继续
+                return backfill_jobs_collection.find_one_and_update(
+                    {"_id": job_id, "lease_owner": owner},
+                    {"$set": {"lease_until": None}},
+                    return_document=ReturnDocument.AFTER
+                )
+            time.sleep(sleep_seconds)
+
+    except Exception as e:
+        print(f"[错误] 关键词回填任务失败: {e}")
+        backfill_jobs_collection.update_one(
+            {"_id": job_id, "lease_owner": owner},
+            {"$set": {"error": str(e), "lease_until": None, "updated_at": datetime.utcnow()}}
+        )
+        raise
+
+
+def run_pending_backfills(max_seconds: Optional[float] = None, **kwargs) -> int:
+    """依次执行所有待执行的任务（调度器调用），返回完成的任务数"""
+    finished = 0
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    while True:
+        remaining = deadline - time.monotonic() if deadline else None
+        if remaining is not None and remaining <= 0:
+            break
+        job = run_backfill_job(max_seconds=remaining, **kwargs)
+        if not job or job.get("status") != "done":
+            break
+        finished += 1
+    return finished
+
+
+# ======================
+# CLI
+# ======================
+def main():
+    parser = argparse.ArgumentParser(description="关键词回填任务")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--create", action="store_true", help="创建一个全量回填任务")
+    mode.add_argument("--run", action="store_true", help="执行 / 从检查点续跑待执行的任务")
+    mode.add_argument("--status", action="store_true", help="查看最近的任务")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help=f"每批帖子数（默认 {BACKFILL_BATCH_SIZE}）")
+    parser.add_argument("--sleep", type=float, default=BACKFILL_SLEEP_SECONDS, help=f"每批之间的间隔秒数（默认 {BACKFILL_SLEEP_SECONDS}）")
+    parser.add_argument("--max-enqueue", type=int, default=BACKFILL_MAX_ENQUEUE, help=f"每个任务最多补投的分析任务数，0 不限制（默认 {BACKFILL_MAX_ENQUEUE}）")
+    parser.add_argument("--analyze-days", type=int, default=BACKFILL_ANALYZE_DAYS, help=f"只补投最近 N 天的帖子，0 不限制（默认 {BACKFILL_ANALYZE_DAYS}）")
+    args = parser.parse_args()
+
+    if args.create:
+        print(f"已创建回填任务: {create_backfill_job('manual')}")
+    elif args.run:
+        finished = run_pending_backfills(
+            batch_size=args.batch_size,
+            sleep_seconds=args.sleep,
+            max_enqueue=args.max_enqueue,
+            analyze_days=args.analyze_days
+        )
+        print(f"完成 {finished} 个回填任务")
+    elif args.status:
+        for job in list_backfill_jobs():
+            print(
+                f"{job['_id']}  {job.get('status'):<8} 扫描 {job.get('scanned', 0):>8}  "
+                f"改写 {job.get('updated', 0):>6}  投递 {job.get('enqueued', 0):>5}  跳过 {job.get('skipped', 0):>5}  "
+                f"检查点 {job.get('last_id')}  原因 {', '.join(job.get('reasons', []))}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,26 @@
 # services/keyword_service.py
-from typing import List
+import os
+import threading
+from typing import Iterable, List, Optional, Tuple
 from datetime import datetime
 from pymongo.errors import DuplicateKeyError
 from pymongo import ASCENDING
 
 from backend.core.mongo_client import keywords_collection
+from backend.core.keyword_matcher import KeywordMatcher
+from backend.core.version_counter import VersionedCache, bump_version
+from backend.services.daily_stats_service import HISTORY_VERSION
 
+# 其他进程修改关键词后，本进程最迟多少秒内看到变化
+KEYWORD_CACHE_POLL_SECONDS = float(os.getenv("KEYWORD_CACHE_POLL_SECONDS", "5"))
 
-def init_indexes():
-    """初始化索引（启动时调用一次即可）"""
-    keywords_collection.create_index(
-        [("keyword", ASCENDING)],
-        unique=True
-    )
+# 显式传入关键词列表时编译的自动机：关键词集合不变时复用
+_matcher: Optional[KeywordMatcher] = None
+_matcher_lock = threading.Lock()
 
 
-def load_keywords() -> List[str]:
-    """加载所有关键词"""
+def _load_keyword_set() -> Tuple[List[str], KeywordMatcher]:
+    """从数据库读取关键词并编译自动机（仅在版本号变化时调用）"""
     cursor = keywords_collection.find(
         {},
         {"_id": 0, "keyword": 1}
@@ -26,10 +30,73 @@ def load_keywords() -> List[str]:
 
     # 确保“蓝屏”一定存在
     if "蓝屏" not in keywords:
-        add_keyword("蓝屏")
+        try:
+            keywords_collection.insert_one({"keyword": "蓝屏", "created_at": datetime.utcnow()})
+        except DuplicateKeyError:
+            pass
         keywords.insert(0, "蓝屏")
 
-    return keywords
+    return keywords, KeywordMatcher(keywords)
+
+
+# 关键词缓存：按 cache_versions 中 keywords 的版本号失效
+_keyword_cache = VersionedCache("keywords", _load_keyword_set, KEYWORD_CACHE_POLL_SECONDS)
+
+
+def load_keywords() -> List[str]:
+    """加载所有关键词（进程内缓存，关键词版本号变化后才重新读库）"""
+    keywords, _ = _keyword_cache.get()
+    return list(keywords)
+
+
+def get_keyword_matcher(keywords: Optional[Iterable[str]] = None) -> KeywordMatcher:
+    """
+    获取关键词自动机
+
+    Args:
+        keywords: 关键词列表；不传时使用关键词库的缓存自动机
+
+    关键词集合与上次构建时相同则直接复用，避免每次匹配都重新编译
+    """
+    global _matcher
+    if keywords is None:
+        _, cached_matcher = _keyword_cache.get()
+        return cached_matcher
+
+    keywords = tuple(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+    with _matcher_lock:
+        if _matcher is None or _matcher.keywords != keywords:
+            _matcher = KeywordMatcher(keywords)
+        return _matcher
+
+
+def match_feedback_keywords(title: str, content: str, matcher: Optional[KeywordMatcher] = None) -> List[dict]:
+    """
+    计算帖子命中的关键词，写入 feedback.matched_keywords
+
+    Returns:
+        [{"keyword": 关键词, "count": 标题 + 正文中的命中次数}, ...]，按关键词库顺序
+    """
+    matcher = matcher or get_keyword_matcher()
+    counts = matcher.count(f"{title or ''} {content or ''}")
+    return [
+        {"keyword": keyword, "count": counts[keyword]}
+        for keyword in matcher.keywords if keyword in counts
+    ]
+
+
+def _on_keywords_changed(reason: str):
+    """关键词集合变化：递增关键词版本号（各进程随之重建缓存），并创建历史帖子的回填任务"""
+    try:
+        _keyword_cache.bump()
+        # 关键词分析按当前关键词库过滤，已缓存的历史范围报表随之失效
+        bump_version(HISTORY_VERSION)
+    except Exception as e:
+        print(f"[错误] 更新关键词版本号失败: {e}")
+        _keyword_cache.invalidate()
+    # 延迟导入，避免与回填服务循环导入
+    from backend.services.keyword_backfill_service import create_backfill_job
+    create_backfill_job(reason)
 
 
 def add_keyword(keyword: str) -> bool:
@@ -39,6 +106,7 @@ def add_keyword(keyword: str) -> bool:
             "keyword": keyword,
             "created_at": datetime.utcnow()
         })
+        _on_keywords_changed(f"add: {keyword}")
         return True
     except DuplicateKeyError:
         return False
@@ -47,6 +115,8 @@ def add_keyword(keyword: str) -> bool:
 def delete_keyword(keyword: str) -> bool:
     """删除关键词"""
     result = keywords_collection.delete_one({"keyword": keyword})
+    if result.deleted_count > 0:
+        _on_keywords_changed(f"delete: {keyword}")
     return result.deleted_count > 0
 
 
@@ -64,4 +134,6 @@ def update_keyword(old: str, new: str) -> bool:
         {"$set": {"keyword": new}}
     )
 
+    if result.matched_count > 0:
+        _on_keywords_changed(f"update: {old} -> {new}")
     return result.matched_count > 0
@@ -7,6 +7,7 @@ from backend.ml.agent_week_report import (
     generate_week_report_with_storage, 
     ReportStorage
 )
+from backend.core.db_executor import run_db
 
 class ReportService:
     """报告服务类"""
@@ -18,7 +19,7 @@ class ReportService:
         """创建报告并返回报告ID"""
         try:
             # 创建报告记录
-            mongo_id = self.storage.create_report(start_date, end_date, report_type)
+            mongo_id = await run_db(self.storage.create_report, start_date, end_date, report_type)
             
             return {
                 "success": True,
@@ -39,7 +40,7 @@ class ReportService:
     async def get_report_status(self, report_id: str) -> Dict[str, Any]:
         """获取报告状态"""
         try:
-            report = self.storage.get_report(report_id)
+            report = await run_db(self.storage.get_report, report_id)
             if not report:
                 return {
                     "success": False,
@@ -70,7 +71,7 @@ class ReportService:
     async def get_report_content(self, report_id: str) -> Dict[str, Any]:
         """获取报告内容"""
         try:
-            report = self.storage.get_report(report_id)
+            report = await run_db(self.storage.get_report, report_id)
             if not report:
                 return {
                     "success": False,
@@ -101,7 +102,7 @@ class ReportService:
     async def list_reports(self, limit: int = 10) -> Dict[str, Any]:
         """获取报告列表"""
         try:
-            reports = self.storage.list_reports(limit)
+            reports = await run_db(self.storage.list_reports, limit)
             return {
                 "success": True,
                 "data": reports
@@ -0,0 +1,158 @@
+# backend/tests/baseline_parser.py
+"""
+重构前的页面解析函数（基线提交中 crawler/fans_feedback.py 的原样拷贝，仅去掉了抓取 / 入库部分）
+
+test_parser.py 用它和 crawler/parser.py 的预编译版本在同一份 HTML 上对比输出，不要修改。
+"""
+import re
+from datetime import datetime, timedelta, UTC
+from lxml import etree
+
+
+def parse_created_at(text: str) -> datetime | None:
+    if not text:
+        return None
+
+    text = text.strip()
+    now = datetime.now(UTC)
+
+    # YYYY-MM-DD HH:MM
+    try:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M").replace(tzinfo=UTC)
+    except ValueError:
+        pass
+
+    # YYYY-MM-DD
+    try:
+        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=UTC)
+    except ValueError:
+        pass
+
+    # 支持其他格式：YYYY/MM/DD, YYYY.MM.DD
+    try:
+        text = text.replace("/", "-").replace(".", "-")
+        return datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=UTC)
+    except ValueError:
+        pass
+
+    # 今天
+    if text == "今天":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # 昨天
+    if text == "昨天":
+        return (now - timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    # HH:MM → 今天
+    if re.match(r"^\d{1,2}:\d{2}$", text):
+        hour, minute = map(int, text.split(":"))
+        return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    return None
+
+
+def safe_int(text: str) -> int:
+    try:
+        return int(text)
+    except Exception:
+        return 0
+
+
+def get_target_tbody_list(tree):
+    separatorline = tree.xpath("//tbody[@id='separatorline']")
+    if separatorline:
+        return tree.xpath("//tbody[@id='separatorline']/following-sibling::tbody")
+    return tree.xpath("//tbody")
+
+
+# ======================
+# 内容解析
+# ======================
+def extract_post_content(tree):
+    main_content = tree.xpath('(//td[contains(@class, "t_f")])[1]')
+    if not main_content:
+        return "", []
+
+    main = main_content[0]
+    texts = main.xpath('.//text()')
+
+    exclude_keywords = ['下载附件', '360社区', '上传', '本帖最后由', '编辑', 'B', 'KB', 'MB']
+    content_parts = []
+
+    for text in texts:
+        t = text.strip()
+        if (
+                t
+                and not any(k in t for k in exclude_keywords)
+                and not re.match(r'^\(\d+\.?\d*\s*(KB|MB|B)\)$', t)
+                and not ('.' in t and not re.search(r'[\u4e00-\u9fff]', t))
+        ):
+            content_parts.append(t)
+
+    images = [
+        img.get('zoomfile') or img.get('src')
+        for img in main.xpath('.//img')
+    ]
+
+    return "\n".join(content_parts), images
+
+
+def parse_post_list(tree):
+    posts = []
+
+    for tbody in get_target_tbody_list(tree):
+        post_id = tbody.get("id")
+        if not post_id:
+            continue
+
+        post = {
+            "post_id": post_id,
+            "title": "",
+            "username": "",
+            "category": "",
+            "status": "",
+            "has_attachment": False,
+            "created_at": None,
+            "view_count": 0,
+            "reply_count": 0,
+            "url": "",
+            "content": "",
+            "images": [],
+            "crawl_time": datetime.now(UTC)  # 修复：使用 datetime.now(UTC)
+        }
+
+        category = tbody.xpath('./tr/th/div[2]/a[1]/span/text()')
+        if category:
+            post["category"] = category[0].strip()
+            post["title"] = "".join(tbody.xpath('./tr/th/div[2]/a[2]/text()')).strip()
+            post["url"] = "".join(tbody.xpath('./tr/th/div[2]/a[2]/@href')).strip()
+        else:
+            post["title"] = "".join(tbody.xpath('./tr/th/div[2]/a[1]/text()')).strip()
+            post["url"] = "".join(tbody.xpath('./tr/th/div[2]/a[1]/@href')).strip()
+
+        post["username"] = "".join(
+            tbody.xpath('./tr/th/div[2]/div/span[1]/a/text()')
+        ).strip()
+
+        created_str = "".join(
+            tbody.xpath('./tr/th/div[2]/div/span[3]/text()')
+        ).strip()
+
+        post["created_at"] = parse_created_at(created_str)
+
+        post["reply_count"] = safe_int(
+            "".join(tbody.xpath('./tr/th/div[2]/div/a[1]/text()'))
+        )
+        post["view_count"] = safe_int(
+            "".join(tbody.xpath('./tr/th/div[2]/div/a[2]/text()'))
+        )
+
+        alt_texts = tbody.xpath('./tr/th/div[2]/img/@alt')
+        post["status"] = next((x for x in alt_texts if x != "attach_img"), "")
+        post["has_attachment"] = "attach_img" in alt_texts
+
+        posts.append(post)
+
+    return posts
@@ -0,0 +1,10 @@
+# backend/tests/conftest.py
+"""
+这些测试只覆盖纯函数，不需要 MongoDB / Redis
+
+部分被测模块导入时会经由 core.mongo_client 做一次连接检查（失败只打印）；
+没有配置 MONGODB_URI 时缩短服务器选择超时，避免每次运行都等待 30 秒
+"""
+import os
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017/SentinelEye?serverSelectionTimeoutMS=500")
@@ -0,0 +1,110 @@
+# backend/tests/test_buckets.py
+"""趋势分桶：周一开始的周桶、跨天的小时桶、补零的稠密数组，以及范围校验"""
+from datetime import date, datetime
+
+import pytest
+
+from backend.services.daily_stats_service import (
+    MAX_RANGE_DAYS,
+    bucket_counts,
+    bucket_labels,
+    category_hour_items,
+    category_items,
+    validate_range,
+)
+
+SUNDAY = date(2026, 10, 18)
+
+
+def day_stats(day: date, categories=None, hours=None) -> dict:
+    """get_daily_stats 中一天的统计（只包含分桶用到的字段）"""
+    return {
+        "date": datetime.combine(day, datetime.min.time()),
+        "categories": [{"name": name, "count": count} for name, count in (categories or {}).items()],
+        "hours": [{"hour": hour, "category": name, "count": count} for hour, name, count in (hours or [])],
+    }
+
+
+def test_week_buckets_start_on_monday():
+    start, end = SUNDAY, date(2026, 10, 27)   # 周日 → 下下周二
+    labels, buckets = bucket_counts(
+        [
+            day_stats(SUNDAY, {"蓝屏": 2}),
+            day_stats(date(2026, 10, 19), {"蓝屏": 1, "黑屏": 4}),   # 周一，新的一周
+            day_stats(date(2026, 10, 25), {"黑屏": 1}),              # 周日，仍属上一周
+            day_stats(date(2026, 10, 27), {"蓝屏": 5}),
+        ],
+        start, end, "week", category_items, category_hour_items,
+    )
+
+    # 第一个桶只有范围内的周日，标签为范围内的第一天
+    assert labels == ["10-18", "10-19", "10-26"]
+    assert buckets == [{"蓝屏": 2}, {"蓝屏": 1, "黑屏": 5}, {"蓝屏": 5}]
+
+
+def test_week_labels_for_range_starting_on_monday():
+    assert bucket_labels(date(2026, 10, 19), date(2026, 11, 1), "week") == ["10-19", "10-26"]
+
+
+def test_hour_buckets_across_two_days():
+    start, end = SUNDAY, date(2026, 10, 19)
+    labels, buckets = bucket_counts(
+        [
+            day_stats(SUNDAY, hours=[(0, "蓝屏", 1), (23, "蓝屏", 2), (23, "黑屏", 1)]),
+            day_stats(date(2026, 10, 19), hours=[(0, "蓝屏", 3), (13, "黑屏", 4)]),
+        ],
+        start, end, "hour", category_items, category_hour_items,
+    )
+
+    assert len(labels) == len(buckets) == 48
+    assert labels[0] == "10-18 00:00"
+    assert labels[23] == "10-18 23:00"
+    assert labels[24] == "10-19 00:00"
+    assert labels[-1] == "10-19 23:00"
+    assert buckets[0] == {"蓝屏": 1}
+    assert buckets[23] == {"蓝屏": 2, "黑屏": 1}
+    assert buckets[24] == {"蓝屏": 3}
+    assert buckets[24 + 13] == {"黑屏": 4}
+    assert sum(1 for bucket in buckets if bucket) == 4
+
+
+def test_empty_days_stay_empty():
+    start, end = SUNDAY, date(2026, 10, 22)
+    labels, buckets = bucket_counts(
+        [day_stats(SUNDAY), day_stats(date(2026, 10, 20), {"蓝屏": 1})],
+        start, end, "day", category_items, category_hour_items,
+    )
+
+    assert labels == ["10-18", "10-19", "10-20", "10-21", "10-22"]
+    assert buckets == [{}, {}, {"蓝屏": 1}, {}, {}]
+
+
+def test_days_outside_range_are_ignored():
+    labels, buckets = bucket_counts(
+        [day_stats(date(2026, 10, 17), {"蓝屏": 9}), day_stats(date(2026, 10, 20), {"蓝屏": 9})],
+        SUNDAY, date(2026, 10, 19), "day", category_items, category_hour_items,
+    )
+    assert buckets == [{}, {}]
+
+
+def test_validate_range():
+    validate_range(SUNDAY, SUNDAY)
+    validate_range(date(2026, 1, 1), date(2026, 12, 31), "hour")   # 365 天
+    validate_range(date(2024, 1, 1), date(2024, 12, 31), "week")   # 闰年 366 天
+
+
+def test_validate_range_too_long():
+    start = date(2025, 1, 1)
+    validate_range(start, date(2026, 1, 1))       # 含首尾正好 366 天
+    with pytest.raises(ValueError, match=str(MAX_RANGE_DAYS)):
+        validate_range(start, date(2026, 1, 2))   # 367 天
+
+
+def test_validate_range_end_before_start():
+    with pytest.raises(ValueError):
+        validate_range(SUNDAY, date(2026, 10, 17))
+
+
+def test_validate_range_unknown_granularity():
+    with pytest.raises(ValueError):
+        validate_range(SUNDAY, SUNDAY, "month")
@@ -0,0 +1,46 @@
+# backend/tests/test_change_detection.py
+"""增量爬取的变更检测：列表页元数据与库中一致的帖子不再抓取详情页"""
+import pytest
+
+from backend.crawler.fans_feedback import CHANGE_DETECTION_FIELDS, list_meta_changed
+
+STORED = {
+    "post_id": "normalthread_16175330",
+    "title": "玩游戏时蓝屏 0x00000116",
+    "reply_count": 12,
+    "view_count": 345,
+    "status": "",
+    "content": "玩英雄联盟大概半小时就会蓝屏",
+    "images": ["data/attachment/forum/202610/16/bsod.png"],
+}
+
+
+def list_row(**changes):
+    """列表页解析出的同一帖子（没有正文）"""
+    row = {key: STORED[key] for key in ("post_id", "title", *CHANGE_DETECTION_FIELDS)}
+    row.update(content="", images=[], **changes)
+    return row
+
+
+def test_unchanged_row_is_skipped():
+    assert not list_meta_changed(list_row(), STORED)
+
+
+def test_fields_not_on_the_list_page_are_ignored():
+    # 只比较回复数 / 浏览数 / 状态：列表行没有正文 / 图片，标题也不参与比较
+    assert not list_meta_changed(list_row(title="标题被编辑"), STORED)
+
+
+def test_status_only_change_is_refetched():
+    assert list_meta_changed(list_row(status="已解决"), STORED)
+
+
+@pytest.mark.parametrize("field, value", [("reply_count", 13), ("view_count", 346)])
+def test_count_change_is_refetched(field, value):
+    assert list_meta_changed(list_row(**{field: value}), STORED)
+
+
+def test_missing_stored_field_is_refetched():
+    # 变更检测上线前入库的文档可能缺少字段
+    legacy = {key: value for key, value in STORED.items() if key != "status"}
+    assert list_meta_changed(list_row(), legacy)
@@ -0,0 +1,43 @@
+# backend/tests/test_export_query.py
+"""导出接口的过滤条件：日期范围含首尾、分类、风险等级"""
+from datetime import datetime
+
+import pytest
+
+from backend.services.export_service import build_export_query
+
+
+def test_date_range_includes_both_ends():
+    query = build_export_query("created_at", "2026-01-01", "2026-01-31")
+
+    # 结束日期当天的帖子也要导出：上界是次日零点（不含）
+    assert query == {"created_at": {"$gte": datetime(2026, 1, 1), "$lt": datetime(2026, 2, 1)}}
+
+
+def test_single_day_range():
+    query = build_export_query("analyzed_at", "2026-3-2", "2026-3-2")
+    assert query == {"analyzed_at": {"$gte": datetime(2026, 3, 2), "$lt": datetime(2026, 3, 3)}}
+
+
+def test_open_ended_ranges():
+    assert build_export_query("created_at", start_date="2026-12-31") == {
+        "created_at": {"$gte": datetime(2026, 12, 31)}
+    }
+    assert build_export_query("created_at", end_date="2026-12-31") == {
+        "created_at": {"$lt": datetime(2027, 1, 1)}
+    }
+    assert build_export_query("created_at") == {}
+
+
+def test_category_and_risk_level():
+    query = build_export_query("analyzed_at", category="蓝屏问题", risk_level="High")
+    assert query == {
+        "category": "蓝屏问题",
+        "ai_result.risk_level": {"$in": ["high", "HIGH"]},
+    }
+
+
+@pytest.mark.parametrize("start, end", [("2026-02-01", "2026-01-31"), ("2026/01/01", None), ("2026-13-01", None)])
+def test_invalid_dates(start, end):
+    with pytest.raises(ValueError):
+        build_export_query("created_at", start, end)
@@ -0,0 +1,70 @@
+# backend/tests/test_fieldsets.py
+"""fields= 查询参数的解析、投影生成，以及告警接口的整组字段展开"""
+import pytest
+
+from backend.core.fieldsets import parse_fieldset, projection_for
+from backend.services.alarm_service import ALARM_AI_SOURCES, ALARM_POST_SOURCES, alarm_fieldset
+
+AVAILABLE = ("id", "title", "category", "created_at", "ai_result", "ai_result.scene")
+
+
+@pytest.mark.parametrize("fields", [None, "", "  "])
+def test_empty_fieldset_means_all(fields):
+    assert parse_fieldset(fields, AVAILABLE, always=("id",)) is None
+
+
+def test_parse_fieldset_dedupes_and_keeps_order():
+    selected = parse_fieldset(" created_at,title, ,title ", AVAILABLE, always=("id",))
+    assert selected == ["id", "created_at", "title"]
+
+
+def test_parse_fieldset_does_not_repeat_always_fields():
+    assert parse_fieldset("title,id", AVAILABLE, always=("id",)) == ["title", "id"]
+
+
+def test_parse_fieldset_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="content"):
+        parse_fieldset("title,content", AVAILABLE)
+
+
+def test_projection_maps_paths():
+    assert projection_for(["id", "title"], {"id": "_id"}) == {"_id": 1, "title": 1}
+    assert projection_for(["title", "category"]) == {"category": 1, "title": 1, "_id": 0}
+
+
+def test_projection_keeps_parent_over_child():
+    # 同时投影 ai_result 和 ai_result.scene 会被 MongoDB 判为路径冲突
+    assert projection_for(["ai_result.scene", "ai_result"]) == {"ai_result": 1, "_id": 0}
+
+
+def test_alarm_fieldset_defaults_to_everything():
+    selected, analysis_projection, post_projection = alarm_fieldset(None)
+
+    assert selected is None
+    assert analysis_projection == {
+        "post_id": 1, "analyzed_at": 1, "ai_result.risk_level": 1,
+        **{f"ai_result.{source}": 1 for source in ALARM_AI_SOURCES.values()},
+    }
+    assert post_projection == {source: 1 for source in ALARM_POST_SOURCES.values()}
+
+
+def test_alarm_fieldset_expands_groups():
+    selected, analysis_projection, post_projection = alarm_fieldset("post,ai_result.trigger,post.title")
+
+    assert selected == [f"post.{key}" for key in ALARM_POST_SOURCES] + ["ai_result.trigger"]
+    assert analysis_projection == {"post_id": 1, "analyzed_at": 1, "ai_result.risk_level": 1, "ai_result.scene": 1}
+    assert post_projection == {source: 1 for source in ALARM_POST_SOURCES.values()}
+
+
+def test_alarm_fieldset_without_post_fields():
+    selected, analysis_projection, post_projection = alarm_fieldset("risk_level")
+
+    assert selected == ["risk_level"]
+    # 风险等级用于过滤，始终取回；不需要帖子字段时关联只取 _id
+    assert analysis_projection == {"post_id": 1, "analyzed_at": 1, "ai_result.risk_level": 1}
+    assert post_projection == {"_id": 1}
+
+
+def test_alarm_fieldset_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        alarm_fieldset("post.secret")
@@ -0,0 +1,87 @@
+# backend/tests/test_image_dedup.py
+"""感知哈希的分段（band）与汉明距离：距离不超过 BAND_COUNT - 1 的两个哈希至少有一段相同"""
+import random
+
+import pytest
+
+from backend.services.image_dedup_service import (
+    BAND_COUNT,
+    DEDUP_MAX_DISTANCE,
+    HASH_SIZE,
+    hamming_distance,
+    split_bands,
+    text_similarity,
+)
+
+BITS = HASH_SIZE * HASH_SIZE
+
+
+def band_widths(bits=BITS, band_count=BAND_COUNT):
+    base, extra = divmod(bits, band_count)
+    return [base + (1 if index < extra else 0) for index in range(band_count)]
+
+
+def join_bands(bands):
+    value = 0
+    for band, width in zip(bands, band_widths()):
+        value = (value << width) | int(band.split(":")[1], 16)
+    return value
+
+
+def flip_bits(value, positions):
+    for position in positions:
+        value ^= 1 << position
+    return value
+
+
+def test_hamming_distance():
+    assert hamming_distance(0, 0) == 0
+    assert hamming_distance(0b1011, 0b0001) == 2
+    assert hamming_distance(0, (1 << BITS) - 1) == BITS
+
+
+def test_split_bands_layout():
+    value = random.Random(1).getrandbits(BITS)
+    bands = split_bands(value)
+
+    assert len(bands) == BAND_COUNT
+    assert [band.split(":")[0] for band in bands] == [str(index) for index in range(BAND_COUNT)]
+    assert band_widths() == [13, 13, 13, 13, 12]
+    assert join_bands(bands) == value
+
+
+@pytest.mark.parametrize("value", [0, 1, (1 << BITS) - 1, 0x8000000000000001])
+def test_split_bands_edges(value):
+    assert join_bands(split_bands(value)) == value
+
+
+def test_near_duplicates_share_a_band():
+    assert DEDUP_MAX_DISTANCE <= BAND_COUNT - 1
+    rng = random.Random(20261017)
+    for _ in range(500):
+        value = rng.getrandbits(BITS)
+        distance = rng.randint(0, BAND_COUNT - 1)
+        other = flip_bits(value, rng.sample(range(BITS), distance))
+
+        assert hamming_distance(value, other) == distance
+        assert set(split_bands(value)) & set(split_bands(other))
+
+
+def test_one_flip_per_band_shares_nothing():
+    # 每段各翻转一位（距离 = BAND_COUNT）时没有相同的段，说明 DEDUP_MAX_DISTANCE 受分段数限制
+    positions, shift = [], BITS
+    for width in band_widths():
+        shift -= width
+        positions.append(shift)
+    other = flip_bits(0, positions)
+
+    assert hamming_distance(0, other) == BAND_COUNT
+    assert not set(split_bands(0)) & set(split_bands(other))
+
+
+def test_text_similarity():
+    assert text_similarity("玩游戏蓝屏", "玩游戏蓝屏") == 1.0
+    assert text_similarity("玩 游戏 蓝屏", "玩游戏蓝屏") == 1.0
+    assert text_similarity("玩游戏蓝屏", "开机黑屏") == 0.0
+    assert text_similarity("", "玩游戏蓝屏") == 0.0
+    assert 0 < text_similarity("玩游戏蓝屏 0x116", "玩游戏时蓝屏") < 1
@@ -0,0 +1,68 @@
+# backend/tests/test_image_store.py
+"""图片缓存：相同内容只存一份，超过上限按最近读取时间（LRU）淘汰"""
+import time
+
+import pytest
+
+from backend.core.image_store import EVICT_TARGET_RATIO, ImageStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ImageStore(tmp_path, max_bytes=1000)
+    yield store
+    store.close()
+
+
+def blob_files(store):
+    return sorted(path.name for path in (store.root / "blobs").rglob("*") if path.is_file())
+
+
+def test_same_bytes_share_one_blob(store):
+    data = b"\x89PNG" + b"a" * 100
+    sha = store.put("https://bbs.360.cn/a.png", data)
+
+    assert store.put("https://bbs.360.cn/copy-of-a.png", data) == sha
+    assert blob_files(store) == [sha]
+    assert store.total_bytes() == len(data)
+    assert store.get("https://bbs.360.cn/a.png") == data
+    assert store.get("https://bbs.360.cn/copy-of-a.png") == data
+
+
+def test_evicts_least_recently_read(store):
+    blobs = {name: bytes([index]) * 300 for index, name in enumerate("abc")}
+    for name, data in blobs.items():
+        store.put(name, data)
+        time.sleep(0.01)
+    time.sleep(0.01)
+    assert store.get("a") == blobs["a"]   # a 最近被读取，b 成为最久未使用
+    time.sleep(0.01)
+
+    store.put("d", b"d" * 300)            # 1200 > 1000，降到 900 以下
+
+    assert store.total_bytes() <= store.max_bytes * EVICT_TARGET_RATIO
+    assert store.get("b") is None
+    assert store.get("a") == blobs["a"]
+    assert store.get("c") == blobs["c"]
+    assert store.get("d") == b"d" * 300
+    assert len(blob_files(store)) == 3
+
+
+def test_put_restores_blob_evicted_by_another_process(store):
+    data = b"x" * 100
+    sha = store.put("u1", data)
+    # 其他进程淘汰了文件（索引已删），本进程随后写入相同内容
+    store._blob_path(sha).unlink()
+
+    store.put("u2", data)
+    assert store.get("u2") == data
+    assert store.get("u1") == data
+
+
+def test_missing_blob_cleans_up_index(store):
+    sha = store.put("u1", b"y" * 50)
+    store._blob_path(sha).unlink()
+
+    assert store.get("u1") is None
+    assert not store.contains("u1")
+    assert store.total_bytes() == 0
@@ -0,0 +1,87 @@
+# backend/tests/test_keyword_matcher.py
+"""Aho-Corasick 关键词匹配与逐个关键词子串查找（str.count / str.find）结果一致"""
+import random
+
+import pytest
+
+from backend.core.keyword_matcher import KeywordMatcher
+
+KEYWORDS = ["蓝屏", "蓝屏代码", "屏", "黑屏", "aa", "aaa", "ab", "BSOD", "卡死"]
+
+
+def naive_count(keywords, text):
+    lowered = text.lower()
+    counts = {}
+    for keyword in keywords:
+        count = lowered.count(keyword.lower())
+        if count:
+            counts[keyword] = count
+    return counts
+
+
+def naive_offsets(keyword, text):
+    lowered, needle = text.lower(), keyword.lower()
+    offsets, start = [], lowered.find(needle)
+    while start != -1:
+        offsets.append(start)
+        start = lowered.find(needle, start + len(needle))
+    return offsets
+
+
+def random_texts(count=300, seed=20261017):
+    rng = random.Random(seed)
+    alphabet = ["蓝", "屏", "代", "码", "黑", "卡", "死", "a", "A", "b", "B", "s", "o", "d", "D", " "]
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(KEYWORDS)
+
+
+def test_count_matches_naive(matcher):
+    for text in random_texts():
+        assert matcher.count(text) == naive_count(KEYWORDS, text), text
+
+
+def test_matched_and_contains_any_match_naive(matcher):
+    for text in random_texts():
+        expected = set(naive_count(KEYWORDS, text))
+        assert matcher.matched(text) == expected, text
+        assert matcher.contains_any(text) == bool(expected), text
+
+
+def test_offsets_match_naive(matcher):
+    for text in random_texts():
+        expected = {k: naive_offsets(k, text) for k in KEYWORDS if naive_offsets(k, text)}
+        assert matcher.offsets(text) == expected, text
+
+
+def test_overlapping_hits():
+    matcher = KeywordMatcher(["aa", "aaa"])
+    # 同一关键词不重叠计数（与 str.count 一致），不同关键词各自计数
+    assert matcher.count("aaaa") == {"aa": 2, "aaa": 1}
+    hits = [(hit.keyword, hit.start, hit.end) for hit in matcher.iter_hits("aaa")]
+    assert [end for _, _, end in hits] == sorted(end for _, _, end in hits)
+    assert sorted(hits) == [("aa", 0, 2), ("aa", 1, 3), ("aaa", 0, 3)]
+
+
+def test_case_insensitive_keeps_original_keyword():
+    matcher = KeywordMatcher(["BSOD"])
+    assert matcher.count("bsod, Bsod 又是 BSOD") == {"BSOD": 3}
+
+
+def test_blank_and_duplicate_keywords():
+    matcher = KeywordMatcher(["蓝屏", " ", "", "蓝屏 ", None])
+    assert matcher.keywords == ("蓝屏",)
+    assert len(matcher) == 1
+
+
+def test_empty_inputs():
+    assert not KeywordMatcher([])
+    assert KeywordMatcher([]).count("蓝屏") == {}
+    assert KeywordMatcher(["蓝屏"]).count("") == {}
+    assert KeywordMatcher(["蓝屏"]).matched(None) == set()
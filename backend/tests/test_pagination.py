@@ -0,0 +1,55 @@
+# backend/tests/test_pagination.py
+"""游标的编码 / 解析往返，以及 keyset_filter 生成的翻页条件"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from backend.core.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_sort
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "created_at": datetime(2026, 10, 16, 21, 5, 30, 123000)}
+    cursor = encode_cursor(doc, "created_at")
+
+    assert "=" not in cursor  # 去掉了 base64 填充，可直接放进查询参数
+    assert decode_cursor(cursor) == (doc["created_at"], doc["_id"])
+
+
+def test_cursor_round_trip_without_sort_value():
+    doc = {"_id": ObjectId()}
+    assert decode_cursor(encode_cursor(doc, "created_at")) == (None, doc["_id"])
+
+
+def test_keyset_filter_continues_after_cursor():
+    doc = {"_id": ObjectId(), "analyzed_at": datetime(2026, 10, 1, 8, 0)}
+    query = keyset_filter("analyzed_at", encode_cursor(doc, "analyzed_at"))
+
+    assert query == {"$or": [
+        {"analyzed_at": {"$lt": doc["analyzed_at"]}},
+        {"analyzed_at": doc["analyzed_at"], "_id": {"$lt": doc["_id"]}},
+        {"analyzed_at": None},
+    ]}
+
+
+def test_keyset_filter_after_null_sort_value():
+    # 排序字段为 null 的记录在倒序中排在最后，之后只剩 _id 更小的 null 记录
+    doc = {"_id": ObjectId(), "created_at": None}
+    query = keyset_filter("created_at", encode_cursor(doc, "created_at"))
+
+    assert query == {"created_at": None, "_id": {"$lt": doc["_id"]}}
+
+
+def test_keyset_filter_first_page():
+    assert keyset_filter("created_at", None) == {}
+    assert keyset_filter("created_at", "") == {}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor({"_id": "bad"}, "created_at")])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        keyset_filter("created_at", cursor)
+
+
+def test_keyset_sort_matches_filter_direction():
+    assert keyset_sort("created_at") == [("created_at", -1), ("_id", -1)]
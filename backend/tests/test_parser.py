@@ -0,0 +1,78 @@
+# backend/tests/test_parser.py
+"""预编译 XPath 的 crawler/parser.py 与重构前的解析函数在保存的列表页 / 详情页上输出一致"""
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from backend.crawler import parser
+from backend.tests import baseline_parser
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_tree(name: str):
+    return etree.HTML((FIXTURES / name).read_text(encoding="utf-8"))
+
+
+def without_crawl_time(posts):
+    # crawl_time 取的是解析时刻，两次解析不会相同
+    return [{key: value for key, value in post.items() if key != "crawl_time"} for post in posts]
+
+
+def test_post_list_matches_baseline():
+    tree = load_tree("thread_list.html")
+    posts = parser.parse_post_list(tree)
+
+    assert without_crawl_time(posts) == without_crawl_time(baseline_parser.parse_post_list(tree))
+    # 分隔行之前的置顶帖、没有 id 的 tbody 被跳过
+    assert [post["post_id"] for post in posts] == [
+        "normalthread_16175330",
+        "normalthread_16175331",
+        "normalthread_16175332",
+        "normalthread_16175333",
+        "normalthread_16175334",
+    ]
+    first = posts[0]
+    assert first["category"] == "蓝屏问题"
+    assert first["title"] == "玩游戏时蓝屏 0x00000116"
+    assert first["status"] == "已解决"
+    assert first["has_attachment"] is True
+    assert (first["reply_count"], first["view_count"]) == (12, 345)
+
+
+def test_post_list_without_separator_matches_baseline():
+    tree = load_tree("thread_list.html")
+    for tbody in tree.xpath("//tbody[@id='separatorline']"):
+        tbody.getparent().remove(tbody)
+
+    posts = parser.parse_post_list(tree)
+    assert without_crawl_time(posts) == without_crawl_time(baseline_parser.parse_post_list(tree))
+    assert posts[0]["post_id"] == "stickthread_15800001"
+
+
+def test_post_content_matches_baseline():
+    tree = load_tree("thread_detail.html")
+    content, images = parser.extract_post_content(tree)
+
+    assert (content, images) == baseline_parser.extract_post_content(tree)
+    # 只取主楼；编辑记录、附件说明、无中文的文件名被过滤
+    assert "玩英雄联盟大概半小时就会蓝屏，" in content
+    assert "试试关闭硬件加速" not in content
+    assert "编辑" not in content and "下载附件" not in content
+    assert images == ["data/attachment/forum/202610/16/bsod.png", "data/attachment/forum/202610/16/dxdiag.jpg"]
+
+
+def test_post_content_without_main_post():
+    tree = etree.HTML("<html><body><div>帖子不存在或已被删除</div></body></html>")
+    assert parser.extract_post_content(tree) == baseline_parser.extract_post_content(tree) == ("", [])
+
+
+@pytest.mark.parametrize("text", ["2026-10-16 21:05", "2026-10-15", "2026/09/30", "2026.09.29", "刚刚", "", "  2026-01-02  "])
+def test_absolute_created_at_matches_baseline(text):
+    assert parser.parse_created_at(text) == baseline_parser.parse_created_at(text)
+
+
+@pytest.mark.parametrize("text", ["12", "0", "", "-", "1.2万", None])
+def test_safe_int_matches_baseline(text):
+    assert parser.safe_int(text) == baseline_parser.safe_int(text)
@@ -0,0 +1,118 @@
+# backend/tests/test_response_cache.py
+"""日期范围响应缓存：按字节数的 LRU 淘汰，以及按版本号失效"""
+from datetime import timedelta
+
+import pytest
+
+from backend.core import version_counter
+from backend.core.fast_json import dumps
+from backend.core.forum_time import forum_today
+from backend.core.response_cache import RangeResponseCache
+
+TODAY = forum_today()
+CLOSED = [(TODAY - timedelta(days=7), TODAY - timedelta(days=1))]
+LIVE = [(TODAY - timedelta(days=6), TODAY)]
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    """版本号存在内存里，测试中直接修改"""
+    values = {"ingest": 1, "history": 1}
+    monkeypatch.setattr(version_counter, "get_version", lambda name: values[name])
+    return values
+
+
+def make_cache(**kwargs):
+    # poll_seconds=0：每次读取都重新取版本号
+    return RangeResponseCache("ingest", "history", poll_seconds=0, **kwargs)
+
+
+class Computer:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_hit_after_first_compute(versions):
+    cache = make_cache()
+    compute = Computer({"total": 3})
+
+    assert cache.get_or_compute("summary", CLOSED, compute) == {"total": 3}
+    assert cache.get_or_compute("summary", CLOSED, compute) == {"total": 3}
+    assert compute.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_closed_range_ignores_ingest_version(versions):
+    cache = make_cache()
+    compute = Computer([1, 2, 3])
+    cache.get_or_compute("summary", CLOSED, compute)
+
+    versions["ingest"] += 1
+    cache.get_or_compute("summary", CLOSED, compute)
+    assert compute.calls == 1
+
+    versions["history"] += 1
+    cache.get_or_compute("summary", CLOSED, compute)
+    assert compute.calls == 2
+
+
+def test_live_range_invalidated_by_ingest_version(versions):
+    cache = make_cache()
+    compute = Computer([1, 2, 3])
+    cache.get_or_compute("summary", LIVE, compute)
+
+    versions["ingest"] += 1
+    cache.get_or_compute("summary", LIVE, compute)
+    assert compute.calls == 2
+    assert cache.stats()["stale"] == 1
+
+
+def test_uncacheable_without_versions(monkeypatch):
+    def unavailable(name):
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(version_counter, "get_version", unavailable)
+    cache = make_cache()
+    compute = Computer("value")
+
+    cache.get_or_compute("summary", CLOSED, compute)
+    cache.get_or_compute("summary", CLOSED, compute)
+    assert compute.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used(versions):
+    value = "x" * 20
+    size = len(dumps(value))
+    cache = make_cache(max_bytes=size * 2)
+    spans = {name: [(TODAY - timedelta(days=days), TODAY - timedelta(days=1))]
+             for name, days in (("a", 2), ("b", 3), ("c", 4))}
+
+    cache.get_or_compute("summary", spans["a"], Computer(value))
+    cache.get_or_compute("summary", spans["b"], Computer(value))
+    cache.get_or_compute("summary", spans["a"], Computer(value))   # a 变为最近使用
+    cache.get_or_compute("summary", spans["c"], Computer(value))   # 超出上限，淘汰 b
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == size * 2
+    compute = Computer(value)
+    cache.get_or_compute("summary", spans["a"], compute)
+    assert compute.calls == 0
+    cache.get_or_compute("summary", spans["b"], compute)
+    assert compute.calls == 1
+
+
+def test_oversized_value_is_not_cached(versions):
+    cache = make_cache(max_bytes=8)
+    compute = Computer("x" * 20)
+
+    cache.get_or_compute("summary", CLOSED, compute)
+    cache.get_or_compute("summary", CLOSED, compute)
+    assert compute.calls == 2
+    assert cache.stats()["bytes"] == 0
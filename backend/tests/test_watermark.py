@@ -0,0 +1,47 @@
+# backend/tests/test_watermark.py
+"""快速增量的水位与提前停止：整页已知且未变化时停止，出现水位之上的新帖时继续"""
+import pytest
+
+from backend.crawler.fans_feedback import is_quiet_page, thread_number
+
+WATERMARK = 16175330
+
+
+def posts(*numbers):
+    return [{"post_id": f"normalthread_{number}"} for number in numbers]
+
+
+@pytest.mark.parametrize("post_id, number", [
+    ("normalthread_16175330", 16175330),
+    ("stickthread_15800001", 15800001),
+    ("normalthread_", 0),
+    ("separatorline", 0),
+    ("", 0),
+    (None, 0),
+])
+def test_thread_number(post_id, number):
+    assert thread_number(post_id) == number
+
+
+def test_known_unchanged_page_stops():
+    assert is_quiet_page(posts(16175330, 16175329, 16170000), [], WATERMARK)
+
+
+def test_post_above_watermark_keeps_going():
+    # 新帖已入库、列表元数据也没变（例如上一轮中途失败），但高于水位说明水位还没推进到这里
+    candidates = posts(16175331, 16175329)
+    assert not is_quiet_page(candidates, [], WATERMARK)
+
+
+def test_page_with_changed_post_keeps_going():
+    candidates = posts(16175329, 16175328)
+    assert not is_quiet_page(candidates, candidates[:1], WATERMARK)
+
+
+def test_page_without_candidates_keeps_going():
+    # 整页都被过滤掉（没有日期）时无法判断，不能据此停止
+    assert not is_quiet_page([], [], WATERMARK)
+
+
+def test_first_run_without_watermark_never_stops():
+    assert not is_quiet_page(posts(16175330), [], 0)
@@ -28,9 +28,11 @@ export const getDashboardStats = (limit = null) => {
     })
 }
 
-// 新增：获取所有反馈
-export const getAllFeedbacks = () => {
-    return apiClient.get('/feedback/all')
+// 新增：获取所有反馈（游标分页，cursor 为上一页返回的 next_cursor）
+export const getAllFeedbacks = (cursor = null, limit = 50) => {
+    return apiClient.get('/feedback/all', {
+        params: cursor ? { cursor, limit } : { limit }
+    })
 }
 
 // 新增：健康检查
@@ -68,12 +70,24 @@ export const getRecentAiAnalyses = (limit = 4) => {
   return apiClient.get('/ai-analysis/recent', { params })
 }
 
-// 获取AI分析历史记录（分页）
-export const getAllAiAnalyses = (skip = 0, limit = 10) => {
+// 获取AI分析历史记录（游标分页，cursor 为上一页返回的 next_cursor）
+export const getAllAiAnalyses = (cursor = null, limit = 10) => {
   return apiClient.get('/ai-analysis/all', {
-    params: {
-      skip,
-      limit
-    }
+    params: cursor ? { cursor, limit } : { limit }
+  })
+}
+
+// 订阅实时事件（SSE）：handlers 以事件类型为键，返回取消订阅函数
+export const subscribeEvents = (handlers = {}) => {
+  const source = new EventSource(`${getBaseURL()}/events/stream`)
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (event) => {
+      try {
+        handler(JSON.parse(event.data).data)
+      } catch (err) {
+        console.error('处理实时事件失败:', err)
+      }
+    })
   })
-}
\ No newline at end of file
+  return () => source.close()
+}